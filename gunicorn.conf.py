@@ -0,0 +1,35 @@
+"""
+gunicorn settings: `gunicorn -c gunicorn.conf.py` from the project directory.
+
+WSGI (default): qpr_project.wsgi on sync workers, 2 x cores + 1 of them;
+a worker handles one request at a time, so the extra workers cover the time
+requests spend waiting on the database.
+
+ASGI (QPR_ASGI=1): qpr_project.asgi on uvicorn workers, one per core; each
+worker interleaves many requests on its event loop and the JSON API runs
+its async views (QPR_ASYNC_API). With PostgreSQL use QPR_DB_POOL=1.
+
+QPR_WORKERS and QPR_BIND override the worker count and address.
+"""
+import multiprocessing
+import os
+
+ASGI = os.environ.get('QPR_ASGI') == '1'
+cores = multiprocessing.cpu_count()
+
+bind = os.environ.get('QPR_BIND', '0.0.0.0:8000')
+if ASGI:
+    wsgi_app = 'qpr_project.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+    workers = int(os.environ.get('QPR_WORKERS', cores))
+else:
+    wsgi_app = 'qpr_project.wsgi:application'
+    worker_class = 'sync'
+    workers = int(os.environ.get('QPR_WORKERS', 2 * cores + 1))
+
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then so a slow leak cannot grow unbounded
+max_requests = 1000
+max_requests_jitter = 100
@@ -5,7 +5,8 @@ from .models import (
     Section5EnglishRepliedHindiData, Section6IssuedLettersData,
     Section7NotingsData, Section8WorkshopsData,
     Section9ImplementationCommitteeData, Section10HindiAdvisoryData,
-    Section11SpecificAchievementsData, UserProfile, ManagerRequest
+    Section11SpecificAchievementsData, UserProfile, ManagerRequest,
+    ManagerRequestRecipient, Job
 )
 
 
@@ -99,3 +100,11 @@ admin.site.register(Section10HindiAdvisoryData)
 admin.site.register(Section11SpecificAchievementsData)
 admin.site.register(UserProfile)
 admin.site.register(ManagerRequest)
+admin.site.register(ManagerRequestRecipient)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'progress_done', 'progress_total', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    readonly_fields = ['started_at', 'finished_at', 'updated_at']
@@ -0,0 +1,148 @@
+"""
+Async variants of the JSON API views, for ASGI deployments.
+
+Same URLs, parameters and responses as the views in views.py; urls.py routes
+to these instead when QPR_ASYNC_API is set, which qpr_project/asgi.py does.
+Reads go through the async ORM and cache API, so a worker keeps serving
+other requests while one waits on the database. Saves need
+transaction.atomic() and the version/rollup signals, which only exist in
+sync code, and run the sync helpers from views.py with sync_to_async.
+"""
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from .models import QPRRecord
+from .record_cache import acached_serialized_records
+from .views import (
+    _create_edit_request, _not_modified, _record_validator_aggregates, _records_page_response,
+    _records_query, _save_record, _set_validators, _validators_from_stats, _with_edit_flags,
+    serialize_qpr_record,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def _record_validators(records, user):
+    """Async views._record_validators()"""
+    stats = await records.order_by().aaggregate(**_record_validator_aggregates())
+    return _validators_from_stats(stats, user)
+
+
+@csrf_exempt
+async def api_records(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Unauthorized'}, status=401)
+
+    if request.method == 'GET':
+        try:
+            records, limit = _records_query(request, user)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        # Answer revalidations with 304 before touching the record data
+        _, etag = await _record_validators(records, user)
+        not_modified = _not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        # Fetch one extra row to know whether another page follows
+        records = [record async for record in records.order_by('-id')[:limit + 1]]
+        has_more = len(records) > limit
+        records = records[:limit]
+
+        serialized = await acached_serialized_records(records, serialize_qpr_record)
+        return _records_page_response(records, has_more, serialized, etag)
+
+    elif request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+            record = await sync_to_async(_save_record)(user, data)
+            return JsonResponse({'id': record.id, 'message': 'Saved successfully!'})
+        except QPRRecord.DoesNotExist:
+            return JsonResponse({'error': 'Record not found or access denied'}, status=404)
+        except Exception as e:
+            logger.exception('Saving QPR record failed')
+            return JsonResponse({'error': str(e)}, status=500)
+
+    elif request.method == 'DELETE':
+        record_id = request.GET.get('id')
+        if record_id:
+            await QPRRecord.objects.filter(pk=record_id, user=user).adelete()
+            return JsonResponse({'message': 'Deleted'})
+
+    return JsonResponse({'error': 'Invalid method'}, status=400)
+
+
+async def api_record_detail(request, record_id):
+    """Return a single record of the user as JSON with all related section data"""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Unauthorized'}, status=401)
+    try:
+        record_count, etag = await _record_validators(
+            QPRRecord.objects.filter(pk=record_id, user=user), user
+        )
+        if not record_count:
+            raise QPRRecord.DoesNotExist
+        not_modified = _not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        record = await QPRRecord.objects.with_edit_approval().aget(pk=record_id, user=user)
+        data = (await acached_serialized_records([record], serialize_qpr_record)).get(record.pk)
+        if data is None:
+            raise QPRRecord.DoesNotExist
+
+        return _set_validators(JsonResponse(_with_edit_flags(data, record), safe=False), etag)
+    except QPRRecord.DoesNotExist:
+        return JsonResponse({'error': 'Record not found or access denied'}, status=404)
+
+
+async def api_session(request):
+    """Cheap authentication probe for the frontend; no record data is loaded"""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Unauthorized'}, status=401)
+    response = JsonResponse({'authenticated': True, 'employee_code': user.username})
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
+
+@csrf_exempt
+async def request_edit_api(request):
+    """Handle requests to edit submitted QPR/Profile records"""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Unauthorized'}, status=401)
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid method'}, status=400)
+
+    try:
+        data = json.loads(request.body)
+        request_type = data.get('request_type')  # 'qpr' or 'profile'
+        reason = data.get('reason', '')
+
+        record = None
+        if request_type == 'qpr':
+            record = await QPRRecord.objects.aget(pk=data.get('record_id'), user=user)
+            reason = f"Edit request for QPR ({record.officeName} - {record.quarter}): {reason}"
+        elif request_type == 'profile':
+            reason = f"Edit request for profile: {reason}"
+        else:
+            return JsonResponse({'success': False, 'error': 'Invalid request type'}, status=400)
+
+        # Only Admin approves/rejects edit requests
+        if not await sync_to_async(_create_edit_request)(user, request_type, reason, qpr_record=record):
+            return JsonResponse({'success': False, 'error': 'No Admin users found in the system'}, status=400)
+
+        return JsonResponse({'success': True, 'message': 'Request sent to Admin for approval'})
+    except QPRRecord.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Record not found'}, status=404)
+    except Exception as e:
+        logger.exception('Creating edit request failed')
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
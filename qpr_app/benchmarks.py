@@ -0,0 +1,346 @@
+"""
+Benchmark suite for the QPR endpoints and dashboards.
+
+generate_data() fills an (empty, throwaway) database with a synthetic
+organisation; run_benchmarks() measures every endpoint in ENDPOINTS at each
+scale: wall time, query count (CaptureQueriesContext) and peak Python memory
+(tracemalloc). measure_concurrent_saves() adds the save throughput when
+several users save at once, each on their own thread and database
+connection. `manage.py benchmark` drives it against a test database and
+writes the results as JSON.
+
+Query counts must not depend on the amount of data: query_growth_failures()
+lists every endpoint whose count at a larger scale exceeds the smallest one.
+"""
+import statistics
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connection, connections
+from django.db.models import Max
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from .fragment_cache import invalidate_all_fragments
+from .imports import iter_batches
+from .models import ManagerRequest, ManagerRequestRecipient, QPRRecord, UserProfile
+from .rollups import rebuild_hod_rollup
+from .sections import SECTION_SCHEMA, INT, DATE, TEXT, section_values
+
+QUARTER_LABELS = ['30 जून / Jun 30', '30 सितंबर / Sep 30', '31 दिसंबर / Dec 31', '31 मार्च / Mar 31']
+FIRST_YEAR = 2025
+BATCH_SIZE = 500
+
+# Measured with private local-memory caches, so clearing them between runs never
+# touches a shared cache the application itself uses
+BENCHMARK_CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'benchmark-{alias}'}
+    for alias in ('default', 'records', 'template_fragments')
+}
+
+
+@dataclass
+class BenchmarkData:
+    """Accounts and ids the endpoints are exercised with"""
+    admin: User
+    hod: User
+    user: User
+    record_id: int
+    hods: int
+    users: int
+    records: int
+
+
+def _periods(count):
+    """(quarter, fiscal year) pairs, four quarters per year"""
+    return [
+        (QUARTER_LABELS[i % 4], f'{FIRST_YEAR + i // 4}-{FIRST_YEAR + i // 4 + 1}')
+        for i in range(count)
+    ]
+
+
+def _details(seed):
+    """A complete form details dictionary with values derived from seed"""
+    values = {INT: str(seed % 97), DATE: f'2025-{seed % 12 + 1:02d}-15', TEXT: f'कार्य {seed}'}
+    return {key: values[kind] for _, _, fields in SECTION_SCHEMA for key, _, kind in fields}
+
+
+def _create_users(rows, password):
+    """bulk_create (User kwargs, UserProfile kwargs) pairs; returns the users in order"""
+    users = User.objects.bulk_create([User(password=password, **user) for user, _ in rows])
+    ids = dict(User.objects.filter(
+        username__in=[user.username for user in users]
+    ).values_list('username', 'id'))
+    UserProfile.objects.bulk_create([
+        UserProfile(user_id=ids[user['username']], employee_code=user['username'], **profile)
+        for user, profile in rows
+    ])
+    return list(User.objects.filter(id__in=ids.values()).order_by('id'))
+
+
+def generate_data(hods=2, users_per_hod=5, quarters=2, records_per_quarter=1):
+    """
+    Create an admin, `hods` HODs with `users_per_hod` users each, and for every
+    user `records_per_quarter` QPR records (all eleven sections) in each of
+    `quarters` quarters. Every fifth user has a pending QPR edit request.
+    Rows are written with bulk_create, so the rollup table is rebuilt at the end.
+    """
+    password = make_password(None)  # Unusable; the benchmark client uses force_login
+    admin, = _create_users([(
+        {'username': 'bench-admin', 'first_name': 'Admin'},
+        {'role': 'admin', 'name': 'Benchmark Admin', 'profile_updated': True},
+    )], password)
+    hod_users = _create_users([
+        ({'username': f'bench-hod-{h}', 'first_name': f'Hod {h}'},
+         {'role': 'hod', 'hod_name': f'Hod {h}', 'name': f'Hod {h}', 'profile_updated': True})
+        for h in range(hods)
+    ], password)
+    users = []
+    for batch in iter_batches(range(hods * users_per_hod), BATCH_SIZE):
+        users += _create_users([
+            ({'username': f'bench-user-{i}', 'first_name': f'User {i}', 'email': f'user{i}@office.gov'},
+             {'role': 'user', 'hod_name': f'Hod {i % hods}', 'name': f'User {i}',
+              'office_name': f'Office {i}', 'office_code': f'OC{i}', 'profile_updated': i % 2 == 0})
+            for i in batch
+        ], password)
+
+    periods = _periods(quarters)
+    record_count = 0
+    for batch in iter_batches(users, max(BATCH_SIZE // max(quarters * records_per_quarter, 1), 1)):
+        records = [
+            QPRRecord(
+                user=user, officeName=f'Office {user.id}', officeCode=f'OC{user.id}',
+                region="भाषा क्षेत्र 'क' / Region A", quarter=quarter, year=year,
+                status='Submitted' if (user.id + n) % 3 else 'Draft',
+                is_submitted=bool((user.id + n) % 3),
+                email=user.email,
+            )
+            for user in batch
+            for n, (quarter, year) in enumerate(
+                period for period in periods for _ in range(records_per_quarter)
+            )
+        ]
+        QPRRecord.objects.bulk_create(records)
+        sections = {}
+        for n, record in enumerate(records, start=record_count):
+            for _, model, values in section_values(_details(n)):
+                sections.setdefault(model, []).append(model(qpr_record=record, **values))
+        for model, objs in sections.items():
+            model.objects.bulk_create(objs)
+        record_count += len(records)
+
+    requests = ManagerRequest.objects.bulk_create([
+        ManagerRequest(hod=user, user=user, request_type='qpr', reason='Correction needed')
+        for user in users[::5]
+    ])
+    ManagerRequestRecipient.objects.bulk_create([
+        ManagerRequestRecipient(request=request, recipient=admin) for request in requests
+    ])
+    rebuild_hod_rollup()
+    invalidate_all_fragments()
+
+    user = users[0]
+    return BenchmarkData(
+        admin=admin,
+        hod=hod_users[0],
+        user=user,
+        record_id=QPRRecord.objects.filter(user=user).values_list('id', flat=True).first(),
+        hods=hods,
+        users=len(users),
+        records=record_count,
+    )
+
+
+def _save_payload(data, iteration):
+    """An update of the benchmark user's record that changes one section per call"""
+    details = _details(0)
+    details['s1_total'] = str(iteration)
+    return {
+        'id': data.record_id, 'officeName': 'Office', 'officeCode': 'OC', 'region': 'Region A',
+        'quarter': QUARTER_LABELS[0], 'status': 'Draft', 'details': details,
+    }
+
+
+# name -> (account attribute of BenchmarkData, request function)
+ENDPOINTS = {
+    'api_records': ('user', lambda client, data, i: client.get('/api/records')),
+    'api_record_detail': ('user', lambda client, data, i: client.get(f'/api/records/{data.record_id}/')),
+    'admin_dashboard': ('admin', lambda client, data, i: client.get('/admin-dashboard/')),
+    'admin_employee_list': ('admin', lambda client, data, i: client.get('/admin-employee-list/')),
+    'hod_detail_list': ('hod', lambda client, data, i: client.get('/hod/detail-list/')),
+    'hod_manager_requests': ('hod', lambda client, data, i: client.get('/hod/manager-requests/')),
+    'save_record': ('user', lambda client, data, i: client.post(
+        '/api/records', _save_payload(data, i), content_type='application/json'
+    )),
+}
+
+
+def _clear_caches():
+    for cache in caches.all():
+        cache.clear()
+
+
+def measure_endpoint(name, data, repeat=5):
+    """
+    Measure one endpoint: a cold run with empty caches for the query count
+    and peak memory, then `repeat` timed warm runs.
+    """
+    account, call = ENDPOINTS[name]
+    client = Client()
+    client.force_login(getattr(data, account))
+
+    _clear_caches()
+    tracemalloc.start()
+    with CaptureQueriesContext(connection) as cold:
+        response = call(client, data, 0)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if response.status_code != 200:
+        raise RuntimeError(f'{name} returned HTTP {response.status_code}')
+
+    timings = []
+    for i in range(1, repeat + 1):
+        with CaptureQueriesContext(connection) as warm:
+            started = time.perf_counter()
+            call(client, data, i)
+            timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'queries': len(cold),
+        'queries_warm': len(warm) if repeat else len(cold),
+        'wall_ms_median': round(statistics.median(timings), 2) if timings else None,
+        'wall_ms_min': round(min(timings), 2) if timings else None,
+        'peak_memory_kib': round(peak / 1024, 1),
+        'response_bytes': len(response.content),
+    }
+
+
+def measure_concurrent_saves(data, workers=8, saves=10):
+    """
+    Save throughput with up to `workers` users saving their latest record at
+    the same time, `saves` times each, one thread and database connection per
+    user. Failed saves (e.g. "database is locked") are counted, not raised.
+    """
+    users = list(User.objects.filter(profile__role='user').order_by('id')[:workers])
+    latest_records = dict(
+        QPRRecord.objects.filter(user__in=users).values('user_id').annotate(
+            latest=Max('id')
+        ).values_list('user_id', 'latest')
+    )
+    clients = []
+    for user in users:
+        client = Client()
+        client.force_login(user)
+        clients.append((client, latest_records[user.id]))
+
+    start = threading.Barrier(len(clients) + 1)
+    latencies = []
+    errors = []
+
+    def save_repeatedly(client, record_id):
+        try:
+            start.wait()
+            for i in range(1, saves + 1):
+                payload = _save_payload(data, i)
+                payload['id'] = record_id
+                started = time.perf_counter()
+                response = client.post('/api/records', payload, content_type='application/json')
+                latencies.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+        finally:
+            connections.close_all()  # This thread's connections
+
+    threads = [threading.Thread(target=save_repeatedly, args=client) for client in clients]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'workers': len(clients),
+        'saves': len(latencies),
+        'errors': len(errors),
+        'seconds': round(seconds, 2),
+        'saves_per_second': round((len(latencies) - len(errors)) / seconds, 1) if seconds else None,
+        'latency_ms_median': round(statistics.median(latencies), 2) if latencies else None,
+        'latency_ms_p95': round(latencies[max(round(0.95 * len(latencies)) - 1, 0)], 2) if latencies else None,
+    }
+
+
+def run_benchmarks(scales, hods=2, users_per_hod=5, quarters=2, records_per_quarter=1,
+                   repeat=5, endpoints=None, concurrency=0, concurrent_saves=10,
+                   reset=None, progress=None):
+    """
+    Generate data and measure the endpoints at every scale. A scale multiplies
+    the number of HODs, users per HOD and records per quarter. With
+    concurrency, also measure that many users saving at once. reset() is
+    called before each scale to empty the database.
+    """
+    results = []
+    for scale in scales:
+        if reset is not None:
+            reset()
+        started = time.perf_counter()
+        data = generate_data(
+            hods=hods * scale,
+            users_per_hod=users_per_hod * scale,
+            quarters=quarters,
+            records_per_quarter=records_per_quarter * scale,
+        )
+        result = {
+            'scale': scale,
+            'data': {'hods': data.hods, 'users': data.users, 'records': data.records},
+            'generate_seconds': round(time.perf_counter() - started, 2),
+            'endpoints': {},
+        }
+        # The test client's host is not in ALLOWED_HOSTS outside the test runner
+        with override_settings(ALLOWED_HOSTS=['testserver'], CACHES=BENCHMARK_CACHES):
+            for name in endpoints or ENDPOINTS:
+                result['endpoints'][name] = measure_endpoint(name, data, repeat)
+            if concurrency:
+                result['concurrent_saves'] = measure_concurrent_saves(data, concurrency, concurrent_saves)
+        results.append(result)
+        if progress is not None:
+            progress(result)
+    return results
+
+
+def query_growth_failures(results, allowance=0):
+    """Endpoints whose cold query count grows by more than allowance with the data size"""
+    failures = []
+    if len(results) < 2:
+        return failures
+    smallest = results[0]
+    for result in results[1:]:
+        for name, metrics in result['endpoints'].items():
+            base = smallest['endpoints'].get(name)
+            if base and metrics['queries'] > base['queries'] + allowance:
+                failures.append(
+                    f'{name}: {base["queries"]} queries at scale {smallest["scale"]}, '
+                    f'{metrics["queries"]} at scale {result["scale"]}'
+                )
+    return failures
+
+
+def regression_failures(results, baseline):
+    """Endpoints that need more queries than in a previous run at the same scale"""
+    failures = []
+    previous = {result['scale']: result['endpoints'] for result in baseline.get('results', [])}
+    for result in results:
+        for name, metrics in result['endpoints'].items():
+            before = previous.get(result['scale'], {}).get(name)
+            if before and metrics['queries'] > before['queries']:
+                failures.append(
+                    f'{name} at scale {result["scale"]}: {metrics["queries"]} queries, '
+                    f'was {before["queries"]}'
+                )
+    return failures
@@ -0,0 +1,92 @@
+"""
+Organisation-wide QPR exports for the admin.
+
+Records are read with QPRRecord.objects.with_sections() and iterated in
+chunks, so memory use stays flat however many records are exported.
+"""
+import csv
+import tempfile
+
+from .models import QPRRecord
+from .sections import FORM_KEYS, export_values
+
+EXPORT_CHUNK_SIZE = 2000
+
+HEADER_COLUMNS = [
+    'id', 'employee_code', 'hod_name', 'officeName', 'officeCode', 'region',
+    'quarter', 'year', 'status', 'phone', 'email', 'created_at', 'updated_at',
+]
+EXPORT_COLUMNS = HEADER_COLUMNS + list(FORM_KEYS)
+
+
+def export_queryset(quarter='', year='', hod_name=''):
+    """Records to export with all sections joined, filtered by quarter/year/HOD"""
+    records = QPRRecord.objects.with_sections().select_related('user__profile')
+    if quarter:
+        records = records.filter(quarter=quarter)
+    if year:
+        records = records.filter(year=year)
+    if hod_name:
+        records = records.filter(user__profile__hod_name__iexact=hod_name)
+    return records.order_by('id')
+
+
+def export_rows(records, progress=None):
+    """
+    Yield one flat row per record, in EXPORT_COLUMNS order.
+    progress, if given, is called with the number of rows so far after every chunk.
+    """
+    for count, record in enumerate(records.iterator(chunk_size=EXPORT_CHUNK_SIZE), start=1):
+        if progress is not None and count % EXPORT_CHUNK_SIZE == 0:
+            progress(count)
+        profile = getattr(record.user, 'profile', None) if record.user_id else None
+        yield [
+            record.id,
+            profile.employee_code if profile else '',
+            (profile.hod_name or '') if profile else '',
+            record.officeName,
+            record.officeCode,
+            record.region,
+            record.quarter,
+            record.year or '',
+            record.status,
+            record.phone or '',
+            record.email or '',
+            record.created_at.isoformat(),
+            record.updated_at.isoformat(),
+        ] + export_values(record)
+
+
+class _Echo:
+    """File-like object whose write() hands the value back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(records, progress=None):
+    """Yield the CSV export line by line (with a BOM so Excel reads Hindi text as UTF-8)"""
+    writer = csv.writer(_Echo())
+    yield '\ufeff' + writer.writerow(EXPORT_COLUMNS)
+    for row in export_rows(records, progress):
+        yield writer.writerow(row)
+
+
+def write_xlsx(records, output=None, progress=None):
+    """
+    Write the XLSX export to output (a binary file, by default a temporary
+    one) and return it, rewound. XlsxWriter's constant_memory mode flushes
+    every row to disk as it goes.
+    """
+    import xlsxwriter
+
+    if output is None:
+        output = tempfile.TemporaryFile()
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    worksheet = workbook.add_worksheet('QPR')
+    worksheet.write_row(0, 0, EXPORT_COLUMNS)
+    for row_number, row in enumerate(export_rows(records, progress), start=1):
+        worksheet.write_row(row_number, 0, row)
+    workbook.close()
+    output.seek(0)
+    return output
@@ -0,0 +1,53 @@
+"""
+Version stamps for the cached template fragments of the HOD and admin pages.
+
+The pages wrap their tables in {% cache %} blocks whose keys include a
+version stamp read from HODGroupVersion, and pass the table data as lazy
+objects, so a cache hit skips the queries as well as the rendering. The
+HOD pages use the stamp of their own group; the admin pages span every
+group and use the sum of all versions, which grows with every bump.
+
+The signals call bump_group_versions() for the groups a change touches, in
+the same transaction as the change. Code that writes in bulk (imports,
+queryset update()) calls invalidate_all_fragments() instead.
+"""
+from django.db.models import F, Sum
+
+from .models import HODGroupVersion
+
+FRAGMENT_CACHE_ALIAS = 'template_fragments'  # The alias {% cache %} uses when it exists
+
+ALL_GROUPS = HODGroupVersion.ALL_GROUPS
+
+
+def _group_key(hod_name):
+    return (hod_name or '').lower()
+
+
+def bump_group_versions(hod_names):
+    """Retire the cached fragments of the given hod_name groups (any case, None for no HOD)"""
+    keys = {_group_key(name) for name in hod_names}
+    if not keys:
+        return
+    HODGroupVersion.objects.bulk_create(
+        [HODGroupVersion(hod_name=key) for key in keys], ignore_conflicts=True
+    )
+    HODGroupVersion.objects.filter(hod_name__in=keys).update(version=F('version') + 1)
+
+
+def invalidate_all_fragments():
+    """Retire every cached fragment, after changes that bypassed the signals"""
+    bump_group_versions([ALL_GROUPS])
+
+
+def group_fragment_version(hod_name):
+    """Version stamp of the fragments of one hod_name group"""
+    versions = dict(HODGroupVersion.objects.filter(
+        hod_name__in=[_group_key(hod_name), ALL_GROUPS]
+    ).values_list('hod_name', 'version'))
+    return f'{versions.get(ALL_GROUPS, 0)}.{versions.get(_group_key(hod_name), 0)}'
+
+
+def all_groups_fragment_version():
+    """Version stamp of fragments that show every group"""
+    return HODGroupVersion.objects.aggregate(total=Sum('version'))['total'] or 0
@@ -0,0 +1,74 @@
+"""
+Cached directory of HOD names for the registration and profile dropdowns
+and the admin pages.
+
+The directory is read from UserProfile once and kept in the default cache,
+under a key that includes the version of the HODGroupVersion.HOD_DIRECTORY
+row. The signals invalidate it by bumping that version whenever a profile's
+role or hod_name changes, or the first_name of a user who is their own HOD
+may have changed. Code that bypasses the signals (queryset update(), bulk
+imports) calls invalidate_hod_directory() itself. The bump is part of the
+current transaction, so every process, whatever its cache backend, moves to
+the new key once the change commits; old entries are left to expire.
+"""
+from django.core.cache import cache
+
+from .fragment_cache import bump_group_versions
+from .models import HODGroupVersion, UserProfile
+
+HOD_DIRECTORY_CACHE_KEY = 'qpr-hod-directory'
+HOD_DIRECTORY_TIMEOUT = 300
+
+
+def _load_hod_directory():
+    return {
+        # hod_name of every role='hod' profile
+        'hod_names': list(
+            UserProfile.objects.filter(role='hod').values_list('hod_name', flat=True).distinct()
+        ),
+        # hod_name values users are assigned to, whether or not such a HOD exists
+        'user_hod_names': set(
+            UserProfile.objects.filter(role='user')
+            .exclude(hod_name__isnull=True).exclude(hod_name='')
+            .values_list('hod_name', flat=True).distinct()
+        ),
+        # Users with hod_name=None are their own HODs, listed by first_name
+        'own_hod_names': list(
+            UserProfile.objects.filter(role='user', hod_name__isnull=True)
+            .values_list('user__first_name', flat=True).distinct()
+        ),
+    }
+
+
+def hod_directory_version():
+    """Version stamp of the directory, shared by every process through the database"""
+    return HODGroupVersion.objects.filter(
+        hod_name=HODGroupVersion.HOD_DIRECTORY
+    ).values_list('version', flat=True).first() or 0
+
+
+def hod_directory():
+    """The HOD name lists above, from the cache when possible"""
+    key = f'{HOD_DIRECTORY_CACHE_KEY}:{hod_directory_version()}'
+    directory = cache.get(key)
+    if directory is None:
+        directory = _load_hod_directory()
+        cache.set(key, directory, HOD_DIRECTORY_TIMEOUT)
+    return directory
+
+
+def invalidate_hod_directory():
+    """Move the directory to a new version, seen by every process once the current transaction commits"""
+    bump_group_versions([HODGroupVersion.HOD_DIRECTORY])
+
+
+def get_active_hods():
+    """Get list of all active HODs for registration dropdown"""
+    directory = hod_directory()
+    return sorted(set(directory['hod_names'] + directory['own_hod_names']))
+
+
+def uncovered_hod_names():
+    """hod_name values users are assigned to that no role='hod' profile carries"""
+    directory = hod_directory()
+    return directory['user_hod_names'] - set(directory['hod_names'])
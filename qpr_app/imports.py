@@ -0,0 +1,485 @@
+"""
+Bulk imports from CSV / JSONL / XLSX files.
+
+Files are read as a stream of (line number, row dict) pairs and written in
+batches, each batch in its own transaction, with bulk_create. Both imports
+can be run twice with the same file without creating anything twice:
+
+- Employees are validated in one streaming pass over the whole file before
+  anything is written, and matched on employee_code.
+- QPR records are validated chunk by chunk; invalid rows are reported and
+  skipped, and a record that already exists for the same employee, office,
+  quarter and year is never imported again.
+"""
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .fragment_cache import invalidate_all_fragments
+from .hod_directory import invalidate_hod_directory
+from .models import QPRRecord, UserProfile
+from .rollups import rebuild_hod_rollup
+from .sections import section_values, validate_details
+
+IMPORT_FORMATS = ('csv', 'jsonl', 'xlsx')
+IMPORT_BATCH_SIZE = 1000
+
+# Password given to imported accounts that have none in the file (as admin_create_hod does)
+DEFAULT_PASSWORD = '123456'
+
+ROLES = {role for role, _ in UserProfile.ROLE_CHOICES}
+
+# Profile columns an employee file may carry; absent columns are left alone on update
+PROFILE_COLUMNS = ('role', 'hod_name', 'name', 'email', 'office_name', 'office_code')
+USER_COLUMNS = ('first_name', 'last_name', 'email')
+EMPLOYEE_COLUMNS = ('employee_code', 'password') + PROFILE_COLUMNS + ('first_name', 'last_name')
+
+
+class ImportFileError(Exception):
+    """The file cannot be read at all (unknown format, bad header, bad JSON line)"""
+
+
+def _cell_text(value):
+    """Spreadsheet cell as the string a CSV cell would hold"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    elif isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value).strip()
+
+
+def _iter_xlsx_rows(path):
+    """Rows of the first worksheet, the first row being the header"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [_cell_text(value) for value in next(rows, ())]
+        if not any(header):
+            raise ImportFileError('The worksheet has no header row')
+        for line_num, values in enumerate(rows, start=2):
+            if all(value is None for value in values):
+                continue
+            yield line_num, {
+                key: _cell_text(value) for key, value in zip(header, values) if key
+            }
+    finally:
+        workbook.close()
+
+
+def detect_format(path, file_format=None):
+    """Explicit format, or the one implied by the file extension"""
+    file_format = (file_format or os.path.splitext(str(path))[1].lstrip('.')).lower()
+    if file_format not in IMPORT_FORMATS:
+        raise ImportFileError(f'Unsupported file format {file_format!r}; use one of {", ".join(IMPORT_FORMATS)}')
+    return file_format
+
+
+def iter_rows(path, file_format):
+    """Yield (line number, {column: stripped string}) for every data row of the file"""
+    if file_format == 'xlsx':
+        yield from _iter_xlsx_rows(path)
+        return
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        if file_format == 'csv':
+            reader = csv.DictReader(handle)
+            if not reader.fieldnames:
+                raise ImportFileError('The CSV file has no header row')
+            for row in reader:
+                yield reader.line_num, {
+                    key.strip(): (value or '').strip() for key, value in row.items() if key
+                }
+        else:
+            for line_num, line in enumerate(handle, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    raise ImportFileError(f'Line {line_num}: invalid JSON ({e})')
+                if not isinstance(row, dict):
+                    raise ImportFileError(f'Line {line_num}: expected a JSON object')
+                yield line_num, {
+                    str(key).strip(): '' if value is None else str(value).strip()
+                    for key, value in row.items()
+                }
+
+
+def iter_batches(iterable, size):
+    """Split an iterable into lists of at most size items"""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+# ==================== EMPLOYEES ====================
+
+def _max_length(model, field):
+    return model._meta.get_field(field).max_length
+
+
+_LENGTH_LIMITS = {
+    'employee_code': min(_max_length(UserProfile, 'employee_code'), _max_length(User, 'username')),
+    'hod_name': _max_length(UserProfile, 'hod_name'),
+    'name': _max_length(UserProfile, 'name'),
+    'email': _max_length(UserProfile, 'email'),
+    'office_name': _max_length(UserProfile, 'office_name'),
+    'office_code': _max_length(UserProfile, 'office_code'),
+    'first_name': _max_length(User, 'first_name'),
+    'last_name': _max_length(User, 'last_name'),
+}
+
+
+def validate_employee_row(row):
+    """Return a list of error messages for one employee row (empty when valid)"""
+    errors = []
+    code = row.get('employee_code', '')
+    if not code:
+        errors.append('employee_code is required')
+    else:
+        try:
+            User.username_validator(code)
+        except ValidationError:
+            errors.append('employee_code may only contain letters, digits and @ . + - _')
+    role = row.get('role', '')
+    if role and role not in ROLES:
+        errors.append(f'role must be one of {", ".join(sorted(ROLES))}')
+    if row.get('email'):
+        try:
+            validate_email(row['email'])
+        except ValidationError:
+            errors.append('email is not a valid address')
+    for column, limit in _LENGTH_LIMITS.items():
+        if len(row.get(column, '')) > limit:
+            errors.append(f'{column} is longer than {limit} characters')
+    return errors
+
+
+def validate_employee_file(path, file_format):
+    """
+    Streaming validation pass. Returns (row count, columns seen, errors) where
+    errors is a list of (line number, employee_code, message).
+    """
+    count = 0
+    columns = set()
+    errors = []
+    seen_codes = {}
+    for line_num, row in iter_rows(path, file_format):
+        count += 1
+        columns.update(key for key in row if key in EMPLOYEE_COLUMNS)
+        code = row.get('employee_code', '')
+        for message in validate_employee_row(row):
+            errors.append((line_num, code, message))
+        if code:
+            if code in seen_codes:
+                errors.append((line_num, code, f'duplicate employee_code (first seen on line {seen_codes[code]})'))
+            else:
+                seen_codes[code] = line_num
+    if count and 'employee_code' not in columns:
+        errors.append((0, '', 'the file has no employee_code column'))
+    return count, columns, errors
+
+
+def _profile_values(row, columns):
+    """Profile field values of a row; blank cells become None like the other views store them"""
+    values = {column: row.get(column) or None for column in PROFILE_COLUMNS if column in columns}
+    if values.get('role') is None:
+        values.pop('role', None)
+    return values
+
+
+def _new_profile(user_id, code, row, columns):
+    values = _profile_values(row, columns)
+    role = values.get('role') or 'user'
+    values['role'] = role
+    if role == 'hod':
+        # A HOD's group is named after them unless the file says otherwise
+        values['hod_name'] = values.get('hod_name') or values.get('name') or row.get('first_name') or None
+    if not values.get('name'):
+        values['name'] = ' '.join(filter(None, [row.get('first_name'), row.get('last_name')])) or None
+    return UserProfile(
+        user_id=user_id,
+        employee_code=code,
+        profile_updated=role != 'user',
+        **values,
+    )
+
+
+def _hash_passwords(passwords, pool):
+    if pool is None:
+        return [make_password(password) for password in passwords]
+    return list(pool.map(make_password, passwords, chunksize=64))
+
+
+def _import_employee_batch(batch, columns, default_password, pool, stats):
+    """Create or update one batch of employees"""
+    codes = [row['employee_code'] for _, row in batch]
+    profiles = UserProfile.objects.select_related('user').filter(
+        Q(employee_code__in=codes) | Q(user__username__in=codes)
+    )
+    profiles_by_code = {profile.employee_code: profile for profile in profiles}
+    profiles_by_username = {profile.user.username: profile for profile in profiles}
+    users_by_username = {
+        user.username: user for user in User.objects.filter(username__in=codes)
+    }
+
+    new_users = []
+    updated_profiles = []
+    updated_users = []
+    profile_fields = [column for column in PROFILE_COLUMNS if column in columns]
+    user_fields = [column for column in USER_COLUMNS if column in columns]
+    for line_num, row in batch:
+        code = row['employee_code']
+        profile = profiles_by_code.get(code)
+        if profile is None and code in profiles_by_username:
+            stats['skipped'].append(
+                (line_num, code, f'username taken by employee {profiles_by_username[code].employee_code}')
+            )
+            continue
+        if profile is None:
+            new_users.append((code, row))
+            continue
+
+        values = _profile_values(row, columns)
+        changed = [field for field, value in values.items() if getattr(profile, field) != value]
+        for field in changed:
+            setattr(profile, field, values[field])
+        if changed:
+            updated_profiles.append(profile)
+
+        user_changed = [field for field in user_fields if getattr(profile.user, field) != row.get(field, '')]
+        for field in user_changed:
+            setattr(profile.user, field, row.get(field, ''))
+        if user_changed:
+            updated_users.append(profile.user)
+
+        stats['updated' if changed or user_changed else 'unchanged'] += 1
+
+    if updated_profiles:
+        # bulk_update() does not apply auto_now
+        now = timezone.now()
+        for profile in updated_profiles:
+            profile.updated_at = now
+        UserProfile.objects.bulk_update(updated_profiles, profile_fields + ['updated_at'])
+    if updated_users:
+        User.objects.bulk_update(updated_users, user_fields)
+
+    # Users that exist without a profile (e.g. created through the Django admin) only get one
+    missing_users = [(code, row) for code, row in new_users if code not in users_by_username]
+    hashes = _hash_passwords(
+        [row.get('password') or default_password for _, row in missing_users], pool
+    )
+    # bulk_create() sends no post_save, so sync_user_profile does not run per row
+    User.objects.bulk_create([
+        User(
+            username=code,
+            password=password_hash,
+            **{field: row.get(field, '') for field in USER_COLUMNS if field in columns},
+        )
+        for (code, row), password_hash in zip(missing_users, hashes)
+    ])
+    user_ids = dict(
+        User.objects.filter(username__in=[code for code, _ in new_users]).values_list('username', 'id')
+    )
+    new_profiles = [_new_profile(user_ids[code], code, row, columns) for code, row in new_users]
+    UserProfile.objects.bulk_create(new_profiles)
+    stats['created'] += len(new_profiles)
+
+
+def import_employees(path, file_format=None, batch_size=IMPORT_BATCH_SIZE, workers=None,
+                     default_password=DEFAULT_PASSWORD, progress=None):
+    """
+    Import employees and HODs from a CSV / JSONL / XLSX file.
+
+    Existing employees (matched on employee_code) keep their account and
+    password; only the columns present in the file are updated. New
+    employees are created with bulk_create, their passwords hashed in a pool
+    of worker processes. Returns a stats dictionary; when validation fails
+    nothing is written and stats['errors'] lists the problems. Rows that clash
+    with an existing account under another employee code are listed in
+    stats['skipped'].
+
+    progress, if given, is called after every batch with the stats so far.
+    """
+    file_format = detect_format(path, file_format)
+    total, columns, errors = validate_employee_file(path, file_format)
+    stats = {
+        'total': total, 'processed': 0, 'created': 0, 'updated': 0, 'unchanged': 0,
+        'errors': errors, 'skipped': [], 'elapsed': 0.0,
+    }
+    if errors or not total:
+        return stats
+
+    started = time.monotonic()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers != 1 else None
+    try:
+        for batch in iter_batches(iter_rows(path, file_format), batch_size):
+            with transaction.atomic():
+                _import_employee_batch(batch, columns, default_password, pool, stats)
+            stats['processed'] += len(batch)
+            stats['elapsed'] = time.monotonic() - started
+            if progress is not None:
+                progress(stats)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # The per-row signals did not run: rebuild the rollups, HOD directory and page fragments once
+    if stats['created'] or stats['updated']:
+        rebuild_hod_rollup()
+        invalidate_hod_directory()
+        invalidate_all_fragments()
+    stats['elapsed'] = time.monotonic() - started
+    return stats
+
+
+# ==================== QPR RECORDS ====================
+
+QPR_IMPORT_CHUNK_SIZE = 500
+QPR_STATUSES = ('Draft', 'Submitted')
+
+# Record header columns; the section columns are the form keys s1_total ... s12_3.
+# Export files can be imported as they are: their id, hod_name and timestamp
+# columns are ignored.
+QPR_HEADER_COLUMNS = ('officeName', 'officeCode', 'region', 'quarter', 'year', 'status', 'phone', 'email')
+
+_QPR_LENGTH_LIMITS = {
+    column: _max_length(QPRRecord, column)
+    for column in QPR_HEADER_COLUMNS if _max_length(QPRRecord, column)
+}
+_DEFAULT_YEAR = QPRRecord._meta.get_field('year').default
+
+
+def validate_qpr_row(row):
+    """Return [(column, message)] for one QPR row, without database lookups"""
+    errors = []
+    for column in ('employee_code', 'quarter'):
+        if not row.get(column):
+            errors.append((column, f'{column} is required'))
+    if row.get('status') and row['status'] not in QPR_STATUSES:
+        errors.append(('status', f'status must be one of {", ".join(QPR_STATUSES)}'))
+    if row.get('email'):
+        try:
+            validate_email(row['email'])
+        except ValidationError:
+            errors.append(('email', 'email is not a valid address'))
+    for column, limit in _QPR_LENGTH_LIMITS.items():
+        if len(row.get(column, '')) > limit:
+            errors.append((column, f'{column} is longer than {limit} characters'))
+    errors.extend(validate_details(row).items())
+    return errors
+
+
+def _qpr_header(row):
+    """QPRRecord field values of a row, with the same defaults as POST /api/records"""
+    header = {column: row.get(column, '') for column in QPR_HEADER_COLUMNS}
+    header['year'] = header['year'] or _DEFAULT_YEAR
+    header['status'] = header['status'] or 'Draft'
+    header['phone'] = header['phone'] or None
+    header['email'] = header['email'] or None
+    header['is_submitted'] = header['status'] == 'Submitted'
+    return header
+
+
+def _create_qpr_chunk(rows):
+    """Insert the headers and all eleven sections of [(user id, header, row)]"""
+    records = [QPRRecord(user_id=user_id, **header) for user_id, header, _ in rows]
+    if connection.features.can_return_rows_from_bulk_insert:
+        # bulk_create() sends no post_save: rollups are rebuilt once at the end
+        QPRRecord.objects.bulk_create(records)
+    else:
+        for record in records:
+            record.save()
+
+    sections = {}
+    for record, (_, _, row) in zip(records, rows):
+        for _, model, values in section_values(row):
+            sections.setdefault(model, []).append(model(qpr_record=record, **values))
+    for model, objs in sections.items():
+        model.objects.bulk_create(objs)
+
+
+def import_qpr_records(path, file_format=None, chunk_size=QPR_IMPORT_CHUNK_SIZE, dry_run=False, progress=None):
+    """
+    Import QPR records from a CSV / JSONL / XLSX file keyed by the form field
+    names, owned by the employee in the employee_code column.
+
+    Each chunk is validated (including owner lookups and duplicates) and its
+    valid rows are written in one transaction. Returns a stats dictionary;
+    stats['errors'] is the per-row report of skipped rows as
+    (line number, employee_code, column, message). With dry_run nothing is
+    written.
+
+    progress, if given, is called after every chunk with the stats so far.
+    """
+    file_format = detect_format(path, file_format)
+    stats = {'processed': 0, 'created': 0, 'errors': [], 'elapsed': 0.0}
+    started = time.monotonic()
+    seen = {}
+
+    for chunk in iter_batches(iter_rows(path, file_format), chunk_size):
+        owners = dict(UserProfile.objects.filter(
+            employee_code__in={row.get('employee_code') for _, row in chunk}
+        ).values_list('employee_code', 'user_id'))
+        existing = set(QPRRecord.objects.filter(user_id__in=owners.values()).values_list(
+            'user_id', 'officeCode', 'quarter', 'year'
+        ))
+
+        valid = []
+        for line_num, row in chunk:
+            code = row.get('employee_code', '')
+            errors = validate_qpr_row(row)
+            user_id = owners.get(code)
+            if code and user_id is None:
+                errors.append(('employee_code', 'no employee with this code'))
+            header = _qpr_header(row)
+            key = (user_id, header['officeCode'], header['quarter'], header['year'])
+            if not errors:
+                if key in seen:
+                    errors.append(('', f'duplicate of line {seen[key]}'))
+                elif key in existing:
+                    errors.append(('', 'a record for this employee, office, quarter and year already exists'))
+            if errors:
+                stats['errors'].extend((line_num, code, column, message) for column, message in errors)
+                continue
+            seen[key] = line_num
+            valid.append((user_id, header, row))
+
+        if valid and not dry_run:
+            with transaction.atomic():
+                _create_qpr_chunk(valid)
+        stats['created'] += len(valid)
+        stats['processed'] += len(chunk)
+        stats['elapsed'] = time.monotonic() - started
+        if progress is not None:
+            progress(stats)
+
+    if stats['created'] and not dry_run:
+        rebuild_hod_rollup()
+        invalidate_all_fragments()
+    stats['elapsed'] = time.monotonic() - started
+    return stats
+
+
+def write_error_report(errors, handle):
+    """Write the per-row error report of an import as CSV"""
+    writer = csv.writer(handle)
+    writer.writerow(['line', 'employee_code', 'column', 'message'])
+    writer.writerows(errors)
@@ -0,0 +1,131 @@
+"""
+Query instrumentation shared by the performance middleware and the tests.
+
+QueryRecorder hooks every database connection with execute_wrapper(), so it
+works with DEBUG off, and collects the number of queries, the time spent in
+the database and how often each query *shape* ran. The shape (fingerprint)
+is the SQL with literals, parameter lists and whitespace normalised, so the
+same ORM query issued in a loop maps to one fingerprint.
+
+NPlusOneDetector additionally remembers where in qpr_app each shape was
+issued from, so a query repeated once per row can be traced to the line of
+views.py (or any other module of the app) that runs it in a loop.
+"""
+import os
+import re
+import time
+import traceback
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+
+from django.db import connections
+
+_IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint_sql(sql):
+    """SQL with parameters and literals replaced, e.g. to spot queries run in a loop"""
+    sql = _IN_LIST.sub('(...)', sql)  # IN (%s, %s, ...) of any length
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """
+    Context manager recording the queries run on every database connection.
+
+        with QueryRecorder() as recorder:
+            ...
+        recorder.count, recorder.duration, recorder.duplicates()
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint_sql(sql)] += 1
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+        self._stack = None
+
+    def duplicates(self, threshold=2):
+        """[(fingerprint, count)] of the query shapes that ran at least threshold times"""
+        return [
+            (fingerprint, count)
+            for fingerprint, count in self.fingerprints.most_common()
+            if count >= threshold
+        ]
+
+
+# A query shape issued this often from one call site in one request is an N+1
+N_PLUS_ONE_THRESHOLD = 3
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+_PROJECT_DIR = os.path.dirname(_APP_DIR)
+
+
+def _call_site():
+    """'qpr_app/views.py:123 in view_name' for the innermost frame in qpr_app, else None"""
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if filename == os.path.abspath(__file__) or not filename.startswith(_APP_DIR + os.sep):
+            continue
+        return f'{os.path.relpath(filename, _PROJECT_DIR)}:{frame.lineno} in {frame.name}'
+    return None
+
+
+class NPlusOneDetector(QueryRecorder):
+    """
+    QueryRecorder that also records the call site of every query shape.
+
+        with NPlusOneDetector() as detector:
+            client.get('/hod/detail-list/')
+        detector.problems()  # [(fingerprint, count, {call site: count})]
+        print(detector.report())
+    """
+
+    def __init__(self, threshold=N_PLUS_ONE_THRESHOLD):
+        super().__init__()
+        self.threshold = threshold
+        self.call_sites = defaultdict(Counter)
+
+    def __call__(self, execute, sql, params, many, context):
+        self.call_sites[fingerprint_sql(sql)][_call_site()] += 1
+        return super().__call__(execute, sql, params, many, context)
+
+    def problems(self):
+        """Query shapes repeated at least threshold times, with where they were issued from"""
+        return [
+            (fingerprint, count, dict(self.call_sites[fingerprint].most_common()))
+            for fingerprint, count in self.duplicates(self.threshold)
+        ]
+
+    def report(self):
+        """The problems as readable text, empty when there are none"""
+        lines = []
+        for fingerprint, count, sites in self.problems():
+            lines.append(f'{count}x {fingerprint}')
+            for site, site_count in sites.items():
+                lines.append(f'    {site_count}x from {site or "outside qpr_app"}')
+        return '\n'.join(lines)
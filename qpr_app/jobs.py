@@ -0,0 +1,349 @@
+"""
+Background jobs for long admin operations, with the database as the queue.
+
+A view queues a Job with enqueue() and answers at once; `manage.py
+run_worker` claims queued jobs and runs their handler in a process pool, so
+large exports, imports and HOD renames neither tie up a web worker nor run
+into the gunicorn timeout. The admin pages poll the job status endpoint for
+progress and fetch the result (a file, or a JSON summary) when it is done.
+
+claim_job() takes the oldest queued job with select_for_update(skip_locked=
+True), so several workers on PostgreSQL never claim the same job and never
+wait for each other. SQLite has no row locks: there the IMMEDIATE
+transactions (see settings) serialise the claims instead.
+
+Handlers are registered with @job_handler(kind) and called in the worker
+process as handler(context, **job.params); they report progress through the
+JobContext and return a JSON-serialisable result. A job that raises is
+marked failed with the exception message, which the admin sees.
+
+The worker processes have their own local-memory caches, so jobs never
+invalidate a cache entry directly. The cached HOD directory, page fragments
+and serialized records are keyed on version stamps kept in the database
+(HODGroupVersion, QPRRecord.version), and the rollups are database rows.
+Whatever a job changes is therefore seen by every web process as soon as
+the job's transaction commits.
+"""
+import logging
+import os
+import socket
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from multiprocessing import get_context
+
+import django
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .exports import export_queryset, iter_csv, write_xlsx
+from .fragment_cache import bump_group_versions
+from .hod_directory import invalidate_hod_directory
+from .imports import ImportFileError, import_qpr_records, write_error_report
+from .models import Job, UserProfile
+from .pdf_reports import build_quarter_archive
+from .rollups import refresh_hod_rollup
+
+logger = logging.getLogger(__name__)
+
+JOB_HANDLERS = {}
+
+# Seconds between two progress writes of a running job
+PROGRESS_INTERVAL = 0.5
+# Seconds an idle worker waits before looking for queued jobs again
+POLL_INTERVAL = 1.0
+# A running job without a progress write for this long is assumed to have
+# lost its worker and is queued again when a worker starts
+STALE_AFTER = timedelta(minutes=30)
+
+# Import problems kept in the job result for the import page; the error
+# report file has all of them
+IMPORT_REPORT_DISPLAY_LIMIT = 200
+
+
+class JobError(Exception):
+    """An expected failure of a job; the message is shown to the admin"""
+
+
+def job_handler(kind):
+    """Register the decorated function as the handler of jobs of this kind"""
+    def register(handler):
+        JOB_HANDLERS[kind] = handler
+        return handler
+    return register
+
+
+def job_file_path(name):
+    """Path of a file in QPR_JOB_FILES_DIR"""
+    os.makedirs(settings.QPR_JOB_FILES_DIR, exist_ok=True)
+    return os.path.join(settings.QPR_JOB_FILES_DIR, name)
+
+
+def save_upload(upload):
+    """Store an uploaded file for a job to read; returns its name in QPR_JOB_FILES_DIR"""
+    name = f'upload-{uuid.uuid4().hex}{os.path.splitext(upload.name)[1].lower()}'
+    with open(job_file_path(name), 'wb') as handle:
+        for chunk in upload.chunks():
+            handle.write(chunk)
+    return name
+
+
+def enqueue(kind, params=None, user=None):
+    """Queue a job for the workers and return it"""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f'Unknown job kind {kind!r}')
+    return Job.objects.create(kind=kind, params=params or {}, created_by=user)
+
+
+def job_status(job):
+    """The job as the status endpoint returns it"""
+    percent = None
+    if job.status == 'succeeded':
+        percent = 100
+    elif job.progress_total:
+        percent = min(round(100 * job.progress_done / job.progress_total), 100)
+    return {
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'done': job.progress_done,
+        'total': job.progress_total,
+        'percent': percent,
+        'message': job.message,
+        'result': job.result,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'download_url': (
+            reverse('admin_job_download', args=[job.pk])
+            if job.status == 'succeeded' and job.result_file else None
+        ),
+    }
+
+
+class JobContext:
+    """Handed to a job handler: the job, progress reporting and a place for its output file"""
+
+    def __init__(self, job):
+        self.job = job
+        self.result_file = ''
+        self._reported_at = 0.0
+
+    def progress(self, done, total=None, message=None, force=False):
+        """Record progress, at most every PROGRESS_INTERVAL seconds unless force"""
+        now = time.monotonic()
+        if not force and now - self._reported_at < PROGRESS_INTERVAL:
+            return
+        self._reported_at = now
+        fields = {'progress_done': done, 'updated_at': timezone.now()}
+        if total is not None:
+            fields['progress_total'] = total
+        if message is not None:
+            fields['message'] = message[:255]
+        Job.objects.filter(pk=self.job.pk).update(**fields)
+
+    def output_path(self, file_name):
+        """Path to write the job's result file to; it is downloaded as file_name"""
+        self.result_file = f'job-{self.job.pk}-{file_name}'
+        return job_file_path(self.result_file)
+
+
+def claim_job(worker_name):
+    """Mark the oldest queued job as running by this worker and return its id, or None"""
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status='queued').order_by('id').only('id').first()
+        )
+        if job is None:
+            return None
+        now = timezone.now()
+        Job.objects.filter(pk=job.pk).update(status='running', worker=worker_name, started_at=now, updated_at=now)
+    return job.pk
+
+
+def run_job(job_id):
+    """Run one claimed job to completion and record the outcome (in a worker process)"""
+    job = Job.objects.get(pk=job_id)
+    context = JobContext(job)
+    try:
+        handler = JOB_HANDLERS.get(job.kind)
+        if handler is None:
+            raise JobError(f'Unknown job kind {job.kind!r}')
+        result = handler(context, **job.params)
+    except Exception as e:
+        if not isinstance(e, (JobError, ImportFileError)):
+            logger.exception('Job %s failed', job)
+        _finish(job_id, 'failed', error=str(e) or e.__class__.__name__)
+        return False
+    _finish(job_id, 'succeeded', result=result, result_file=context.result_file)
+    return True
+
+
+def _run_job_in_process(job_id):
+    try:
+        return run_job(job_id)
+    finally:
+        connections.close_all()
+
+
+def _finish(job_id, status, **fields):
+    now = timezone.now()
+    if status == 'succeeded':
+        fields['progress_done'] = Coalesce(F('progress_total'), F('progress_done'))
+    Job.objects.filter(pk=job_id).update(status=status, finished_at=now, updated_at=now, **fields)
+
+
+def requeue_stale_jobs(stale_after=STALE_AFTER):
+    """Queue again the running jobs whose worker stopped reporting; returns how many"""
+    return Job.objects.filter(status='running', updated_at__lt=timezone.now() - stale_after).update(
+        status='queued', worker='', started_at=None, updated_at=timezone.now()
+    )
+
+
+def run_worker(processes=None, poll_interval=POLL_INTERVAL, burst=False):
+    """
+    Claim and run queued jobs in a pool of `processes` worker processes (one
+    per core by default) until interrupted; with burst, return once the
+    queue is empty. The processes are spawned rather than forked, so they do
+    not share the database connections of this one.
+    """
+    processes = processes or os.cpu_count()
+    worker_name = f'{socket.gethostname()}:{os.getpid()}'
+    requeued = requeue_stale_jobs()
+    if requeued:
+        logger.warning('Queued %d stale job(s) again', requeued)
+
+    running = {}
+    with ProcessPoolExecutor(processes, mp_context=get_context('spawn'), initializer=django.setup) as pool:
+        while True:
+            close_old_connections()
+            while len(running) < processes:
+                job_id = claim_job(worker_name)
+                if job_id is None:
+                    break
+                logger.info('Running job %s', job_id)
+                running[pool.submit(_run_job_in_process, job_id)] = job_id
+            if not running:
+                if burst:
+                    return
+                time.sleep(poll_interval)
+                continue
+
+            finished, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            for future in finished:
+                job_id = running.pop(future)
+                try:
+                    future.result()
+                except BrokenProcessPool:
+                    # A process died (e.g. killed for memory): its jobs cannot be told apart
+                    for lost_id in [job_id, *running.values()]:
+                        _finish(lost_id, 'failed', error='The worker process running this job died')
+                    raise
+
+
+@job_handler('export_records')
+def export_records(context, export_format='csv', quarter='', year='', hod_name=''):
+    """The admin CSV/XLSX export, written to a file for download"""
+    records = export_queryset(quarter=quarter, year=year, hod_name=hod_name)
+    total = records.count()
+    context.progress(0, total, 'Exporting records', force=True)
+
+    def report(done):
+        context.progress(done, total)
+
+    path = context.output_path(f'qpr_records.{export_format}')
+    if export_format == 'xlsx':
+        with open(path, 'wb') as handle:
+            write_xlsx(records, handle, report)
+    else:
+        with open(path, 'w', encoding='utf-8', newline='') as handle:
+            handle.writelines(iter_csv(records, report))
+    return {'rows': total}
+
+
+@job_handler('quarter_pdfs')
+def quarter_pdfs(context, quarter, year=''):
+    """A ZIP of the PDF reports of every submitted record of the quarter"""
+    if not quarter:
+        raise JobError('Choose a quarter to export as PDF')
+
+    def report(done, total):
+        context.progress(done, total, 'Rendering PDF reports')
+
+    path = context.output_path(f'qpr_reports_{slugify(f"{quarter} {year}")}.zip')
+    # The job already has a worker process of its own: render in it rather than starting a
+    # pool inside the worker's pool, which would compete with the other jobs for the cores
+    count = build_quarter_archive(path, quarter, year, processes=1, progress=report)
+    return {'pdfs': count}
+
+
+@job_handler('import_qpr_records')
+def import_records(context, upload, file_format, dry_run=False, file_name=''):
+    """Import an uploaded file of QPR records (see save_upload); problems go to an error report file"""
+    def report(stats):
+        context.progress(stats['processed'], message=f'{stats["processed"]} rows read')
+
+    path = job_file_path(upload)
+    try:
+        stats = import_qpr_records(path, file_format, dry_run=dry_run, progress=report)
+    finally:
+        os.remove(path)
+
+    errors = stats['errors']
+    if errors:
+        with open(context.output_path('qpr_import_errors.csv'), 'w', encoding='utf-8', newline='') as handle:
+            write_error_report(errors, handle)
+    return {
+        'file_name': file_name,
+        'dry_run': dry_run,
+        'processed': stats['processed'],
+        'created': stats['created'],
+        'skipped_rows': len({error[0] for error in errors}),
+        'error_count': len(errors),
+        'errors': errors[:IMPORT_REPORT_DISPLAY_LIMIT],
+    }
+
+
+@job_handler('rename_hod')
+def rename_hod(context, old_hod_name, new_hod_name, old_employee_code, new_employee_code):
+    """Rename a HOD and their employee code, and move every user of the old group name to the new one"""
+    with transaction.atomic():
+        try:
+            hod_profile = UserProfile.objects.select_related('user').get(employee_code=old_employee_code, role='hod')
+        except UserProfile.DoesNotExist:
+            raise JobError(f'HOD with employee code {old_employee_code} not found')
+        if new_employee_code != old_employee_code:
+            if UserProfile.objects.filter(employee_code=new_employee_code).exists():
+                raise JobError(f'Employee code {new_employee_code} is already in use')
+
+        hod_profile.name = new_hod_name
+        hod_profile.hod_name = new_hod_name
+        hod_profile.employee_code = new_employee_code
+        hod_profile.user.username = new_employee_code  # Update Django User username
+        hod_profile.user.save()
+        hod_profile.save()
+
+        # Users under old HOD name should now reference new HOD name
+        moved = UserProfile.objects.filter(
+            role='user',
+            hod_name__iexact=old_hod_name
+        ).update(hod_name=new_hod_name)
+
+    # update() skips the rollup, directory and fragment signals, so refresh both groups here
+    refresh_hod_rollup([old_hod_name, new_hod_name])
+    invalidate_hod_directory()
+    bump_group_versions([old_hod_name, new_hod_name])
+    return {
+        'message': f'HOD updated successfully! {old_hod_name} → {new_hod_name}, {old_employee_code} → {new_employee_code}',
+        'new_hod_name': new_hod_name,
+        'users_moved': moved,
+    }
@@ -0,0 +1,175 @@
+"""
+HTTP load test of the JSON API, to compare deployments.
+
+run_load() keeps `concurrency` keep-alive connections busy against a running
+server for a fixed time and reports throughput and latency percentiles.
+start_server() launches gunicorn with gunicorn.conf.py as WSGI (sync
+workers) or ASGI (uvicorn workers), so compare_servers() can measure both
+with the same number of worker processes on the same cores. Requests are
+authenticated with a session created directly in the session store, so no
+password is needed. `manage.py loadtest` drives it.
+"""
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+
+from .models import QPRRecord
+
+SERVER_KINDS = ('wsgi', 'asgi')
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def login_session(user):
+    """Session key of a new session logged in as user (what the login view stores)"""
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return session.session_key
+
+
+def api_paths(user):
+    """The read-only API requests of a user: record list, newest record, session probe"""
+    paths = ['/api/records']
+    record_id = QPRRecord.objects.filter(user=user).order_by('-id').values_list('id', flat=True).first()
+    if record_id:
+        paths.append(f'/api/records/{record_id}/')
+    paths.append('/api/session/')
+    return paths
+
+
+def _percentile(latencies, fraction):
+    return round(latencies[max(round(fraction * len(latencies)) - 1, 0)], 2) if latencies else None
+
+
+def run_load(base_url, paths, session_key, concurrency=16, duration=10.0):
+    """
+    Request `paths` in turn from `concurrency` threads, each on its own
+    keep-alive connection, for `duration` seconds. Responses other than 200
+    and connection errors count as errors.
+    """
+    url = urlsplit(base_url)
+    headers = {'Cookie': f'{settings.SESSION_COOKIE_NAME}={session_key}', 'Host': url.netloc}
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency)
+    deadline = []
+
+    def client(offset):
+        connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+        own_latencies = []
+        own_errors = 0
+        barrier.wait()
+        i = offset
+        try:
+            while time.perf_counter() < deadline[0]:
+                path = paths[i % len(paths)]
+                i += 1
+                started = time.perf_counter()
+                try:
+                    connection.request('GET', path, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                except (OSError, http.client.HTTPException):
+                    own_errors += 1
+                    connection.close()
+                    continue
+                own_latencies.append((time.perf_counter() - started) * 1000)
+                if response.status != 200:
+                    own_errors += 1
+        finally:
+            connection.close()
+            with lock:
+                latencies.extend(own_latencies)
+                errors.append(own_errors)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    deadline.append(started + duration)
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'seconds': round(elapsed, 2),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'latency_ms_median': round(statistics.median(latencies), 2) if latencies else None,
+        'latency_ms_p95': _percentile(latencies, 0.95),
+        'latency_ms_p99': _percentile(latencies, 0.99),
+    }
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(kind, workers, timeout=30):
+    """
+    Start gunicorn with gunicorn.conf.py as a WSGI or ASGI server on a free
+    local port, with the environment of this process (so the same database).
+    Returns (process, base URL) once it accepts connections.
+    """
+    port = _free_port()
+    env = dict(os.environ, QPR_ASGI='1' if kind == 'asgi' else '0')
+    env.setdefault('QPR_ALLOWED_HOSTS', '127.0.0.1,localhost')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+         '--bind', f'127.0.0.1:{port}', '--workers', str(workers)],
+        cwd=PROJECT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{kind} server exited with status {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process, f'http://127.0.0.1:{port}'
+        except OSError:
+            time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f'{kind} server did not start within {timeout}s')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def compare_servers(kinds, workers, paths, session_key, concurrency=16, duration=10.0, warmup=2.0, progress=None):
+    """run_load() against a fresh gunicorn of each kind with the same worker count"""
+    results = {}
+    for kind in kinds:
+        process, base_url = start_server(kind, workers)
+        try:
+            # Fill the per-worker caches and connection setup before measuring
+            run_load(base_url, paths, session_key, concurrency, warmup)
+            results[kind] = dict(run_load(base_url, paths, session_key, concurrency, duration), workers=workers)
+        finally:
+            stop_server(process)
+        if progress:
+            progress(kind, results[kind])
+    return results
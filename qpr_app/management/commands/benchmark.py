@@ -0,0 +1,138 @@
+import json
+import os
+import platform
+import tempfile
+from datetime import datetime, timezone
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from qpr_app.benchmarks import ENDPOINTS, query_growth_failures, regression_failures, run_benchmarks
+
+
+def _int_list(value):
+    try:
+        numbers = [int(part) for part in value.split(',') if part.strip()]
+    except ValueError:
+        raise CommandError(f'Expected a comma separated list of integers, got {value!r}')
+    if not numbers or min(numbers) < 1:
+        raise CommandError('Scales must be positive integers')
+    return numbers
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the QPR endpoints and dashboards on synthetic data at several scales. '
+        'Runs against a throwaway test database, writes the results as JSON and fails '
+        'when an endpoint needs more queries as the data grows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='1,2,4',
+                            help='Comma separated multipliers of HODs, users per HOD and records per quarter (default: 1,2,4)')
+        parser.add_argument('--hods', type=int, default=2, help='HODs at scale 1 (default: 2)')
+        parser.add_argument('--users', type=int, default=5, help='Users per HOD at scale 1 (default: 5)')
+        parser.add_argument('--quarters', type=int, default=2, help='Quarters with records (default: 2)')
+        parser.add_argument('--records', type=int, default=1, help='Records per user per quarter at scale 1 (default: 1)')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per endpoint (default: 5)')
+        parser.add_argument('--endpoint', action='append', choices=sorted(ENDPOINTS),
+                            help='Only benchmark this endpoint (may be repeated)')
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help='Users saving at the same time in the concurrent save test, 0 to skip (default: 8)')
+        parser.add_argument('--saves', type=int, default=10,
+                            help='Saves per user in the concurrent save test (default: 10)')
+        parser.add_argument('--output', default='benchmark_results.json', help='JSON results file')
+        parser.add_argument('--compare', help='Previous results file; fail if any endpoint needs more queries')
+        parser.add_argument('--query-allowance', type=int, default=0,
+                            help='Extra queries tolerated at larger scales (default: 0)')
+
+    def handle(self, *args, **options):
+        scales = sorted(set(_int_list(options['scales'])))
+        baseline = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as handle:
+                baseline = json.load(handle)
+
+        # Never touch the real database: work in a fresh test database. For
+        # SQLite that is a file rather than the in-memory default, so journal
+        # mode and locking between concurrent connections are as in production
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.gettempdir(), 'qpr_benchmark.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = run_benchmarks(
+                scales,
+                hods=options['hods'],
+                users_per_hod=options['users'],
+                quarters=options['quarters'],
+                records_per_quarter=options['records'],
+                repeat=options['repeat'],
+                endpoints=options['endpoint'],
+                concurrency=options['concurrency'],
+                concurrent_saves=options['saves'],
+                reset=lambda: call_command('flush', interactive=False, verbosity=0),
+                progress=self._report_scale,
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        failures = query_growth_failures(results, options['query_allowance'])
+        if baseline is not None:
+            failures += regression_failures(results, baseline)
+            self._report_comparison(results, baseline)
+
+        with open(options['output'], 'w', encoding='utf-8') as handle:
+            json.dump({
+                'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'database': connection.vendor,
+                'settings': {key: options[key] for key in (
+                    'hods', 'users', 'quarters', 'records', 'repeat', 'concurrency', 'saves'
+                )},
+                'results': results,
+                'failures': failures,
+            }, handle, indent=2)
+        self.stdout.write(f'Results written to {options["output"]}')
+
+        if failures:
+            for failure in failures:
+                self.stderr.write(self.style.ERROR(failure))
+            raise CommandError(f'{len(failures)} query count threshold(s) exceeded')
+        self.stdout.write(self.style.SUCCESS('Query counts are independent of data size'))
+
+    def _report_scale(self, result):
+        data = result['data']
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'Scale {result["scale"]}: {data["hods"]} HODs, {data["users"]} users, '
+            f'{data["records"]} records (generated in {result["generate_seconds"]}s)'
+        ))
+        self.stdout.write(f'  {"endpoint":<22}{"queries":>9}{"warm":>6}{"median ms":>11}{"min ms":>9}{"peak KiB":>10}')
+        for name, metrics in result['endpoints'].items():
+            self.stdout.write(
+                f'  {name:<22}{metrics["queries"]:>9}{metrics["queries_warm"]:>6}'
+                f'{metrics["wall_ms_median"]:>11}{metrics["wall_ms_min"]:>9}{metrics["peak_memory_kib"]:>10}'
+            )
+        saves = result.get('concurrent_saves')
+        if saves:
+            self.stdout.write(
+                f'  concurrent saves: {saves["workers"]} users x {saves["saves"] // max(saves["workers"], 1)} '
+                f'on {connection.vendor}: {saves["saves_per_second"]} saves/s, median {saves["latency_ms_median"]} ms, '
+                f'p95 {saves["latency_ms_p95"]} ms, {saves["errors"]} failed'
+            )
+
+    def _report_comparison(self, results, baseline):
+        previous = {result['scale']: result['endpoints'] for result in baseline.get('results', [])}
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Compared with {baseline.get("created_at", "baseline")}:'))
+        for result in results:
+            for name, metrics in result['endpoints'].items():
+                before = previous.get(result['scale'], {}).get(name)
+                if not before or not before.get('wall_ms_median'):
+                    continue
+                ratio = metrics['wall_ms_median'] / before['wall_ms_median']
+                self.stdout.write(
+                    f'  scale {result["scale"]} {name:<22} queries {before["queries"]} -> {metrics["queries"]}, '
+                    f'median time x{ratio:.2f}'
+                )
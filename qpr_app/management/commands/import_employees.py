@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from qpr_app.imports import (
+    DEFAULT_PASSWORD, IMPORT_BATCH_SIZE, IMPORT_FORMATS, ImportFileError, import_employees,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Create or update employees, HODs and admins from a CSV, XLSX or JSONL file. '
+        'Columns: employee_code (required), role, hod_name, name, first_name, last_name, '
+        'email, office_name, office_code, password. Safe to run again with the same file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV, XLSX or JSONL file with one employee per row')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='File format (default: from the extension)')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+                            help=f'Rows written per transaction (default: {IMPORT_BATCH_SIZE})')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Password hashing processes (default: one per CPU, 1 hashes inline)')
+        parser.add_argument('--default-password', default=DEFAULT_PASSWORD,
+                            help='Password for new accounts without a password column value')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be a positive integer')
+        if options['workers'] is not None and options['workers'] < 1:
+            raise CommandError('--workers must be a positive integer')
+
+        try:
+            stats = import_employees(
+                options['path'],
+                file_format=options['format'],
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+                default_password=options['default_password'],
+                progress=self._report_progress,
+            )
+        except (ImportFileError, OSError) as e:
+            raise CommandError(str(e))
+
+        if stats['errors']:
+            for line_num, code, message in stats['errors']:
+                self.stderr.write(f'Line {line_num} [{code or "-"}]: {message}')
+            raise CommandError(f'{len(stats["errors"])} problem(s) found in {stats["total"]} rows; nothing was imported')
+
+        for line_num, code, message in stats['skipped']:
+            self.stderr.write(self.style.WARNING(f'Skipped line {line_num} [{code}]: {message}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {stats["processed"]} rows in {stats["elapsed"]:.1f}s: '
+            f'{stats["created"]} created, {stats["updated"]} updated, '
+            f'{stats["unchanged"]} unchanged, {len(stats["skipped"])} skipped'
+        ))
+
+    def _report_progress(self, stats):
+        rate = stats['processed'] / stats['elapsed'] if stats['elapsed'] else 0
+        self.stdout.write(
+            f'  {stats["processed"]}/{stats["total"]} rows '
+            f'({stats["created"]} created, {stats["updated"]} updated, {stats["unchanged"]} unchanged) '
+            f'{rate:.0f} rows/s'
+        )
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from qpr_app.imports import (
+    IMPORT_FORMATS, QPR_IMPORT_CHUNK_SIZE, ImportFileError, import_qpr_records, write_error_report,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Import QPR records from a CSV, XLSX or JSONL file. Each row needs employee_code and quarter; '
+        'the other columns are the record header fields and the form keys s1_total ... s12_3 '
+        '(the admin CSV/Excel export has this layout). Invalid rows are skipped and reported.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV, XLSX or JSONL file with one record per row')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='File format (default: from the extension)')
+        parser.add_argument('--chunk-size', type=int, default=QPR_IMPORT_CHUNK_SIZE,
+                            help=f'Rows validated and written per transaction (default: {QPR_IMPORT_CHUNK_SIZE})')
+        parser.add_argument('--report', help='Write the per-row error report to this CSV file')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only, write nothing')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be a positive integer')
+
+        try:
+            stats = import_qpr_records(
+                options['path'],
+                file_format=options['format'],
+                chunk_size=options['chunk_size'],
+                dry_run=options['dry_run'],
+                progress=self._report_progress,
+            )
+        except (ImportFileError, OSError) as e:
+            raise CommandError(str(e))
+
+        errors = stats['errors']
+        if options['report']:
+            with open(options['report'], 'w', newline='', encoding='utf-8') as handle:
+                write_error_report(errors, handle)
+        else:
+            for line_num, code, column, message in errors[:50]:
+                self.stderr.write(f'Line {line_num} [{code or "-"}] {column}: {message}')
+            if len(errors) > 50:
+                self.stderr.write(f'... {len(errors) - 50} more; use --report to save them all')
+
+        verb = 'Would import' if options['dry_run'] else 'Imported'
+        skipped_lines = len({error[0] for error in errors})
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {stats["created"]} of {stats["processed"]} rows in {stats["elapsed"]:.1f}s; '
+            f'{skipped_lines} rows skipped'
+        ))
+
+    def _report_progress(self, stats):
+        rate = stats['processed'] / stats['elapsed'] if stats['elapsed'] else 0
+        self.stdout.write(f'  {stats["processed"]} rows read, {stats["created"]} valid, {rate:.0f} rows/s')
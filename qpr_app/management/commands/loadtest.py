@@ -0,0 +1,74 @@
+import json
+import os
+from datetime import datetime, timezone
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from qpr_app.loadtest import SERVER_KINDS, api_paths, compare_servers, login_session, run_load
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test the JSON API as one user: against a running server (--url), or against '
+        'gunicorn started as WSGI and as ASGI with the same number of workers, to compare them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='Employee code of the user to request as')
+        parser.add_argument('--url', help='Base URL of a running server, e.g. http://127.0.0.1:8000')
+        parser.add_argument('--servers', default='wsgi,asgi',
+                            help='Without --url: servers to start and compare (default: wsgi,asgi)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Without --url: worker processes of each server (default: one per core)')
+        parser.add_argument('--concurrency', type=int, default=16, help='Concurrent connections (default: 16)')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per measurement (default: 10)')
+        parser.add_argument('--path', action='append', help='Request this path (may be repeated; default: the GET API)')
+        parser.add_argument('--output', help='Also write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'No user with employee code {options["user"]}')
+        kinds = [kind.strip() for kind in options['servers'].split(',') if kind.strip()]
+        if any(kind not in SERVER_KINDS for kind in kinds):
+            raise CommandError(f'--servers takes {" and/or ".join(SERVER_KINDS)}')
+        paths = options['path'] or api_paths(user)
+        session_key = login_session(user)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{options["concurrency"]} connections for {options["duration"]:g}s on {", ".join(paths)}'
+        ))
+        self.stdout.write(f'  {"server":<24}{"requests":>9}{"req/s":>9}{"median ms":>11}{"p95 ms":>9}{"p99 ms":>9}{"errors":>8}')
+        if options['url']:
+            results = {options['url']: run_load(
+                options['url'], paths, session_key, options['concurrency'], options['duration']
+            )}
+            self._report(options['url'], results[options['url']])
+        else:
+            try:
+                results = compare_servers(
+                    kinds, options['workers'], paths, session_key,
+                    concurrency=options['concurrency'], duration=options['duration'], progress=self._report,
+                )
+            except RuntimeError as e:
+                raise CommandError(str(e))
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump({
+                    'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                    'cores': os.cpu_count(),
+                    'paths': paths,
+                    'results': results,
+                }, handle, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}')
+
+    def _report(self, name, result):
+        if 'workers' in result:
+            name = f'{name} x{result["workers"]} workers'
+        self.stdout.write(
+            f'  {name[:23]:<24}{result["requests"]:>9}{result["requests_per_second"]:>9}'
+            f'{result["latency_ms_median"]:>11}{result["latency_ms_p95"]:>9}{result["latency_ms_p99"]:>9}{result["errors"]:>8}'
+        )
@@ -0,0 +1,96 @@
+import json
+import math
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Summarise the slow-request log written by PerformanceMiddleware into per-endpoint '
+        'p50/p95/p99 latency, query count and DB time, plus the most repeated query shapes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help='Log file (default: settings.QPR_PERFORMANCE_LOG)')
+        parser.add_argument('--since', help='Only requests logged at or after this ISO timestamp, e.g. 2026-01-31')
+        parser.add_argument('--sort', choices=['p50', 'p95', 'p99', 'count', 'queries'], default='p95',
+                            help='Column to sort endpoints by (default: p95)')
+        parser.add_argument('--limit', type=int, default=20, help='Endpoints / query shapes to show (default: 20)')
+        parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+
+    def handle(self, *args, **options):
+        path = options['path'] or settings.QPR_PERFORMANCE_LOG
+        entries = defaultdict(list)
+        duplicates = Counter()
+        skipped = 0
+        try:
+            with open(path, encoding='utf-8') as handle:
+                for line in handle:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        skipped += 1
+                        continue
+                    if options['since'] and entry.get('time', '') < options['since']:
+                        continue
+                    endpoint = f'{entry.get("method", "")} {entry.get("view") or entry.get("path")}'
+                    entries[endpoint].append(entry)
+                    for duplicate in entry.get('duplicate_queries', []):
+                        duplicates[(endpoint, duplicate['sql'])] += duplicate['count']
+        except FileNotFoundError:
+            raise CommandError(f'No performance log at {path}')
+
+        summary = []
+        for endpoint, rows in entries.items():
+            durations = sorted(row['duration_ms'] for row in rows)
+            queries = [row['queries'] for row in rows]
+            summary.append({
+                'endpoint': endpoint,
+                'count': len(rows),
+                'p50': percentile(durations, 50),
+                'p95': percentile(durations, 95),
+                'p99': percentile(durations, 99),
+                'queries': round(sum(queries) / len(queries), 1),
+                'max_queries': max(queries),
+                'db_ms': round(sum(row['db_ms'] for row in rows) / len(rows), 1),
+                'errors': sum(1 for row in rows if row.get('status', 200) >= 500),
+            })
+        summary.sort(key=lambda row: row[options['sort']], reverse=True)
+        summary = summary[:options['limit']]
+        top_duplicates = [
+            {'endpoint': endpoint, 'sql': sql, 'count': count}
+            for (endpoint, sql), count in duplicates.most_common(options['limit'])
+        ]
+
+        if options['json']:
+            self.stdout.write(json.dumps({'endpoints': summary, 'duplicate_queries': top_duplicates}, indent=2))
+            return
+
+        if not summary:
+            self.stdout.write('No requests logged.')
+            return
+        self.stdout.write(
+            f'{"endpoint":<45}{"count":>7}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}'
+            f'{"queries":>9}{"max q":>7}{"db ms":>9}{"5xx":>5}'
+        )
+        for row in summary:
+            self.stdout.write(
+                f'{row["endpoint"][:44]:<45}{row["count"]:>7}{row["p50"]:>10.1f}{row["p95"]:>10.1f}'
+                f'{row["p99"]:>10.1f}{row["queries"]:>9}{row["max_queries"]:>7}{row["db_ms"]:>9}{row["errors"]:>5}'
+            )
+        if top_duplicates:
+            self.stdout.write(self.style.MIGRATE_HEADING('\nMost repeated query shapes (possible N+1):'))
+            for row in top_duplicates:
+                self.stdout.write(f'  {row["count"]:>6}x  {row["endpoint"]}: {row["sql"][:160]}')
+        if skipped:
+            self.stderr.write(f'{skipped} line(s) were not JSON and were skipped')
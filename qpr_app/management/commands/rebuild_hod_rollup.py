@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from qpr_app.fragment_cache import invalidate_all_fragments
+from qpr_app.rollups import rebuild_hod_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the per-HOD / per-quarter submission rollup table from scratch '
+        'and retire the cached dashboard fragments'
+    )
+
+    def handle(self, *args, **options):
+        count = rebuild_hod_rollup()
+        invalidate_all_fragments()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt HOD rollup: {count} rows'))
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from qpr_app.pdf_reports import build_quarter_archive
+
+
+class Command(BaseCommand):
+    help = (
+        'Write the PDF reports of every submitted QPR record of a quarter to one ZIP file. '
+        'PDFs not in the PDF cache yet are rendered first, in parallel over a pool of processes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='ZIP file to write')
+        parser.add_argument('--quarter', required=True, help='Quarter as stored on the records, e.g. "30 जून / Jun 30"')
+        parser.add_argument('--year', default='', help='Financial year, e.g. 2025-2026 (default: every year)')
+        parser.add_argument('--processes', type=int,
+                            help='Processes rendering PDFs at the same time (default: one per core)')
+
+    def handle(self, *args, **options):
+        if options['processes'] is not None and options['processes'] < 1:
+            raise CommandError('--processes must be at least 1')
+
+        def report(done, total):
+            self.stdout.write(f'\r  {done}/{total} PDFs ready', ending='')
+            self.stdout.flush()
+
+        started = time.perf_counter()
+        count = build_quarter_archive(
+            options['output'], options['quarter'], options['year'], options['processes'], progress=report,
+        )
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f'{count} PDF reports written to {options["output"]} in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from qpr_app.jobs import POLL_INTERVAL, run_worker
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the queued background jobs (exports, PDF archives, imports, HOD renames) in a pool of '
+        'worker processes. Keep one running next to the web server; several may run at once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int,
+                            help='Jobs run at the same time, each in its own process (default: one per core)')
+        parser.add_argument('--poll-interval', type=float, default=POLL_INTERVAL,
+                            help=f'Seconds between looks at an empty queue (default: {POLL_INTERVAL:g})')
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        if options['processes'] is not None and options['processes'] < 1:
+            raise CommandError('--processes must be at least 1')
+        self.stdout.write('Waiting for jobs; stop with Ctrl+C')
+        try:
+            run_worker(options['processes'], options['poll_interval'], options['burst'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped')
@@ -0,0 +1,158 @@
+"""
+Request instrumentation.
+
+PerformanceMiddleware measures every request: wall time, number of database
+queries, time spent in the database, response size and query shapes that
+ran repeatedly (the N+1 pattern). The figures are sent back in a
+Server-Timing header, visible in the browser's network panel, and requests
+slower than QPR_SLOW_REQUEST_MS are written as one JSON line to the
+'qpr.performance' logger. `manage.py perf_report` summarises that log.
+
+NPlusOneMiddleware is optional (QPR_NPLUSONE_DETECTION): it reports every
+query shape a request repeated from one place in the code to the
+'qpr.nplusone' logger, with the file and line that issued it, and with
+QPR_NPLUSONE_RAISE set fails the request instead (for development).
+
+PerformanceMiddleware and AsyncWhiteNoiseMiddleware handle both sync and
+async requests, so under ASGI the async API views are not pushed into a
+thread by the middleware stack around them.
+"""
+import json
+import logging
+import time
+from datetime import datetime, timezone
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .instrumentation import N_PLUS_ONE_THRESHOLD, NPlusOneDetector, QueryRecorder
+
+logger = logging.getLogger('qpr.performance')
+nplusone_logger = logging.getLogger('qpr.nplusone')
+
+# Query shapes repeated this often in one request are reported as duplicates
+DUPLICATE_QUERY_THRESHOLD = 3
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    return match.view_name or match._func_path
+
+
+class PerformanceMiddleware:
+    """Time each request and its database work; log the slow ones"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_request_ms = getattr(settings, 'QPR_SLOW_REQUEST_MS', 500)
+        self.server_timing = getattr(settings, 'QPR_SERVER_TIMING', True)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with QueryRecorder() as queries:
+            response = self.get_response(request)
+        return self._record(request, response, started, queries)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        # The async ORM runs every query in the request's thread-sensitive
+        # sync_to_async thread, so hook the connections of that thread
+        queries = QueryRecorder()
+        await sync_to_async(queries.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(queries.__exit__)(None, None, None)
+        return self._record(request, response, started, queries)
+
+    def _record(self, request, response, started, queries):
+        duration_ms = (time.perf_counter() - started) * 1000
+        db_ms = queries.duration * 1000
+
+        if self.server_timing:
+            response['Server-Timing'] = (
+                f'app;dur={duration_ms - db_ms:.1f}, '
+                f'db;dur={db_ms:.1f};desc="{queries.count} queries", '
+                f'total;dur={duration_ms:.1f}'
+            )
+
+        if duration_ms >= self.slow_request_ms:
+            logger.warning(json.dumps({
+                'time': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+                'method': request.method,
+                'path': request.path,
+                'view': _view_name(request),
+                'status': response.status_code,
+                'duration_ms': round(duration_ms, 1),
+                'db_ms': round(db_ms, 1),
+                'queries': queries.count,
+                'response_bytes': None if response.streaming else len(response.content),
+                'duplicate_queries': [
+                    {'count': count, 'sql': fingerprint}
+                    for fingerprint, count in queries.duplicates(DUPLICATE_QUERY_THRESHOLD)
+                ],
+            }, ensure_ascii=False))
+        return response
+
+
+class NPlusOneError(Exception):
+    """Raised by NPlusOneMiddleware when QPR_NPLUSONE_RAISE is set"""
+
+
+class NPlusOneMiddleware:
+    """Report queries a request ran in a loop, with the line that issued them"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'QPR_NPLUSONE_THRESHOLD', N_PLUS_ONE_THRESHOLD)
+        self.raise_errors = getattr(settings, 'QPR_NPLUSONE_RAISE', False)
+
+    def __call__(self, request):
+        with NPlusOneDetector(self.threshold) as detector:
+            response = self.get_response(request)
+        if detector.problems():
+            message = f'N+1 queries in {request.method} {request.path} ({_view_name(request)}):\n{detector.report()}'
+            if self.raise_errors:
+                raise NPlusOneError(message)
+            nplusone_logger.warning(message)
+        return response
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware that also runs in async mode. The stock middleware
+    is sync only, which makes Django run everything below it in a thread
+    under ASGI; here only the static files themselves are served from one.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
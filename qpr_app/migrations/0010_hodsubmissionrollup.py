@@ -0,0 +1,85 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:12
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Value
+from django.db.models.functions import Coalesce, Lower
+
+ALL_PERIODS = '*'
+
+
+def populate_rollup(apps, schema_editor):
+    """Fill the rollup table, with the models as of this migration"""
+    UserProfile = apps.get_model('qpr_app', 'UserProfile')
+    QPRRecord = apps.get_model('qpr_app', 'QPRRecord')
+    HODSubmissionRollup = apps.get_model('qpr_app', 'HODSubmissionRollup')
+
+    totals = {
+        row['hod_key']: row
+        for row in UserProfile.objects.filter(role='user', hod_name__isnull=False)
+        .annotate(hod_key=Lower('hod_name')).order_by().values('hod_key').annotate(
+            total_users=Count('id'),
+            profiles_complete=Count('id', filter=Q(profile_updated=True)),
+        )
+    }
+    records = QPRRecord.objects.filter(
+        user__profile__role='user', user__profile__hod_name__isnull=False
+    ).annotate(
+        hod_key=Lower('user__profile__hod_name'),
+        period_year=Coalesce('year', Value('')),
+    ).order_by()
+
+    def counts(*period_fields):
+        return records.values('hod_key', *period_fields).annotate(
+            active=Count('user', distinct=True),
+            submitted=Count('user', distinct=True, filter=Q(status='Submitted')),
+        )
+
+    def row(hod_key, quarter, year, active=0, submitted=0):
+        return HODSubmissionRollup(
+            hod_name=hod_key, quarter=quarter, year=year,
+            total_users=totals[hod_key]['total_users'],
+            profiles_complete=totals[hod_key]['profiles_complete'],
+            drafts=active - submitted, submitted=submitted,
+        )
+
+    all_time = {group['hod_key']: group for group in counts()}
+    rows = [
+        row(hod_key, ALL_PERIODS, ALL_PERIODS, **{
+            key: all_time.get(hod_key, {}).get(key, 0) for key in ('active', 'submitted')
+        })
+        for hod_key in totals
+    ]
+    rows += [
+        row(group['hod_key'], group['quarter'], group['period_year'], group['active'], group['submitted'])
+        for group in counts('quarter', 'period_year')
+    ]
+    HODSubmissionRollup.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qpr_app', '0009_qprrecord_year'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HODSubmissionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hod_name', models.CharField(max_length=50)),
+                ('quarter', models.CharField(max_length=50)),
+                ('year', models.CharField(max_length=20)),
+                ('total_users', models.IntegerField(default=0)),
+                ('profiles_complete', models.IntegerField(default=0)),
+                ('drafts', models.IntegerField(default=0)),
+                ('submitted', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['hod_name', 'year', 'quarter'],
+                'constraints': [models.UniqueConstraint(fields=('hod_name', 'quarter', 'year'), name='unique_hod_rollup_period')],
+            },
+        ),
+        migrations.RunPython(populate_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:03
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qpr_app', '0010_hodsubmissionrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='managerrequest',
+            index=models.Index(fields=['hod', 'request_type', 'status'], name='request_hod_type_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='qprrecord',
+            index=models.Index(condition=models.Q(('is_submitted', True)), fields=['user'], name='qpr_user_submitted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='qprrecord',
+            index=models.Index(fields=['user', 'status'], name='qpr_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='qprrecord',
+            index=models.Index(fields=['quarter', 'year'], name='qpr_quarter_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['role', 'hod_name'], name='profile_role_hod_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(models.F('role'), django.db.models.functions.text.Lower('hod_name'), name='profile_role_hod_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def collapse_fan_out(apps, schema_editor):
+    """Merge the per-admin copies of each user edit request into one request with recipients"""
+    ManagerRequest = apps.get_model('qpr_app', 'ManagerRequest')
+    ManagerRequestRecipient = apps.get_model('qpr_app', 'ManagerRequestRecipient')
+
+    groups = {}
+    copies = ManagerRequest.objects.filter(
+        hod__profile__role='user', user__profile__role='admin'
+    ).order_by('id')
+    for copy in copies.iterator():
+        key = (copy.hod_id, copy.request_type, copy.reason, copy.status)
+        groups.setdefault(key, []).append(copy)
+
+    recipients = []
+    for group in groups.values():
+        kept = group[0]
+        recipients += [
+            ManagerRequestRecipient(request_id=kept.id, recipient_id=copy.user_id)
+            for copy in group
+        ]
+        ManagerRequest.objects.filter(id__in=[copy.id for copy in group[1:]]).delete()
+        # The request's user is now the employee asking, as for HOD requests
+        ManagerRequest.objects.filter(id=kept.id).update(user_id=kept.hod_id)
+    ManagerRequestRecipient.objects.bulk_create(recipients, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qpr_app', '0011_hot_filter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ManagerRequestRecipient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='manager_requests_assigned', to=settings.AUTH_USER_MODEL)),
+                ('request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipients', to='qpr_app.managerrequest')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('recipient', 'request'), name='unique_request_recipient')],
+            },
+        ),
+        migrations.RunPython(collapse_fan_out, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def link_legacy_qpr_requests(apps, schema_editor):
+    """
+    Attach existing QPR edit requests to their record. The reason text starts
+    with "Edit request for QPR (<office> - <quarter>):"; a request is linked
+    only when exactly one of the requester's records matches.
+    """
+    ManagerRequest = apps.get_model('qpr_app', 'ManagerRequest')
+    QPRRecord = apps.get_model('qpr_app', 'QPRRecord')
+
+    requests = ManagerRequest.objects.filter(request_type='qpr', qpr_record__isnull=True)
+    for manager_request in requests.iterator():
+        matches = [
+            record.id
+            for record in QPRRecord.objects.filter(user_id=manager_request.hod_id)
+            if (manager_request.reason or '').startswith(
+                f"Edit request for QPR ({record.officeName} - {record.quarter}):"
+            )
+        ]
+        if len(matches) == 1:
+            ManagerRequest.objects.filter(id=manager_request.id).update(qpr_record_id=matches[0])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qpr_app', '0012_managerrequestrecipient'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='managerrequest',
+            name='qpr_record',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='edit_requests', to='qpr_app.qprrecord'),
+        ),
+        migrations.RunPython(link_legacy_qpr_requests, migrations.RunPython.noop),
+    ]
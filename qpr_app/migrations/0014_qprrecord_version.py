@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('qpr_app', '0013_managerrequest_qpr_record'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='qprrecord',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 class UserProfile(models.Model):
@@ -26,6 +28,11 @@ class UserProfile(models.Model):
     
     class Meta:
         ordering = ['-id']
+        indexes = [
+            models.Index(fields=['role', 'hod_name'], name='profile_role_hod_idx'),
+            # Case-insensitive HOD grouping (dashboards, rollups)
+            models.Index(models.F('role'), Lower('hod_name'), name='profile_role_hod_lower_idx'),
+        ]
 
 
 class ManagerRequest(models.Model):
@@ -44,6 +51,8 @@ class ManagerRequest(models.Model):
     
     hod = models.ForeignKey(User, on_delete=models.CASCADE, related_name='manager_requests_sent')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='manager_requests_received')
+    # The QPR an edit request is for; an approved request unlocks only this record
+    qpr_record = models.ForeignKey('QPRRecord', on_delete=models.CASCADE, related_name='edit_requests', null=True, blank=True)
     request_type = models.CharField(max_length=10, choices=REQUEST_TYPE_CHOICES)
     reason = models.TextField(blank=True, null=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
@@ -55,6 +64,46 @@ class ManagerRequest(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['hod', 'request_type', 'status'], name='request_hod_type_status_idx'),
+        ]
+
+
+class ManagerRequestRecipient(models.Model):
+    """Admin a ManagerRequest is addressed to; the approval state is shared on the request"""
+    request = models.ForeignKey(ManagerRequest, on_delete=models.CASCADE, related_name='recipients')
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='manager_requests_assigned')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.request_id} -> {self.recipient_id}"
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['recipient', 'request'], name='unique_request_recipient'),
+        ]
+
+
+# Reverse one-to-one accessors of the eleven section models, in section order
+SECTION_RELATED_NAMES = [f'section{i}' for i in range(1, 12)]
+
+
+class QPRRecordQuerySet(models.QuerySet):
+    """Record loading helpers shared by the API views and exports"""
+
+    def with_sections(self):
+        """Fetch records together with all eleven section rows in one joined query"""
+        return self.select_related(*SECTION_RELATED_NAMES)
+
+    def with_edit_approval(self):
+        """Annotate edit_approved: the owner has an approved edit request for the record"""
+        approved = ManagerRequest.objects.filter(
+            qpr_record=models.OuterRef('pk'),
+            hod=models.OuterRef('user'),
+            request_type='qpr',
+            status='approved',
+        )
+        return self.annotate(edit_approved=models.Exists(approved))
 
 
 class QPRRecord(models.Model):
@@ -69,14 +118,40 @@ class QPRRecord(models.Model):
     phone = models.CharField(max_length=20, blank=True, null=True)
     email = models.EmailField(blank=True, null=True)
     is_submitted = models.BooleanField(default=False)  # To freeze after submission
+    # Bumped on every header save and by the section save signals; keys the serialized-record cache
+    version = models.PositiveIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = QPRRecordQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.officeName} - {self.quarter}"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        # Incremented in the database: concurrent saves of a record never write the same version
+        self.version = models.F('version') + 1
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super().save(*args, **kwargs)
+        if isinstance(self.version, models.expressions.Combinable):
+            self.refresh_from_db(fields=['version'])
+
+    def bump_version(self):
+        """Move the record to a new version without saving its header, e.g. after section edits"""
+        QPRRecord.objects.filter(pk=self.pk).update(version=models.F('version') + 1, updated_at=timezone.now())
+        self.refresh_from_db(fields=['version', 'updated_at'])
+
     class Meta:
         ordering = ['-id']
+        indexes = [
+            # Partial index: boolean filters render as a bare column test on SQLite
+            models.Index(fields=['user'], condition=models.Q(is_submitted=True), name='qpr_user_submitted_idx'),
+            models.Index(fields=['user', 'status'], name='qpr_user_status_idx'),
+            models.Index(fields=['quarter', 'year'], name='qpr_quarter_year_idx'),
+        ]
 
 
 class Section1FilesData(models.Model):
@@ -232,4 +307,87 @@ class Section11SpecificAchievementsData(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"Section 11 - {self.qpr_record}"
\ No newline at end of file
+        return f"Section 11 - {self.qpr_record}"
+
+class HODSubmissionRollup(models.Model):
+    """
+    Materialized completion counts per HOD group and quarter.
+    Kept up to date by the signals in signals.py; rebuild with
+    `manage.py rebuild_hod_rollup`. The row with quarter and year set to
+    ALL_PERIODS covers every quarter and backs the dashboards.
+    """
+    ALL_PERIODS = '*'
+
+    hod_name = models.CharField(max_length=50)  # Lower-cased UserProfile.hod_name
+    quarter = models.CharField(max_length=50)
+    year = models.CharField(max_length=20)
+    total_users = models.IntegerField(default=0)
+    profiles_complete = models.IntegerField(default=0)
+    drafts = models.IntegerField(default=0)  # Users with only draft QPRs in the period
+    submitted = models.IntegerField(default=0)  # Users with a submitted QPR in the period
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.hod_name} - {self.quarter} {self.year}"
+
+    class Meta:
+        ordering = ['hod_name', 'year', 'quarter']
+        constraints = [
+            models.UniqueConstraint(fields=['hod_name', 'quarter', 'year'], name='unique_hod_rollup_period'),
+        ]
+
+
+class HODGroupVersion(models.Model):
+    """
+    Version of the cached page fragments of one HOD group. The signals bump
+    it whenever a profile, user, QPR record or manager request of the group
+    changes; the fragment cache keys include it, so a bump retires the old
+    fragments in every process at once. See fragment_cache.py.
+    """
+    ALL_GROUPS = '*'  # Bumped by bulk changes that bypass the signals
+    HOD_DIRECTORY = '#directory'  # Bumped when the cached HOD directory changes, see hod_directory.py
+
+    hod_name = models.CharField(max_length=50, unique=True)  # Lower-cased UserProfile.hod_name, '' for none
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.hod_name or '(no HOD)'} v{self.version}"
+
+
+class Job(models.Model):
+    """
+    Background job for a long admin operation (export, import, HOD rename),
+    run by `manage.py run_worker`. The web request only queues it and the
+    admin pages poll its progress. See jobs.py.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=30)  # Key of jobs.JOB_HANDLERS
+    params = models.JSONField(default=dict)  # Keyword arguments of the handler
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='jobs', null=True, blank=True)
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(null=True, blank=True)  # None while unknown
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    result_file = models.CharField(max_length=255, blank=True)  # Name in QPR_JOB_FILES_DIR
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)  # host:pid of the worker running it
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Also the heartbeat of a running job
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'id'], name='job_status_idx'),
+        ]
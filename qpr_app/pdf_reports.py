@@ -0,0 +1,376 @@
+"""
+Server-side PDF rendering of QPR reports, with a disk cache.
+
+render_record_pdf() lays out one record like the report detail page: the
+office details, then the eleven sections with their Hindi and English
+labels. Submitted records are frozen (editing one needs an approved request,
+and saving bumps its version), so their PDF is rendered once and kept in
+QPR_PDF_CACHE_DIR as qpr-<id>-v<version>.pdf; a new version replaces the old
+file. Drafts change all the time and are rendered on every request.
+
+build_quarter_archive() zips the PDFs of every submitted record of a
+quarter. The PDFs not cached yet are rendered first. `manage.py
+render_quarter_pdfs` spreads them in batches over a pool of processes, one
+per core: rendering is pure Python and CPU-bound, so threads would not run
+it in parallel. The admin export queues the `quarter_pdfs` job instead,
+which renders serially in its worker process; run_worker's own pool runs
+several jobs side by side.
+
+The Hindi text needs a Devanagari TrueType font (QPR_PDF_FONT and
+QPR_PDF_FONT_BOLD, e.g. Noto Sans Devanagari from the fonts-noto-core
+package); ReportLab shapes the conjuncts and vowel signs with uharfbuzz.
+Without the font the PDFs use Helvetica and English labels only.
+"""
+import glob
+import logging
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import cache
+from multiprocessing import get_context
+from xml.sax.saxutils import escape
+
+import django
+from django.conf import settings
+from django.db import connections
+from django.utils.text import get_valid_filename
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from .models import QPRRecord
+from .sections import FORM_KEYS, export_values
+
+logger = logging.getLogger(__name__)
+
+# Records rendered per task of the process pool
+PDF_BATCH_SIZE = 25
+
+TITLE = ('तिमाही प्रगति रिपोर्ट', 'Quarterly Progress Report')
+
+# (form key, Hindi label, English label) rows, or (Hindi, English) subheadings,
+# of every section; the labels are those of the report detail page
+PDF_SECTIONS = (
+    ('1', 'माननीय मंत्री जी को भेजी गयी फाइलों का ब्यौरा', 'Details Of Files Sent To The Minister', (
+        ('s1_total', 'तिमाही में मंत्री जी को कितनी फाइल भेजी गयीं', 'Total No. Files Sent To The Minister During Quarter'),
+        ('s1_hindi', 'इनमें से कितनी फाइलें हिंदी में भेजी गयीं', 'Out of these, no.of files sent to in Hindi'),
+    )),
+    ('2', 'सचिव/समकक्ष स्तर पर बैठकों/फाइलों का ब्यौरा', 'Details of meetings/files at Secretary/Equivalent level', (
+        ('s2_meetings', 'सचिव/समकक्ष स्तर पर कितनी बैठकें आयोजित की गयीं', 'How many meetings were held at Secretary/equivalent'),
+        ('s2_minutes', 'कार्यवाही हिंदी में की गयी/कार्यवृत्त हिंदी में जारी किये गए', 'Meetings were conducted in Hindi/Minutes were published in Hindi'),
+        ('s2_papers_total', 'सचिव/समकक्ष स्तर से सीधे जारी किये गए कुल कागजात', 'Total papers issued directly from Secretary/equivalent'),
+        ('s2_papers_hindi', 'हिंदी में जारी किये गए कुल कागजात', 'Total documents issued in Hindi'),
+    )),
+    ('3', 'राजभाषा अधिनियम 1963 की धारा 3(3) के अंतर्गत जारी कागजात', 'Documents issued under Section 3(3) of the Official Languages Act, 1963', (
+        ('s3_total', 'जारी कागजात की कुल संख्या', 'Total no. of documents issued'),
+        ('s3_bilingual', 'द्विभाषी रूप में जारी कागजात की संख्या', 'Total No. of documents issued bilingually'),
+        ('s3_english', 'इनमें से केवल अंग्रेजी में जारी किये गए कागजात', 'No. of documents issued only in English'),
+        ('s3_hindi_only', 'केवल हिन्दी में जारी किए गए कागजात', 'No. of documents issued only in Hindi'),
+    )),
+    ('4', 'हिंदी में प्राप्त पत्र (राजभाषा नियम - 5)', 'Letters received in Hindi (Official Language Rule- 5)', (
+        ('s4_total', 'हिंदी में प्राप्त कुल पत्रों की संख्या', 'Total no.of letters received in Hindi'),
+        ('s4_no_reply', 'इनमें से कितनों के उत्तर दिए जाने अपेक्षित नहीं थे', 'No. of letters not to be replied to'),
+        ('s4_replied_hindi', 'इनमें से कितनों के उत्तर हिंदी/द्विभाषी में दिए गए', 'Out of these, no.of letters replied to in Hindi'),
+        ('s4_replied_eng', 'इनमें से कितनों के उत्तर अंग्रेजी में दिए गए', 'Total no.of letters replied in English'),
+    )),
+    ('5', 'अंग्रेजी में प्राप्त पत्रों के उत्तर हिंदी में दिए जाने/ क,ख क्षेत्र के लिये', 'No.of letters received in English but replied in Hindi/For A and B Region', (
+        ("'क' क्षेत्र से", "From Region 'A'"),
+        ('s5_total', 'अंग्रेजी में प्राप्त पत्रों की संख्या', 'No.of letters received in English'),
+        ('s5_hindi', 'इनमें से कितनों के उत्तर हिंदी में दिए गए', 'No.of letters replied in Hindi'),
+        ('s5_english', 'इनमें से कितनों के उत्तर अंग्रेजी में दिए गए', 'How Many letters replied against these in English'),
+        ('s5_noreply', 'इनमें से कितनों के उत्तर अपेक्षित नहीं थे', 'No. of letters not expected to be replied'),
+    )),
+    ('6', 'भेजे गये मूल पत्रों का ब्यौरा', 'Details of total letters issued', tuple(
+        row
+        for region, hindi_region, english_region in (('a', 'क', 'A'), ('b', 'ख', 'B'), ('c', 'ग', 'C'))
+        for row in (
+            (f"'{hindi_region}' क्षेत्र को", f"To Region '{english_region}'"),
+            (f's6_{region}_hindi', 'हिंदी/द्विभाषी में', 'Issued in Hindi/Bilingual'),
+            (f's6_{region}_eng', 'केवल अंग्रेजी में', 'Issued in English only'),
+            (f's6_{region}_total', 'भेजे गए पत्रों की कुल संख्या', 'Total no.of letters issued'),
+        )
+    )),
+    ('7', '(तिमाही के दौरान) फाइलों/दस्तावेजों पर लिखी गई टिप्पणियों का ब्यौरा', '(During quarter) Details of Notings on files/documents', (
+        ('s7_hindi', 'हिन्दी में लिखी गई टिप्पणियों के पृष्ठों की संख्या', 'No. of pages with Notings in Hindi'),
+        ('s7_eng', 'अंग्रेजी में लिखी गई टिप्पणियों के पृष्ठों की संख्या', 'No. of pages with Notings in English'),
+        ('s7_total', 'कुल टिप्पणियों के पृष्ठों की संख्या', 'No. of pages of total Notings'),
+        ('s7_eoffice', 'ई ऑफिस के माध्यम से भेजी गयी टिप्पणियों का ब्यौरा', 'Details of comments sent through e-office'),
+    )),
+    ('8', 'तिमाही में आयोजित हिंदी कार्यशालाएं', 'Hindi Workshops in this Quarter', (
+        ('s8_workshops', 'तिमाही के दौरान पूर्ण दिवसीय आयोजित कार्यशालाओं की संख्या', 'No. of full day workshops conducted during the quarter'),
+        ('s8_officers', 'प्रशिक्षित अधिकारियों की संख्या', 'No. of Officers trained'),
+        ('s8_employees', 'प्रशिक्षित कर्मचारियों की संख्या', 'No. of employees trained'),
+    )),
+    ('9', 'विभागीय/संगठनीय राजभाषा कार्यान्वयन समिति की बैठक', 'Meeting of the Departmental/Organizational Official Language Implementation Committee', (
+        ('s9_date', 'राजभाषा कार्यान्वयन समिति की बैठक की तिथि', 'Date of the meeting of Official Language Implementation Committee'),
+        ('s9_sub_committees', 'अधीनस्थ कार्यालयों में गठित राजभाषा कार्यान्वयन समितियों की संख्या', 'No. Of Official Language Implementation Committee constituted in subordinate offices'),
+        ('s9_meetings_count', 'इस तिमाही में आयोजित बैठकों की संख्या', 'No. of Meetings organized in this quarter'),
+        ('s9_agenda_hindi', 'बैठकों से सम्बंधित कार्यसूची और कार्यवृत्त क्या हिंदी में जारी किए गए?', 'Whether the agenda or the minutes of the meeting were issued in Hindi ?'),
+    )),
+    ('10', 'हिंदी सलाहकार समिति की बैठक के आयोजन की तिथि', 'Date of the Meeting of the Hindi Advisory Committee', (
+        ('s10_date', 'तिथि', 'Date'),
+    )),
+    ('11', 'तिमाही के दौरान विशिष्ट उपलब्धियां (अधिकतम सीमा- 500 अक्षर)', 'Specific achievements during quarter', (
+        ('s12_1', '1. नवनमेषी कार्य', 'Innovative Work'),
+        ('s12_2', '2. विशिष्ट आयोजन/उल्लेखनीय कार्य', 'Special Event/Notable Work'),
+        ('s12_3', '3. हिंदी माध्यम में किए गए अन्य कार्य', 'Other works done in Hindi medium'),
+    )),
+)
+
+# Free text shown below its label across the page instead of beside it
+LONG_TEXT_KEYS = {'s12_1', 's12_2', 's12_3'}
+
+_PAGE_MARGIN = 15 * mm
+_VALUE_WIDTH = 38 * mm
+_GRID_COLOR = colors.HexColor('#6e7b85')
+_HEADING_BACKGROUND = colors.HexColor('#e9eef3')
+
+
+@cache
+def pdf_fonts():
+    """
+    (regular, bold, bilingual) for the PDFs: the configured Devanagari fonts,
+    registered with ReportLab once per process, or Helvetica without Hindi
+    """
+    regular, bold = settings.QPR_PDF_FONT, settings.QPR_PDF_FONT_BOLD
+    if not regular or not os.path.exists(regular):
+        logger.warning('Devanagari font %r not found (QPR_PDF_FONT); PDFs are rendered in English only', regular)
+        return 'Helvetica', 'Helvetica-Bold', False
+    pdfmetrics.registerFont(TTFont('QPR', regular))
+    if bold and os.path.exists(bold):
+        pdfmetrics.registerFont(TTFont('QPR-Bold', bold))
+        return 'QPR', 'QPR-Bold', True
+    return 'QPR', 'QPR', True
+
+
+def _styles(font, bold, shaping):
+    common = {'fontName': font, 'shaping': int(shaping)}
+    return {
+        'title': ParagraphStyle('title', **dict(common, fontName=bold), fontSize=14, leading=19, alignment=TA_CENTER, spaceAfter=2),
+        'subtitle': ParagraphStyle('subtitle', **common, fontSize=9, leading=12, alignment=TA_CENTER, spaceAfter=8),
+        'section': ParagraphStyle('section', **dict(common, fontName=bold), fontSize=10, leading=14, spaceBefore=8, spaceAfter=4),
+        'heading': ParagraphStyle('heading', **dict(common, fontName=bold), fontSize=8.5, leading=12, alignment=TA_CENTER),
+        'label': ParagraphStyle('label', **common, fontSize=8.5, leading=12),
+        'value': ParagraphStyle('value', **common, fontSize=9, leading=12),
+    }
+
+
+def pdf_queryset():
+    """Records with everything render_record_pdf() reads, in one query per record"""
+    return QPRRecord.objects.with_sections().select_related('user__profile')
+
+
+def render_record_pdf(record, output):
+    """Write the PDF of one record (see pdf_queryset()) to output, a path or binary file"""
+    font, bold, bilingual = pdf_fonts()
+    # Devanagari needs its conjuncts and vowel signs shaped (by uharfbuzz)
+    styles = _styles(font, bold, shaping=bilingual)
+    values = dict(zip(FORM_KEYS, export_values(record)))
+    profile = getattr(record.user, 'profile', None) if record.user_id else None
+
+    def text(value, style='value'):
+        value = '-' if value in ('', None) else str(value)
+        return Paragraph(escape(value).replace('\n', '<br/>'), styles[style])
+
+    def label(hindi, english, style='label'):
+        markup = f'{escape(hindi)}<br/>({escape(english)})' if bilingual else escape(english)
+        return Paragraph(markup, styles[style])
+
+    def table(rows, spans=(), headings=()):
+        width = A4[0] - 2 * _PAGE_MARGIN
+        commands = [
+            ('GRID', (0, 0), (-1, -1), 0.5, _GRID_COLOR),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]
+        for row in spans:
+            commands.append(('SPAN', (0, row), (-1, row)))
+        for row in headings:
+            commands.append(('BACKGROUND', (0, row), (-1, row), _HEADING_BACKGROUND))
+        return Table(rows, colWidths=[width - _VALUE_WIDTH, _VALUE_WIDTH], style=TableStyle(commands))
+
+    story = [
+        label(*TITLE, style='title') if bilingual else Paragraph(TITLE[1], styles['title']),
+        Paragraph(escape(f'{record.officeName} — {record.quarter} {record.year or ""}'), styles['subtitle']),
+    ]
+    general = [
+        (('समाप्त तिमाही', 'Quarter Ending'), record.quarter),
+        (('वित्तीय वर्ष', 'Financial Year'), record.year),
+        (('कार्यालय का नाम', 'Name of Office'), record.officeName),
+        (('कार्यालय कोड', 'Office Code'), record.officeCode),
+        (('फोन न.', 'Phone No.'), record.phone),
+        (('भाषा क्षेत्र', 'Language Region'), record.region),
+        (('ई-मेल', 'Email ID'), record.email),
+        (('कर्मचारी कोड', 'Employee Code'), profile.employee_code if profile else ''),
+        (('स्थिति', 'Status'), 'Submitted' if record.is_submitted else record.status),
+    ]
+    story.append(table([[label(*labels), text(value)] for labels, value in general]))
+
+    for number, hindi, english, rows in PDF_SECTIONS:
+        story.append(label(f'{number}. {hindi}', english, style='section') if bilingual
+                     else Paragraph(escape(f'{number}. {english}'), styles['section']))
+        cells, spans, headings = [], [], []
+        for row in rows:
+            if len(row) == 2:
+                spans.append(len(cells))
+                headings.append(len(cells))
+                cells.append([label(*row, style='heading'), ''])
+            elif row[0] in LONG_TEXT_KEYS:
+                spans.extend((len(cells), len(cells) + 1))
+                headings.append(len(cells))
+                cells.append([label(row[1], row[2], style='heading'), ''])
+                cells.append([text(values[row[0]]), ''])
+            else:
+                cells.append([label(row[1], row[2]), text(values[row[0]])])
+        story.append(table(cells, spans, headings))
+    story.append(Spacer(1, 4 * mm))
+
+    footer = f'QPR {record.officeCode} · {record.quarter} {record.year or ""} · v{record.version}'
+
+    def draw_footer(canvas, doc):
+        canvas.saveState()
+        canvas.setFont(font, 7.5)
+        canvas.setFillColor(colors.grey)
+        canvas.drawString(_PAGE_MARGIN, 8 * mm, footer, shaping=bilingual)
+        canvas.drawRightString(A4[0] - _PAGE_MARGIN, 8 * mm, f'{doc.page}')
+        canvas.restoreState()
+
+    document = SimpleDocTemplate(
+        output, pagesize=A4,
+        leftMargin=_PAGE_MARGIN, rightMargin=_PAGE_MARGIN, topMargin=_PAGE_MARGIN, bottomMargin=_PAGE_MARGIN,
+        title=f'QPR {record.officeName} {record.quarter} {record.year or ""}'.strip(),
+        author=record.officeName,
+    )
+    document.build(story, onFirstPage=draw_footer, onLaterPages=draw_footer)
+
+
+def pdf_cache_path(record):
+    """Where the PDF of this version of a submitted record is kept"""
+    return os.path.join(settings.QPR_PDF_CACHE_DIR, f'qpr-{record.pk}-v{record.version}.pdf')
+
+
+def cached_record_pdf(record):
+    """
+    Path of the cached PDF of a submitted record, rendering it first when this
+    version has none yet. The file is written under a temporary name and
+    renamed, so concurrent renders never expose a partial PDF.
+    """
+    path = pdf_cache_path(record)
+    if os.path.exists(path):
+        return path
+    os.makedirs(settings.QPR_PDF_CACHE_DIR, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=settings.QPR_PDF_CACHE_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            render_record_pdf(record, handle)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+    # Earlier versions of the record are never served again
+    for old in glob.glob(os.path.join(settings.QPR_PDF_CACHE_DIR, f'qpr-{record.pk}-v*.pdf')):
+        if old != path:
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass
+    return path
+
+
+def record_pdf(record):
+    """The PDF of a record as an open binary file: cached if it is submitted, rendered now if not"""
+    if record.is_submitted:
+        return open(cached_record_pdf(record), 'rb')
+    output = tempfile.TemporaryFile()
+    render_record_pdf(record, output)
+    output.seek(0)
+    return output
+
+
+def pdf_file_name(record):
+    """File name of a record's PDF in downloads and archives"""
+    profile = getattr(record.user, 'profile', None) if record.user_id else None
+    parts = [record.officeCode or 'qpr', profile.employee_code if profile else '', str(record.pk)]
+    return get_valid_filename('_'.join(part for part in parts if part) + '.pdf')
+
+
+def _render_batch(record_ids):
+    """Make sure the submitted records have a cached PDF; returns how many were checked"""
+    for record in pdf_queryset().filter(pk__in=record_ids, is_submitted=True):
+        cached_record_pdf(record)
+    return len(record_ids)
+
+
+def _render_batch_in_process(record_ids):
+    try:
+        return _render_batch(record_ids)
+    finally:
+        connections.close_all()
+
+
+def render_missing_pdfs(records, processes=None, progress=None):
+    """
+    Render the cached PDFs that the submitted `records` lack, in batches of
+    at most PDF_BATCH_SIZE over `processes` spawned processes (one per core
+    by default; 1 renders in this process, as jobs do). progress(done,
+    total) is called as batches finish.
+    """
+    missing = [record.pk for record in records if not os.path.exists(pdf_cache_path(record))]
+    total = len(records)
+    done = total - len(missing)
+    if progress:
+        progress(done, total)
+    processes = processes or os.cpu_count()
+    # Small enough batches that every process gets some
+    size = max(min(PDF_BATCH_SIZE, -(-len(missing) // processes)), 1)
+    batches = [missing[i:i + size] for i in range(0, len(missing), size)]
+    processes = min(processes, len(batches))
+    if processes <= 1:
+        for batch in batches:
+            done += _render_batch(batch)
+            if progress:
+                progress(done, total)
+        return
+
+    with ProcessPoolExecutor(processes, mp_context=get_context('spawn'), initializer=django.setup) as pool:
+        for future in as_completed([pool.submit(_render_batch_in_process, batch) for batch in batches]):
+            done += future.result()
+            if progress:
+                progress(done, total)
+
+
+def quarter_records(quarter, year=''):
+    """The submitted records of a quarter (and year), as the archive lists them"""
+    records = QPRRecord.objects.filter(is_submitted=True, quarter=quarter)
+    if year:
+        records = records.filter(year=year)
+    return records.select_related('user__profile').order_by('officeCode', 'id')
+
+
+def build_quarter_archive(output, quarter, year='', processes=None, progress=None):
+    """
+    Write a ZIP of the PDFs of every submitted record of the quarter (and
+    year) to output, a path or binary file, rendering the uncached ones
+    first over `processes` processes (see render_missing_pdfs). Returns the
+    number of PDFs.
+    """
+    records = list(quarter_records(quarter, year))
+    render_missing_pdfs(records, processes, progress)
+    # PDFs are already compressed: store them as they are
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_STORED) as archive:
+        for record in records:
+            path = pdf_cache_path(record)
+            if os.path.exists(path):
+                archive.write(path, arcname=pdf_file_name(record))
+                continue
+            # Changed since it was listed: archive what it is now
+            record = pdf_queryset().filter(pk=record.pk).first()
+            if record is not None:
+                with record_pdf(record) as handle:
+                    archive.writestr(pdf_file_name(record), handle.read())
+    return len(records)
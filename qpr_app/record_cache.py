@@ -0,0 +1,65 @@
+"""
+Cache of serialized QPR records, stored in the 'records' cache alias.
+
+Entries are keyed by record id and version. QPRRecord.save() and the section
+save signals bump the version, so an edited record is looked up under a new
+key and its old entries are left for the backend to evict. Submitted records
+are frozen and keep their entry until then.
+"""
+from django.core.cache import caches
+
+from .models import QPRRecord
+
+RECORD_CACHE_ALIAS = 'records'
+
+
+def record_cache_key(record):
+    """Cache key of one record version"""
+    return f'qpr-record:{record.pk}:{record.version}'
+
+
+def cached_serialized_records(records, serialize):
+    """
+    Return {record id: serialize(record)} for the given record headers.
+
+    The headers do not need their sections loaded: all hits come from one
+    get_many, and the misses are loaded with_sections() in one query,
+    serialized and stored with set_many. Records deleted in the meantime
+    are left out. Callers get their own copies and may add per-request keys.
+    """
+    cache = caches[RECORD_CACHE_ALIAS]
+    keys = {record.pk: record_cache_key(record) for record in records}
+    cached = cache.get_many(keys.values())
+    results = {pk: cached[key] for pk, key in keys.items() if key in cached}
+
+    missing = [pk for pk in keys if pk not in results]
+    if missing:
+        fresh = {}
+        for record in QPRRecord.objects.with_sections().in_bulk(missing).values():
+            data = serialize(record)
+            # Keyed by the version just loaded, which may be newer than the header's
+            fresh[record_cache_key(record)] = data
+            results[record.pk] = data
+        cache.set_many(fresh)
+    return results
+
+
+async def acached_serialized_records(records, serialize):
+    """
+    Async cached_serialized_records(): the same lookups through the async
+    cache API and async ORM, for the ASGI API views.
+    """
+    cache = caches[RECORD_CACHE_ALIAS]
+    keys = {record.pk: record_cache_key(record) for record in records}
+    cached = await cache.aget_many(keys.values())
+    results = {pk: cached[key] for pk, key in keys.items() if key in cached}
+
+    missing = [pk for pk in keys if pk not in results]
+    if missing:
+        fresh = {}
+        async for record in QPRRecord.objects.with_sections().filter(pk__in=missing):
+            data = serialize(record)
+            fresh[record_cache_key(record)] = data
+            results[record.pk] = data
+        await cache.aset_many(fresh)
+    return results
@@ -0,0 +1,153 @@
+"""
+Maintenance of the HODSubmissionRollup table.
+
+Groups are keyed by the lower-cased hod_name of role='user' profiles, the
+same case-insensitive grouping the admin dashboard uses. Rows are
+recomputed from UserProfile and QPRRecord, so refreshing after any change
+(or twice) is safe. A record save only recomputes the all-period row and the
+periods the record was and is in, and the signals skip saves that change
+nothing the counts depend on.
+
+Refreshed rows are upserted (INSERT ... ON CONFLICT DO UPDATE), and a refresh
+first locks the all-period rows of its groups. Concurrent saves in one group
+therefore neither collide on the unique constraint nor write counts computed
+before the other save committed.
+"""
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, Q, Value
+from django.db.models.functions import Coalesce, Lower
+
+from .models import HODSubmissionRollup, QPRRecord, UserProfile
+
+ALL_PERIODS = HODSubmissionRollup.ALL_PERIODS
+
+
+def _group_counts(queryset, *period_fields):
+    """Distinct users with any / a submitted QPR, grouped by hod_key and period"""
+    return queryset.order_by().values('hod_key', *period_fields).annotate(
+        active=Count('user', distinct=True),
+        submitted=Count('user', distinct=True, filter=Q(status='Submitted')),
+    )
+
+
+def _hod_names_q(field, hod_names):
+    """Q matching field against the lower-cased hod_names"""
+    return reduce(or_, (Q(**{field: Lower(Value(name))}) for name in hod_names))
+
+
+def _periods_q(periods, quarter_field='quarter', year_field='year'):
+    """Q matching any of the (quarter, year) periods"""
+    return reduce(or_, (Q(**{quarter_field: quarter, year_field: year}) for quarter, year in periods))
+
+
+def _rollup_rows(hod_filter, periods=None):
+    """
+    Build unsaved rollup rows for the HOD groups matched by hod_filter (a Q on
+    hod_key): the all-period row and, with periods ((quarter, year) pairs),
+    only the rows of those periods
+    """
+    users = UserProfile.objects.filter(
+        role='user', hod_name__isnull=False
+    ).annotate(hod_key=Lower('hod_name')).filter(hod_filter)
+    totals = {
+        row['hod_key']: row
+        for row in users.order_by().values('hod_key').annotate(
+            total_users=Count('id'),
+            profiles_complete=Count('id', filter=Q(profile_updated=True)),
+        )
+    }
+
+    records = QPRRecord.objects.filter(
+        user__profile__role='user', user__profile__hod_name__isnull=False
+    ).annotate(
+        hod_key=Lower('user__profile__hod_name'),
+        period_year=Coalesce('year', Value('')),
+    ).filter(hod_filter)
+    all_time = {row['hod_key']: row for row in _group_counts(records)}
+
+    rows = []
+    for hod_key, total in totals.items():
+        counts = all_time.get(hod_key, {'active': 0, 'submitted': 0})
+        rows.append(HODSubmissionRollup(
+            hod_name=hod_key,
+            quarter=ALL_PERIODS,
+            year=ALL_PERIODS,
+            total_users=total['total_users'],
+            profiles_complete=total['profiles_complete'],
+            drafts=counts['active'] - counts['submitted'],
+            submitted=counts['submitted'],
+        ))
+
+    if periods is not None:
+        records = records.filter(_periods_q(periods, 'quarter', 'period_year'))
+    for counts in _group_counts(records, 'quarter', 'period_year'):
+        total = totals[counts['hod_key']]
+        rows.append(HODSubmissionRollup(
+            hod_name=counts['hod_key'],
+            quarter=counts['quarter'],
+            year=counts['period_year'],
+            total_users=total['total_users'],
+            profiles_complete=total['profiles_complete'],
+            drafts=counts['active'] - counts['submitted'],
+            submitted=counts['submitted'],
+        ))
+    return rows
+
+
+def refresh_hod_rollup(hod_names, periods=None):
+    """
+    Recompute the rollup rows of the given hod_name groups (case-insensitive):
+    all of them, or with periods ((quarter, year) pairs) the all-period row
+    and the rows of those periods. Rows of a period left without records are
+    deleted.
+    """
+    hod_names = {name for name in hod_names if name is not None}
+    if not hod_names:
+        return
+    periods = None if periods is None else {(quarter, year or '') for quarter, year in periods}
+
+    with transaction.atomic():
+        group_rows = HODSubmissionRollup.objects.filter(_hod_names_q('hod_name', hod_names))
+        # Serialise refreshes of these groups (no-op on SQLite, whose writers are serialised already)
+        list(group_rows.filter(quarter=ALL_PERIODS, year=ALL_PERIODS).select_for_update().values_list('pk'))
+
+        rows = _rollup_rows(_hod_names_q('hod_key', hod_names), periods)
+        HODSubmissionRollup.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['hod_name', 'quarter', 'year'],
+            update_fields=['total_users', 'profiles_complete', 'drafts', 'submitted', 'updated_at'],
+        )
+        if periods is not None:
+            group_rows = group_rows.filter(Q(quarter=ALL_PERIODS, year=ALL_PERIODS) | _periods_q(periods))
+        group_rows.exclude(
+            reduce(or_, (Q(hod_name=row.hod_name, quarter=row.quarter, year=row.year) for row in rows), Q(pk__in=[]))
+        ).delete()
+
+
+def rebuild_hod_rollup():
+    """Recompute the whole rollup table from scratch; returns the number of rows"""
+    with transaction.atomic():
+        HODSubmissionRollup.objects.all().delete()
+        rows = HODSubmissionRollup.objects.bulk_create(_rollup_rows(Q()))
+    return len(rows)
+
+
+def hod_rollup_totals():
+    """All-period rollup rows keyed by lower-cased hod_name"""
+    return {
+        row.hod_name: row
+        for row in HODSubmissionRollup.objects.filter(quarter=ALL_PERIODS, year=ALL_PERIODS)
+    }
+
+
+def hod_rollup_for(hod_name):
+    """All-period rollup row of one hod_name group, or None if it has no users"""
+    if hod_name is None:
+        return None
+    return HODSubmissionRollup.objects.filter(
+        hod_name=Lower(Value(hod_name)), quarter=ALL_PERIODS, year=ALL_PERIODS
+    ).first()
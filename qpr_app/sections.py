@@ -0,0 +1,234 @@
+"""
+Declarative map between the QPR form keys (s1_total, s6_b_eng, s12_1 ...)
+and the eleven section models.
+
+Serialization, deserialization, validation and diffing of section data are
+all generated from SECTION_SCHEMA, so the two directions cannot drift apart.
+"""
+from datetime import datetime
+from operator import attrgetter
+
+from .models import (
+    Section1FilesData, Section2MeetingsData,
+    Section3OfficialLanguagesData, Section4HindiLettersData,
+    Section5EnglishRepliedHindiData, Section6IssuedLettersData,
+    Section7NotingsData, Section8WorkshopsData,
+    Section9ImplementationCommitteeData, Section10HindiAdvisoryData,
+    Section11SpecificAchievementsData,
+)
+
+
+# Field kinds
+INT = 'int'
+DATE = 'date'
+TEXT = 'text'
+
+
+def _convert_to_int(value):
+    """Convert value to integer, handling empty strings and None"""
+    if value == '' or value is None:
+        return None
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _convert_to_date(value):
+    """Convert value to date, handling empty strings and None"""
+    if value == '' or value is None:
+        return None
+    try:
+        # Handle ISO format dates
+        if isinstance(value, str):
+            return datetime.fromisoformat(value).date()
+        return value
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+# related_name, model, ((form key, model field, kind), ...) for every section
+SECTION_SCHEMA = (
+    ('section1', Section1FilesData, (
+        ('s1_total', 'total_files', INT),
+        ('s1_hindi', 'hindi_files', INT),
+    )),
+    ('section2', Section2MeetingsData, (
+        ('s2_meetings', 'meetings_count', INT),
+        ('s2_minutes', 'hindi_minutes', INT),
+        ('s2_papers_total', 'total_papers', INT),
+        ('s2_papers_hindi', 'hindi_papers', INT),
+    )),
+    ('section3', Section3OfficialLanguagesData, (
+        ('s3_total', 'total_documents', INT),
+        ('s3_bilingual', 'bilingual_documents', INT),
+        ('s3_english', 'english_only_documents', INT),
+        ('s3_hindi_only', 'hindi_only_documents', INT),
+    )),
+    ('section4', Section4HindiLettersData, (
+        ('s4_total', 'total_letters', INT),
+        ('s4_no_reply', 'no_reply_letters', INT),
+        ('s4_replied_hindi', 'replied_hindi_letters', INT),
+        ('s4_replied_eng', 'replied_english_letters', INT),
+    )),
+    ('section5', Section5EnglishRepliedHindiData, (
+        ('s5_total', 'region_a_english_letters', INT),
+        ('s5_hindi', 'region_a_replied_hindi', INT),
+        ('s5_english', 'region_a_replied_english', INT),
+        ('s5_noreply', 'region_a_no_reply', INT),
+    )),
+    ('section6', Section6IssuedLettersData, (
+        ('s6_a_hindi', 'region_a_hindi_bilingual', INT),
+        ('s6_a_eng', 'region_a_english_only', INT),
+        ('s6_a_total', 'region_a_total', INT),
+        ('s6_b_hindi', 'region_b_hindi_bilingual', INT),
+        ('s6_b_eng', 'region_b_english_only', INT),
+        ('s6_b_total', 'region_b_total', INT),
+        ('s6_c_hindi', 'region_c_hindi_bilingual', INT),
+        ('s6_c_eng', 'region_c_english_only', INT),
+        ('s6_c_total', 'region_c_total', INT),
+    )),
+    # Section 7 (Notings)
+    ('section7', Section7NotingsData, (
+        ('s7_hindi', 'hindi_pages', INT),
+        ('s7_eng', 'english_pages', INT),
+        ('s7_total', 'total_pages', INT),
+        ('s7_eoffice', 'eoffice_notings', INT),
+    )),
+    # Section 8 (Workshops)
+    ('section8', Section8WorkshopsData, (
+        ('s8_workshops', 'full_day_workshops', INT),
+        ('s8_officers', 'officers_trained', INT),
+        ('s8_employees', 'employees_trained', INT),
+    )),
+    # Section 9 (Implementation Committee)
+    ('section9', Section9ImplementationCommitteeData, (
+        ('s9_date', 'meeting_date', DATE),
+        ('s9_sub_committees', 'sub_committees_count', INT),
+        ('s9_meetings_count', 'meetings_organized', INT),
+        ('s9_agenda_hindi', 'agenda_hindi', TEXT),
+    )),
+    # Section 10 (Hindi Advisory)
+    ('section10', Section10HindiAdvisoryData, (
+        ('s10_date', 'meeting_date', DATE),
+    )),
+    # Section 11 (Achievements) - the form numbers these as 12.x
+    ('section11', Section11SpecificAchievementsData, (
+        ('s12_1', 'innovative_work', TEXT),
+        ('s12_2', 'special_events', TEXT),
+        ('s12_3', 'hindi_medium_works', TEXT),
+    )),
+)
+
+
+# Form value -> model value
+_FROM_FORM = {
+    INT: lambda details, key: _convert_to_int(details.get(key)),
+    DATE: lambda details, key: _convert_to_date(details.get(key)),
+    TEXT: lambda details, key: details.get(key, ''),
+}
+
+# Model value -> form value
+_TO_FORM = {
+    INT: lambda value: value or '',
+    DATE: lambda value: value.isoformat() if value else '',
+    TEXT: lambda value: value or '',
+}
+
+
+def _tuple_getter(fields):
+    """attrgetter that always returns a tuple, even for a single field"""
+    if len(fields) == 1:
+        getter = attrgetter(fields[0])
+        return lambda obj: (getter(obj),)
+    return attrgetter(*fields)
+
+
+# Precompiled per-section accessors:
+# (related_name, model, form keys, model fields, kinds, field getter, form converters)
+_COMPILED_SECTIONS = tuple(
+    (
+        related_name,
+        model,
+        tuple(key for key, _, _ in fields),
+        tuple(field for _, field, _ in fields),
+        tuple(kind for _, _, kind in fields),
+        _tuple_getter(tuple(field for _, field, _ in fields)),
+        tuple(_TO_FORM[kind] for _, _, kind in fields),
+    )
+    for related_name, model, fields in SECTION_SCHEMA
+)
+
+# All form keys in section order, e.g. for export column headers
+FORM_KEYS = tuple(key for section in _COMPILED_SECTIONS for key in section[2])
+
+
+def serialize_sections(record):
+    """
+    Build the frontend 'details' dictionary for a record.
+    Sections that have no row yet are left out.
+    """
+    details = {}
+    for related_name, _, keys, _, _, get_values, to_form in _COMPILED_SECTIONS:
+        section = getattr(record, related_name, None)
+        if section is None:
+            continue
+        values = get_values(section)
+        for i, key in enumerate(keys):
+            details[key] = to_form[i](values[i])
+    return details
+
+
+def export_values(record):
+    """
+    Flat list of raw section values in FORM_KEYS order, for exports.
+    Unlike serialize_sections, zeros are kept and missing sections are blank.
+    """
+    values = []
+    for related_name, _, keys, _, _, get_values, _ in _COMPILED_SECTIONS:
+        section = getattr(record, related_name, None)
+        if section is None:
+            values.extend([''] * len(keys))
+            continue
+        for value in get_values(section):
+            if value is None:
+                value = ''
+            elif hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(value)
+    return values
+
+
+def section_values(details):
+    """
+    Convert the frontend details dictionary into model field values.
+    Returns (related_name, model, values) for each of the eleven sections.
+    """
+    return [
+        (related_name, model, {
+            field: _FROM_FORM[kind](details, key)
+            for key, field, kind in zip(keys, fields, kinds)
+        })
+        for related_name, model, keys, fields, kinds, _, _ in _COMPILED_SECTIONS
+    ]
+
+
+def changed_fields(section, values):
+    """Model fields of a loaded section row whose value differs from values"""
+    return [field for field, value in values.items() if getattr(section, field) != value]
+
+
+def validate_details(details):
+    """
+    Return {form key: error message} for non-empty values that cannot be
+    converted. The save path itself stores such values as empty.
+    """
+    errors = {}
+    for _, _, keys, _, kinds, _, _ in _COMPILED_SECTIONS:
+        for key, kind in zip(keys, kinds):
+            value = details.get(key)
+            if value == '' or value is None or kind == TEXT:
+                continue
+            if _FROM_FORM[kind](details, key) is None:
+                errors[key] = 'Enter a whole number' if kind == INT else 'Enter a date as YYYY-MM-DD'
+    return errors
@@ -1,8 +1,13 @@
 # qpr_app/signals.py
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import UserProfile
+from .models import ManagerRequest, QPRRecord, UserProfile
+from .fragment_cache import bump_group_versions
+from .hod_directory import invalidate_hod_directory
+from .rollups import refresh_hod_rollup
+from .sections import SECTION_SCHEMA
 
 
 @receiver(post_save, sender=User)
@@ -20,3 +25,152 @@ def sync_user_profile(sender, instance, created, **kwargs):
             'profile_updated': False
         }
     )
+
+
+@receiver(post_init, sender=UserProfile)
+def remember_profile_hod_name(sender, instance, **kwargs):
+    """Keep the loaded hod_name and role so a reassignment also refreshes the old group"""
+    instance._loaded_hod_name = instance.hod_name
+    instance._loaded_role = instance.role
+    instance._loaded_rollup_state = _profile_rollup_state(instance)
+
+
+def _profile_rollup_state(profile):
+    """What the HOD rollup counts of a profile"""
+    return (profile.role, profile.hod_name, profile.profile_updated)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_hod_directory_for_profile(sender, instance, signal, created=False, **kwargs):
+    """Drop the cached HOD directory when a profile joins, leaves or changes group"""
+    if kwargs.get('raw'):
+        return
+    if (created or signal is post_delete or instance.role != instance._loaded_role
+            or instance.hod_name != instance._loaded_hod_name):
+        invalidate_hod_directory()
+    instance._loaded_role = instance.role
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def bump_fragment_version_for_profile(sender, instance, **kwargs):
+    """A profile changed: retire the page fragments of its old and new group"""
+    if kwargs.get('raw'):
+        return
+    bump_group_versions([instance._loaded_hod_name, instance.hod_name])
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def refresh_rollup_for_profile(sender, instance, signal, created=False, **kwargs):
+    """Recompute the HOD rollup of the profile's old and new group when its counts may have changed"""
+    if kwargs.get('raw'):
+        return
+    state = _profile_rollup_state(instance)
+    if created or signal is post_delete or state != instance._loaded_rollup_state:
+        refresh_hod_rollup([instance._loaded_hod_name, instance.hod_name])
+    instance._loaded_hod_name = instance.hod_name
+    instance._loaded_rollup_state = state
+
+
+@receiver(post_init, sender=User)
+def remember_user_first_name(sender, instance, **kwargs):
+    """Keep the loaded first_name; users who are their own HOD are listed by it"""
+    instance._loaded_first_name = instance.first_name
+
+
+@receiver(post_save, sender=User)
+def invalidate_hod_directory_for_user(sender, instance, **kwargs):
+    """Drop the cached HOD directory when a first_name shown in it may have changed"""
+    if kwargs.get('raw'):
+        return
+    if instance.first_name != instance._loaded_first_name:
+        invalidate_hod_directory()
+    instance._loaded_first_name = instance.first_name
+
+
+@receiver(post_init, sender=User)
+def remember_user_display_fields(sender, instance, **kwargs):
+    """Keep the loaded name and email, which the cached page fragments show"""
+    instance._loaded_display_fields = (instance.first_name, instance.last_name, instance.email)
+
+
+@receiver(post_save, sender=User)
+def bump_fragment_version_for_user(sender, instance, created, **kwargs):
+    """A name or email shown on the HOD and admin pages changed: retire its group's fragments"""
+    display_fields = (instance.first_name, instance.last_name, instance.email)
+    if not kwargs.get('raw') and not created and display_fields != instance._loaded_display_fields:
+        hod_names = UserProfile.objects.filter(user=instance).values_list('hod_name', flat=True)
+        bump_group_versions(hod_names)
+    instance._loaded_display_fields = display_fields
+
+
+@receiver(post_init, sender=QPRRecord)
+def remember_record_rollup_state(sender, instance, **kwargs):
+    """Keep the loaded owner, period and status: saves that change none of them skip the rollup"""
+    instance._loaded_rollup_state = _record_rollup_state(instance)
+
+
+def _record_rollup_state(record):
+    """(owner id, quarter, year, status) of a record, or None if some are not loaded (.only())"""
+    fields = record.__dict__
+    if not all(name in fields for name in ('user_id', 'quarter', 'year', 'status')):
+        return None
+    return (fields['user_id'], fields['quarter'], fields['year'] or '', fields['status'])
+
+
+@receiver(post_save, sender=QPRRecord)
+@receiver(post_delete, sender=QPRRecord)
+def refresh_rollup_for_record(sender, instance, signal, created=False, **kwargs):
+    """Update the HOD rollup of the record owner's group and retire its page fragments"""
+    if kwargs.get('raw'):
+        return
+    loaded, state = instance._loaded_rollup_state, _record_rollup_state(instance)
+    instance._loaded_rollup_state = state
+    if instance.user_id is None:
+        return
+    owners = {instance.user_id, loaded[0] if loaded else None} - {None}
+    hod_names = dict(UserProfile.objects.filter(user_id__in=owners).values_list('user_id', 'hod_name'))
+    bump_group_versions([hod_names.get(instance.user_id)])
+
+    if created or signal is post_delete or loaded is None:
+        periods = None if state is None else [state[1:3]]
+    elif state == loaded:
+        # Header edits that leave owner, period and status alone do not change the counts
+        return
+    else:
+        periods = [loaded[1:3], state[1:3]]
+    refresh_hod_rollup(hod_names.values(), periods)
+
+
+@receiver(post_save, sender=ManagerRequest)
+@receiver(post_delete, sender=ManagerRequest)
+def bump_fragment_version_for_request(sender, instance, **kwargs):
+    """A request's status shows in the requester's group on the HOD pages"""
+    if kwargs.get('raw'):
+        return
+    bump_group_versions(
+        UserProfile.objects.filter(user_id=instance.hod_id).values_list('hod_name', flat=True)
+    )
+
+
+def bump_record_version(sender, instance, **kwargs):
+    """A section row changed: move its record to a new serialized-cache version"""
+    if kwargs.get('raw') or getattr(instance, '_skip_version_bump', False):
+        # Saved together with its record, whose own save() bumped the version
+        return
+    origin = kwargs.get('origin')
+    if getattr(origin, 'model', type(origin)) is QPRRecord:
+        # Cascade from deleting the record itself
+        return
+    QPRRecord.objects.filter(pk=instance.qpr_record_id).update(version=F('version') + 1)
+    # Keep an already loaded record in step, so its next save does not reuse a version
+    record_field = sender._meta.get_field('qpr_record')
+    if record_field.is_cached(instance):
+        instance.qpr_record.version += 1
+
+
+for _, section_model, _ in SECTION_SCHEMA:
+    post_save.connect(bump_record_version, sender=section_model)
+    post_delete.connect(bump_record_version, sender=section_model)
@@ -1,3 +1,977 @@
-from django.test import TestCase
+import io
+import json
+import os
+import csv
+import re
+import tempfile
+import time
+import zipfile
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Value
+from django.db.models.functions import Lower
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path
+from django.utils.http import http_date
+
+from . import async_api, exports, imports
+from .benchmarks import BENCHMARK_CACHES, ENDPOINTS, _save_payload, generate_data
+from .instrumentation import NPlusOneDetector
+from .jobs import claim_job, enqueue, run_job
+from .hod_directory import get_active_hods, invalidate_hod_directory
+from .models import (
+    HODSubmissionRollup, Job, ManagerRequest, ManagerRequestRecipient, QPRRecord, SECTION_RELATED_NAMES, UserProfile,
+)
+from .pdf_reports import pdf_cache_path
+from .rollups import rebuild_hod_rollup
+
+
+class RecordPagingTests(TestCase):
+    """GET /api/records returns the user's records newest first, a keyset page at a time"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = generate_data(hods=1, users_per_hod=1, quarters=4, records_per_quarter=27)
+        cls.records = QPRRecord.objects.filter(user=cls.data.user).order_by('-id')
+
+    def setUp(self):
+        self.client.force_login(self.data.user)
+
+    def get_page(self, **params):
+        response = self.client.get('/api/records', params)
+        self.assertEqual(response.status_code, 200)
+        page = response.json()
+        self.assertEqual(set(page), {'results', 'next_cursor'})
+        return [record['id'] for record in page['results']], page['next_cursor']
+
+    def test_cursor_walks_every_record_once(self):
+        ids, cursor = self.get_page()
+        self.assertEqual(len(ids), 20)
+        self.assertEqual(cursor, ids[-1])
+        while cursor is not None:
+            page, cursor = self.get_page(cursor=cursor, limit=50)
+            self.assertTrue(all(record_id < ids[-1] for record_id in page))
+            ids += page
+        self.assertEqual(ids, list(self.records.values_list('id', flat=True)))
+
+    def test_limit_is_capped(self):
+        self.assertEqual(self.records.count(), 108)
+        ids, cursor = self.get_page(limit=500)
+        self.assertEqual((len(ids), cursor), (100, ids[-1]))
+        ids, cursor = self.get_page(cursor=cursor, limit=100)
+        self.assertEqual((len(ids), cursor), (8, None))
+
+    def test_filters(self):
+        record = self.records.filter(status='Submitted').last()
+        for params, expected in [
+            ({'status': 'Draft'}, self.records.filter(status='Draft')),
+            ({'quarter': record.quarter}, self.records.filter(quarter=record.quarter)),
+            ({'quarter': record.quarter, 'year': record.year, 'status': 'Submitted'},
+             self.records.filter(quarter=record.quarter, year=record.year, status='Submitted')),
+            ({'year': '1999-2000'}, self.records.none()),
+        ]:
+            with self.subTest(params=params):
+                self.assertEqual(self.get_page(limit=100, **params),
+                                 (list(expected.values_list('id', flat=True)), None))
+
+    def test_bad_paging_parameters(self):
+        for params in [{'limit': 0}, {'limit': -5}, {'limit': 'ten'}, {'cursor': 'abc'}]:
+            with self.subTest(params=params):
+                response = self.client.get('/api/records', params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+
+class RecordSaveTests(TestCase):
+    """Saving a record writes only what changed and moves it to a new version once"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = generate_data(hods=1, users_per_hod=1)
+
+    def setUp(self):
+        # Cached records outlive the rolled back test data that shares their versions
+        for cache in caches.all():
+            cache.clear()
+        self.client.force_login(self.data.user)
+
+    def save(self, payload):
+        response = self.client.post('/api/records', payload, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return QPRRecord.objects.get(pk=response.json()['id'])
+
+    def test_version_moves_only_on_changes(self):
+        payload = _save_payload(self.data, 1)
+        version = self.save(payload).version
+        self.assertEqual(self.save(payload).version, version)
+
+        payload['details']['s1_total'] = '2'
+        payload['details']['s2_meetings'] = '3'
+        self.assertEqual(self.save(payload).version, version + 1)
+
+        payload['officeName'] = 'Renamed office'
+        payload['details']['s1_hindi'] = '4'
+        record = self.save(payload)
+        self.assertEqual(record.version, version + 2)
+        self.assertEqual(record.officeName, 'Renamed office')
+
+    def test_new_record_gets_every_section(self):
+        record = self.save(dict(_save_payload(self.data, 5), id=None))
+        record = QPRRecord.objects.with_sections().get(pk=record.pk)
+        self.assertEqual(record.version, 1)
+        self.assertTrue(all(getattr(record, name, None) for name in SECTION_RELATED_NAMES))
+        self.assertEqual(record.section1.total_files, 5)
+
+    def test_concurrent_saves_get_their_own_versions(self):
+        first, second = QPRRecord.objects.get(pk=self.data.record_id), QPRRecord.objects.get(pk=self.data.record_id)
+        version = first.version
+        first.save(update_fields=['phone'])
+        second.save(update_fields=['email'])
+        self.assertEqual((first.version, second.version), (version + 1, version + 2))
+        self.assertEqual(QPRRecord.objects.get(pk=self.data.record_id).version, version + 2)
+
+    def test_section_edit_invalidates_cached_record(self):
+        url = f'/api/records/{self.data.record_id}/'
+        payload = _save_payload(self.data, 6)
+        self.save(payload)
+        self.assertEqual(self.client.get(url).json()['details']['s1_total'], 6)
+
+        payload['details']['s1_total'] = '7'
+        self.save(payload)
+        self.assertEqual(self.client.get(url).json()['details']['s1_total'], 7)
+
+        # Sections edited outside the record API move the version too
+        section = QPRRecord.objects.with_sections().get(pk=self.data.record_id).section1
+        section.total_files = 8
+        section.save()
+        self.assertEqual(self.client.get(url).json()['details']['s1_total'], 8)
+
+
+class HODRollupTests(TestCase):
+    """The rollup rows follow record saves and always match a full rebuild"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = generate_data(hods=1, users_per_hod=3)
+
+    def setUp(self):
+        hod_name = self.data.hod.profile.hod_name
+        self.first, self.second = [
+            profile.user for profile in UserProfile.objects.filter(role='user', hod_name=hod_name)[:2]
+        ]
+        self.hod_key = hod_name.lower()
+
+    def snapshot(self):
+        return sorted(HODSubmissionRollup.objects.values_list(
+            'hod_name', 'quarter', 'year', 'total_users', 'profiles_complete', 'drafts', 'submitted'
+        ))
+
+    def assertMatchesRebuild(self):
+        maintained = self.snapshot()
+        rebuild_hod_rollup()
+        self.assertEqual(maintained, self.snapshot())
+
+    def period(self, quarter, year='2030-2031'):
+        row = HODSubmissionRollup.objects.filter(hod_name=self.hod_key, quarter=quarter, year=year).first()
+        return (row.drafts, row.submitted) if row else None
+
+    def create(self, user, quarter, status):
+        return QPRRecord.objects.create(
+            user=user, officeName='Office', officeCode='OC', region='A', quarter=quarter,
+            year='2030-2031', status=status, is_submitted=status == 'Submitted',
+        )
+
+    def test_saves_in_one_group(self):
+        first = self.create(self.first, 'Q1', 'Submitted')
+        second = self.create(self.second, 'Q1', 'Draft')
+        self.assertEqual(self.period('Q1'), (1, 1))
+        self.assertMatchesRebuild()
+
+        second.status = 'Submitted'
+        second.save()
+        self.assertEqual(self.period('Q1'), (0, 2))
+        self.assertMatchesRebuild()
+
+        first.quarter = 'Q2'
+        first.save()
+        self.assertEqual((self.period('Q1'), self.period('Q2')), ((0, 1), (0, 1)))
+        self.assertMatchesRebuild()
+
+        first.delete()
+        self.assertIsNone(self.period('Q2'))
+        self.assertMatchesRebuild()
+
+    def test_header_edit_skips_rollup(self):
+        record = self.create(self.first, 'Q1', 'Draft')
+        record.officeName = 'Renamed office'
+        with CaptureQueriesContext(connection) as queries:
+            record.save()
+        self.assertFalse([query for query in queries if 'hodsubmissionrollup' in query['sql']])
+
+    def test_hod_pages_agree_on_mixed_case_groups(self):
+        for cache in caches.all():
+            cache.clear()
+        hod_name = self.data.hod.profile.hod_name
+        for profile, variant in zip(UserProfile.objects.filter(role='user', hod_name=hod_name),
+                                    [hod_name.upper(), hod_name.lower()]):
+            profile.hod_name = variant
+            profile.save()
+        self.create(self.first, 'Q1', 'Submitted')
+
+        self.client.force_login(self.data.hod)
+        stats = self.client.get('/hod/dashboard/').context['stats']
+        rows = list(self.client.get('/hod/detail-list/').context['users_data'])
+        self.assertEqual(stats['total_users'], len(rows))
+        self.assertEqual(len(rows), UserProfile.objects.filter(role='user', hod_name__iexact=hod_name).count())
+        self.assertEqual(stats['qpr_submitted'], sum(row['qpr_complete'] for row in rows))
+        self.assertEqual(stats['qpr_pending'], sum(not row['qpr_complete'] for row in rows))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN output checked is SQLite specific')
+class HotFilterIndexTests(TestCase):
+    """The dashboard and API filters are served by the Meta.indexes, not full scans"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('1001', password='secret')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        self.assertNotRegex(plan, r'SCAN qpr_app_\w+(?! USING)')
+
+    def test_profiles_by_role_and_hod_name(self):
+        self.assertUsesIndex(
+            UserProfile.objects.filter(role='user', hod_name='gayathri'),
+            'profile_role_hod_idx',
+        )
+
+    def test_profiles_by_role_and_lower_hod_name(self):
+        self.assertUsesIndex(
+            UserProfile.objects.annotate(hod_key=Lower('hod_name')).filter(
+                role='user', hod_key=Lower(Value('Gayathri'))
+            ),
+            'profile_role_hod_lower_idx',
+        )
+
+    def test_records_by_user_and_is_submitted(self):
+        self.assertUsesIndex(
+            QPRRecord.objects.filter(user=self.user, is_submitted=True),
+            'qpr_user_submitted_idx',
+        )
+
+    def test_records_by_user_and_status(self):
+        self.assertUsesIndex(
+            QPRRecord.objects.filter(user=self.user, status='Submitted'),
+            'qpr_user_status_idx',
+        )
+
+    def test_records_by_quarter_and_year(self):
+        self.assertUsesIndex(
+            QPRRecord.objects.filter(quarter='Q1', year='2025-2026'),
+            'qpr_quarter_year_idx',
+        )
+
+    def test_manager_requests_by_requester_type_and_status(self):
+        self.assertUsesIndex(
+            ManagerRequest.objects.filter(hod=self.user, request_type='qpr', status='approved'),
+            'request_hod_type_status_idx',
+        )
+
+
+class ExportTests(TestCase):
+    """The admin CSV/XLSX exports hold every record, one flat row each"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = generate_data(hods=1, users_per_hod=3)
+
+    def setUp(self):
+        self.client.force_login(self.data.admin)
+
+    def test_csv_is_streamed_with_bom_and_all_columns(self):
+        response = self.client.get('/admin-export/?format=csv')
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(content.startswith('\ufeff'))
+        header, *rows = list(csv.reader(io.StringIO(content[1:])))
+        self.assertEqual(header, exports.EXPORT_COLUMNS)
+        self.assertEqual(len(rows), QPRRecord.objects.count())
+
+        record = QPRRecord.objects.with_sections().select_related('user__profile').get(pk=self.data.record_id)
+        row = dict(zip(header, next(row for row in rows if row[0] == str(record.pk))))
+        self.assertEqual(row['employee_code'], record.user.profile.employee_code)
+        self.assertEqual(row['quarter'], record.quarter)
+        self.assertEqual([row[key] for key in exports.FORM_KEYS], [str(value) for value in exports.export_values(record)])
+
+    def test_rows_are_read_in_chunks(self):
+        progress = []
+        with mock.patch.object(exports, 'EXPORT_CHUNK_SIZE', 2):
+            lines = list(exports.iter_csv(exports.export_queryset(), progress.append))
+        total = QPRRecord.objects.count()
+        self.assertEqual(len(lines), total + 1)
+        self.assertEqual(progress, list(range(2, total + 1, 2)))
+
+    def test_xlsx_filtered_by_quarter(self):
+        import openpyxl
+
+        quarter = QPRRecord.objects.values_list('quarter', flat=True).first()
+        response = self.client.get('/admin-export/', {'format': 'xlsx', 'quarter': quarter})
+        sheet = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content))).active
+        header, *rows = sheet.iter_rows(values_only=True)
+        self.assertEqual(list(header), exports.EXPORT_COLUMNS)
+        self.assertEqual(len(rows), QPRRecord.objects.filter(quarter=quarter).count())
+        self.assertEqual({row[header.index('quarter')] for row in rows}, {quarter})
+
+
+class EditRequestTests(TestCase):
+    """Edit requests reach every Admin, and an approval unlocks one submitted record until it is saved"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = generate_data(hods=1, users_per_hod=2)
+        second_admin = User.objects.create(username='admin-2')
+        UserProfile.objects.filter(user=second_admin).update(role='admin')
+        cls.admins = {cls.data.admin, second_admin}
+        cls.record, cls.other = QPRRecord.objects.filter(user=cls.data.user).order_by('id')[:2]
+        QPRRecord.objects.filter(pk__in=[cls.record.pk, cls.other.pk]).update(status='Submitted', is_submitted=True)
+
+    def request_edit(self, record):
+        self.client.force_login(self.data.user)
+        response = self.client.post('/api/request-edit/', {
+            'request_type': 'qpr', 'record_id': record.pk, 'reason': 'typo',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return ManagerRequest.objects.get(qpr_record=record, status='pending')
+
+    def test_request_reaches_every_admin_once(self):
+        edit_request = self.request_edit(self.record)
+        self.assertEqual(ManagerRequest.objects.filter(qpr_record=self.record).count(), 1)
+        self.assertEqual(
+            {row.recipient for row in ManagerRequestRecipient.objects.filter(request=edit_request)}, self.admins
+        )
+        for admin in self.admins:
+            self.client.force_login(admin)
+            listed = self.client.get('/admin-dashboard/').context['manager_requests']
+            self.assertIn(edit_request.pk, [row['id'] for row in listed])
+
+    def edit_flags(self):
+        """{record id: (can_edit, edit_approved)} of the two submitted records, from the list and detail API"""
+        self.client.force_login(self.data.user)
+        listed = {row['id']: row for row in self.client.get('/api/records').json()['results']}
+        flags = {}
+        for record in (self.record, self.other):
+            detail = self.client.get(f'/api/records/{record.pk}/').json()
+            self.assertEqual(detail['can_edit'], listed[record.pk]['can_edit'])
+            flags[record.pk] = (detail['can_edit'], detail['edit_approved'])
+        return flags
+
+    def test_approval_unlocks_one_record_until_saved(self):
+        locked = {self.record.pk: (False, False), self.other.pk: (False, False)}
+        self.assertEqual(self.edit_flags(), locked)
+
+        edit_request = self.request_edit(self.record)
+        self.client.force_login(self.data.admin)
+        self.client.post(f'/admin-approve-request/{edit_request.pk}/', {'action': 'approve'})
+        self.assertEqual(self.edit_flags(), {**locked, self.record.pk: (True, True)})
+
+        # Saving the edit uses the grant up
+        self.client.post('/api/records', dict(_save_payload(self.data, 3), id=self.record.pk, status='Submitted'),
+                         content_type='application/json')
+        self.assertFalse(ManagerRequest.objects.filter(pk=edit_request.pk).exists())
+        self.assertEqual(self.edit_flags(), locked)
+
+
+class RecordRevalidationTests(TestCase):
+    """The record API answers a current client copy with 304 and any change with fresh data"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = generate_data(hods=1, users_per_hod=1)
+
+    def setUp(self):
+        self.client.force_login(self.data.user)
+        self.detail_url = f'/api/records/{self.data.record_id}/'
+
+    def test_unchanged_records_are_not_modified(self):
+        for url in ['/api/records', self.detail_url]:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                revalidated = self.client.get(url, headers={'If-None-Match': response['ETag']})
+                self.assertEqual(revalidated.status_code, 304)
+                self.assertEqual(revalidated['ETag'], response['ETag'])
+                self.assertEqual(revalidated.content, b'')
+                self.assertNotIn('Last-Modified', response)
+
+    def test_changes_are_served_again(self):
+        etags = {url: self.client.get(url)['ETag'] for url in ['/api/records', self.detail_url]}
+        self.client.post('/api/records', _save_payload(self.data, 42), content_type='application/json')
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, headers={'If-None-Match': etag})
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+        # A new edit request changes the record's edit flags
+        etag = self.client.get(self.detail_url)['ETag']
+        self.client.post('/api/request-edit/', {
+            'request_type': 'qpr', 'record_id': self.data.record_id, 'reason': 'typo',
+        }, content_type='application/json')
+        self.assertEqual(self.client.get(self.detail_url, headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_delete_is_served_again(self):
+        newest = QPRRecord.objects.filter(user=self.data.user).order_by('-updated_at').first()
+        etag = self.client.get('/api/records')['ETag']
+        # The newest timestamp goes back down, and the client may only know a date
+        newest.delete()
+        response = self.client.get('/api/records', headers={
+            'If-Modified-Since': http_date(time.time()), 'If-None-Match': etag,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(newest.pk, [record['id'] for record in response.json()['results']])
+        since_only = self.client.get('/api/records', headers={'If-Modified-Since': http_date(time.time())})
+        self.assertEqual(since_only.status_code, 200)
+
+
+def write_import_file(testcase, rows):
+    """CSV import file of the given row dicts, removed after the test"""
+    directory = tempfile.TemporaryDirectory()
+    testcase.addCleanup(directory.cleanup)
+    path = os.path.join(directory.name, 'import.csv')
+    with open(path, 'w', newline='', encoding='utf-8') as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(dict.fromkeys(key for row in rows for key in row)))
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+class EmployeeImportTests(TestCase):
+    """Employee files are validated as a whole and can be imported again without duplicates"""
+
+    ROWS = [
+        {'employee_code': f'E{n}', 'role': 'user', 'hod_name': 'Import HOD', 'first_name': f'Employee {n}',
+         'email': f'e{n}@office.gov', 'office_name': f'Office {n}'}
+        for n in range(5)
+    ] + [{'employee_code': 'H1', 'role': 'hod', 'hod_name': 'Import HOD', 'first_name': 'Import HOD',
+          'email': 'h1@office.gov', 'office_name': ''}]
+
+    def run_import(self, rows, **kwargs):
+        return imports.import_employees(write_import_file(self, rows), batch_size=4, workers=1, **kwargs)
+
+    def test_invalid_file_writes_nothing(self):
+        rows = self.ROWS + [
+            {'employee_code': '', 'role': 'user'},
+            {'employee_code': 'E6', 'role': 'manager'},
+            {'employee_code': 'E7', 'email': 'not-an-address'},
+            {'employee_code': 'E1'},
+        ]
+        stats = self.run_import(rows)
+        self.assertEqual([(line, code) for line, code, _ in stats['errors']],
+                         [(8, ''), (9, 'E6'), (10, 'E7'), (11, 'E1')])
+        self.assertIn('first seen on line 3', stats['errors'][-1][2])
+        self.assertFalse(UserProfile.objects.exists())
+
+    def test_rerun_is_idempotent(self):
+        stats = self.run_import(self.ROWS)  # Two batches
+        self.assertEqual((stats['created'], stats['updated']), (6, 0))
+        hod = UserProfile.objects.get(employee_code='H1')
+        self.assertEqual((hod.role, hod.hod_name, hod.user.first_name), ('hod', 'Import HOD', 'Import HOD'))
+        passwords = dict(User.objects.values_list('username', 'password'))
+
+        stats = self.run_import(self.ROWS)
+        self.assertEqual((stats['created'], stats['updated'], stats['unchanged']), (0, 0, 6))
+        self.assertEqual(dict(User.objects.values_list('username', 'password')), passwords)
+        self.assertEqual(UserProfile.objects.count(), 6)
+
+    def test_update_moves_updated_at(self):
+        self.run_import(self.ROWS)
+        before = dict(UserProfile.objects.values_list('employee_code', 'updated_at'))
+        stats = self.run_import([dict(self.ROWS[0], office_name='Moved office')] + self.ROWS[1:])
+        self.assertEqual((stats['updated'], stats['unchanged']), (1, 5))
+        after = dict(UserProfile.objects.values_list('employee_code', 'updated_at'))
+        self.assertGreater(after.pop('E0'), before.pop('E0'))
+        self.assertEqual(after, before)
+        self.assertEqual(UserProfile.objects.get(employee_code='E0').office_name, 'Moved office')
+
+
+class QPRImportTests(TestCase):
+    """Invalid and duplicate QPR rows are reported and skipped; the rest is written once"""
+
+    QUARTER = '31 मार्च / Mar 31'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = generate_data(hods=1, users_per_hod=2)
+        cls.codes = list(UserProfile.objects.filter(role='user').order_by('id').values_list('employee_code', flat=True))
+
+    def row(self, code, office, **values):
+        return {
+            'employee_code': code, 'officeName': f'Office {office}', 'officeCode': office,
+            'quarter': self.QUARTER, 'year': '2030-2031', 'status': 'Submitted',
+            's1_total': '4', 's2_meetings': '1', **values,
+        }
+
+    def run_import(self, rows, **kwargs):
+        return imports.import_qpr_records(write_import_file(self, rows), chunk_size=2, **kwargs)
+
+    def imported(self):
+        return QPRRecord.objects.filter(quarter=self.QUARTER)
+
+    def test_invalid_rows_are_skipped(self):
+        stats = self.run_import([
+            self.row(self.codes[0], 'A'),
+            self.row('nobody', 'B'),
+            self.row(self.codes[0], 'C', quarter=''),
+            self.row(self.codes[1], 'D', status='Approved', s1_total='many'),
+            self.row(self.codes[1], 'E'),
+        ])
+        self.assertEqual([error[:3] for error in stats['errors']], [
+            (3, 'nobody', 'employee_code'),
+            (4, self.codes[0], 'quarter'),
+            (5, self.codes[1], 'status'),
+            (5, self.codes[1], 's1_total'),
+        ])
+        self.assertEqual((stats['processed'], stats['created']), (5, 2))
+        self.assertEqual(sorted(self.imported().values_list('officeCode', flat=True)), ['A', 'E'])
+        record = QPRRecord.objects.with_sections().get(officeCode='E')
+        self.assertEqual((record.is_submitted, record.section1.total_files), (True, 4))
+        self.assertTrue(all(getattr(record, name, None) for name in SECTION_RELATED_NAMES))
+
+    def test_duplicates_are_skipped(self):
+        existing = QPRRecord.objects.filter(user__username=self.codes[0]).first()
+        stats = self.run_import([
+            self.row(self.codes[0], 'A'),
+            self.row(self.codes[1], 'A'),  # Another employee
+            self.row(self.codes[0], 'A', year='2031-2032'),  # Another year
+            self.row(self.codes[0], 'A', officeName='Renamed'),  # Duplicate of line 2, in the next chunk
+            self.row(self.codes[0], existing.officeCode, quarter=existing.quarter, year=existing.year),
+        ])
+        self.assertEqual([error[0::3] for error in stats['errors']], [
+            (5, 'duplicate of line 2'),
+            (6, 'a record for this employee, office, quarter and year already exists'),
+        ])
+        self.assertEqual(stats['created'], 3)
+        self.assertEqual(self.imported().count(), 3)
+        self.assertFalse(self.imported().filter(officeName='Renamed').exists())
+
+    def test_dry_run_writes_nothing(self):
+        rows = [self.row(self.codes[0], 'A'), self.row(self.codes[0], 'A'), self.row(self.codes[1], 'B')]
+        rollup = list(HODSubmissionRollup.objects.values_list('quarter', 'year', 'submitted'))
+        stats = self.run_import(rows, dry_run=True)
+        self.assertEqual((stats['created'], len(stats['errors'])), (2, 1))
+        self.assertFalse(self.imported().exists())
+        self.assertEqual(list(HODSubmissionRollup.objects.values_list('quarter', 'year', 'submitted')), rollup)
+
+        self.assertEqual(self.run_import(rows)['created'], 2)
+        self.assertTrue(HODSubmissionRollup.objects.filter(quarter=self.QUARTER, submitted=2).exists())
+
+    def test_rerun_is_idempotent(self):
+        rows = [self.row(code, f'{office}{n}') for n, code in enumerate(self.codes) for office in 'ABC']
+        self.assertEqual(self.run_import(rows)['created'], 6)
+        stats = self.run_import(rows)
+        self.assertEqual((stats['processed'], stats['created'], len(stats['errors'])), (6, 0, 6))
+        self.assertEqual(self.imported().count(), 6)
+
+
+class PerformanceReportTests(TestCase):
+    """Requests are timed in Server-Timing, and perf_report summarises the slow-request log"""
+
+    def write_log(self):
+        def entry(view, duration_ms, queries, time='2026-03-01T10:00:00', duplicates=(), method='GET'):
+            return json.dumps({
+                'time': time, 'method': method, 'path': f'/{view}/', 'view': view, 'status': 200,
+                'duration_ms': duration_ms, 'db_ms': duration_ms / 10, 'queries': queries,
+                'duplicate_queries': [{'count': count, 'sql': sql} for sql, count in duplicates],
+            })
+
+        lines = [entry('api_records', duration, n, duplicates=[('SELECT section', 3)] if n < 2 else [])
+                 for n, duration in enumerate([30.0, 10.0, 50.0, 20.0, 40.0, 100.0, 60.0, 90.0, 70.0, 80.0])]
+        lines += [
+            entry('hod_dashboard', 400.0, 12, duplicates=[('SELECT profile', 4)]),
+            entry('hod_dashboard', 300.0, 8),
+            entry('api_records', 5000.0, 99, time='2026-02-28T23:59:59', method='POST'),  # Before --since
+            '{"time": "2026-03-01T10:00:00", "truncated',
+        ]
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'performance.log')
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write('\n'.join(lines) + '\n')
+        return path
+
+    def report(self, *args):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('perf_report', self.write_log(), '--since', '2026-03-01', *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_summary(self):
+        summary = json.loads(self.report('--json')[0])
+        self.assertEqual(
+            [(row['endpoint'], row['count'], row['p50'], row['p95'], row['p99'], row['max_queries'])
+             for row in summary['endpoints']],
+            [('GET hod_dashboard', 2, 300.0, 400.0, 400.0, 12), ('GET api_records', 10, 50.0, 100.0, 100.0, 9)],
+        )
+        self.assertEqual(summary['endpoints'][1]['queries'], 4.5)
+        self.assertEqual(summary['duplicate_queries'], [
+            {'endpoint': 'GET api_records', 'sql': 'SELECT section', 'count': 6},
+            {'endpoint': 'GET hod_dashboard', 'sql': 'SELECT profile', 'count': 4},
+        ])
+
+    def test_sort_limit_and_skipped_lines(self):
+        summary = json.loads(self.report('--json', '--sort', 'count', '--limit', '1')[0])
+        self.assertEqual([row['endpoint'] for row in summary['endpoints']], ['GET api_records'])
+        self.assertEqual(len(summary['duplicate_queries']), 1)
+
+        stdout, stderr = self.report()
+        self.assertLess(stdout.index('GET hod_dashboard'), stdout.index('GET api_records'))
+        self.assertNotIn('POST', stdout)
+        self.assertIn('1 line(s) were not JSON', stderr)
+
+    @override_settings(QPR_SLOW_REQUEST_MS=0)
+    def test_middleware_times_requests(self):
+        with self.assertLogs('qpr.performance') as logs:
+            response = self.client.get('/login/')
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", total;dur=[\d.]+$',
+        )
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual((entry['method'], entry['path'], entry['status']), ('GET', '/login/', 200))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite connection tuning')
+class SQLiteTuningTests(TestCase):
+    """Connections wait for the write lock rather than failing with database is locked"""
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_connection_pragmas(self):
+        self.assertEqual(self.pragma('busy_timeout'), settings.QPR_SQLITE_BUSY_TIMEOUT_MS)
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+
+@override_settings(CACHES=BENCHMARK_CACHES)
+class QueryScalingTests(TestCase):
+    """Every endpoint runs the same number of queries however much data there is"""
+
+    def measure(self, name, scale):
+        """(query count, N+1 report) of one cold request at the given data scale"""
+        account, call = ENDPOINTS[name]
+        with transaction.atomic():
+            data = generate_data(hods=2 * scale, users_per_hod=3 * scale, quarters=2, records_per_quarter=scale)
+            self.client.force_login(getattr(data, account))
+            for cache in caches.all():
+                cache.clear()
+            with NPlusOneDetector() as detector:
+                response = call(self.client, data, 1)
+            self.assertEqual(response.status_code, 200, name)
+            transaction.set_rollback(True)
+        return detector.count, detector.report()
+
+    def test_query_counts_are_constant(self):
+        for name in ENDPOINTS:
+            with self.subTest(endpoint=name):
+                small, _ = self.measure(name, 1)
+                large, report = self.measure(name, 3)
+                self.assertEqual(large, small, f'{name} query count grows with data:\n{report}')
+                self.assertEqual(report, '', f'{name} repeats queries:\n{report}')
+
+    def test_detector_reports_call_site(self):
+        User.objects.bulk_create([User(username=f'u{i}') for i in range(4)])
+        with NPlusOneDetector() as detector:
+            for user in User.objects.all():
+                UserProfile.objects.filter(user=user).exists()
+        (fingerprint, count, sites), = detector.problems()
+        self.assertEqual(count, 4)
+        self.assertIn('qpr_app_userprofile', fingerprint)
+        self.assertEqual(list(sites), [f'qpr_app/tests.py:{self.loop_line()} in test_detector_reports_call_site'])
+
+    def loop_line(self):
+        import inspect
+        source, start = inspect.getsourcelines(self.test_detector_reports_call_site)
+        return start + next(i for i, line in enumerate(source) if '.exists()' in line)
+
+
+MANIFEST_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
+
+
+class StaticPipelineTests(TestCase):
+    """Production static files: hashed names, precompressed, cached for good"""
+
+    def setUp(self):
+        static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(static_root.cleanup)
+        settings_override = override_settings(STATIC_ROOT=static_root.name, STORAGES=MANIFEST_STORAGES)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def test_pages_link_hashed_bundles(self):
+        response = self.client.get('/login/')
+        content = response.content.decode()
+        self.assertNotIn('<style', content)
+        self.assertRegex(content, r'/static/css/pages/login\.[0-9a-f]{12}\.css')
+
+    def test_hashed_files_are_immutable_and_compressed(self):
+        content = self.client.get('/login/').content.decode()
+        url = re.search(r'/static/css/pages/login\.[0-9a-f]{12}\.css', content).group()
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+
+
+@override_settings(CACHES=BENCHMARK_CACHES)
+class FragmentCacheTests(TestCase):
+    """The HOD and admin tables come from cached fragments until their group changes"""
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.data = generate_data(hods=2, users_per_hod=3)
+        self.client.force_login(self.data.hod)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return len(queries), response.content.decode()
+
+    def test_hit_skips_table_queries(self):
+        for url in ['/hod/dashboard/', '/hod/detail-list/']:
+            with self.subTest(url=url):
+                cold, cold_page = self.get(url)
+                warm, warm_page = self.get(url)
+                self.assertLess(warm, cold)
+                self.assertEqual(warm_page, cold_page)
+
+    def test_record_save_in_group_refreshes_table(self):
+        self.get('/hod/detail-list/')
+        user = User.objects.filter(profile__role='user', profile__hod_name=self.data.hod.profile.hod_name).first()
+        record = QPRRecord.objects.filter(user=user).first()
+        payload = dict(_save_payload(self.data, 1), id=record.id, officeCode='OC-NEW')
+        self.client.force_login(user)
+        self.client.post('/api/records', payload, content_type='application/json')
+        self.client.force_login(self.data.hod)
+        self.assertIn('OC-NEW', self.get('/hod/detail-list/')[1])
+
+
+class HODDirectoryTests(TestCase):
+    """Every process drops its cached HOD directory once the directory changes"""
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.data = generate_data(hods=2, users_per_hod=1)
+
+    def test_profile_change_reaches_cached_directory(self):
+        hods = get_active_hods()
+        profile = UserProfile.objects.filter(role='user').first()
+        profile.role, profile.hod_name = 'hod', 'New HOD'
+        profile.save()
+        self.assertEqual(get_active_hods(), sorted({*hods, 'New HOD'}))
+
+    def test_invalidation_needs_no_shared_cache(self):
+        get_active_hods()
+        with self.assertNumQueries(1):  # The version stamp only
+            get_active_hods()
+        # A bulk rename in another process bumps the version in the database, not this process's cache
+        hod_name = self.data.hod.profile.hod_name
+        UserProfile.objects.filter(hod_name=hod_name).update(hod_name='Renamed HOD')
+        invalidate_hod_directory()
+        self.assertIn('Renamed HOD', get_active_hods())
+        self.assertNotIn(hod_name, get_active_hods())
+
+
+
+class JobQueueTests(TestCase):
+    """Long admin operations are queued and run by the worker, not in the request"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = generate_data(hods=2, users_per_hod=3)
+
+    def setUp(self):
+        files_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(files_dir.cleanup)
+        self.enterContext(override_settings(QPR_JOB_FILES_DIR=files_dir.name))
+        self.client.force_login(self.data.admin)
+
+    def run_queued(self):
+        """Run every queued job as the worker would; returns the finished jobs"""
+        ids = []
+        while (job_id := claim_job('test')) is not None:
+            run_job(job_id)
+            ids.append(job_id)
+        return [self.client.get(f'/api/jobs/{job_id}/').json() for job_id in ids]
+
+    def test_export_runs_in_worker(self):
+        response = self.client.post('/admin-export/', {'format': 'csv'})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.client.get(response.json()['status_url']).json()['status'], 'queued')
+
+        job, = self.run_queued()
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['percent'], 100)
+        download = self.client.get(job['download_url'])
+        self.assertIn('qpr_records.csv', download['Content-Disposition'])
+        lines = b''.join(download.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), QPRRecord.objects.count() + 1)
+
+    def test_rename_hod_moves_group(self):
+        hod = self.data.hod.profile
+        members = UserProfile.objects.filter(role='user', hod_name=hod.hod_name).count()
+        response = self.client.post('/api/update-hod/', {
+            'old_hod_name': hod.hod_name, 'new_hod_name': 'Renamed HOD',
+            'old_employee_code': hod.employee_code, 'new_employee_code': 'H-NEW',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(UserProfile.objects.filter(hod_name='Renamed HOD').count(), 0)
+
+        job, = self.run_queued()
+        self.assertEqual(job['status'], 'succeeded', job['error'])
+        self.assertEqual(job['result']['users_moved'], members)
+        self.assertEqual(UserProfile.objects.filter(role='user', hod_name='Renamed HOD').count(), members)
+        self.assertTrue(User.objects.filter(username='H-NEW', profile__hod_name='Renamed HOD').exists())
+
+    def test_failed_job_reports_error(self):
+        enqueue('rename_hod', {
+            'old_hod_name': 'Nobody', 'new_hod_name': 'Someone',
+            'old_employee_code': 'missing', 'new_employee_code': 'missing',
+        })
+        job, = self.run_queued()
+        self.assertEqual(job['status'], 'failed')
+        self.assertEqual(job['error'], 'HOD with employee code missing not found')
+
+    def test_jobs_are_claimed_once_in_order(self):
+        first = enqueue('export_records')
+        second = enqueue('export_records')
+        self.assertEqual([claim_job('a'), claim_job('b'), claim_job('c')], [first.pk, second.pk, None])
+        self.assertEqual(Job.objects.get(pk=second.pk).worker, 'b')
+
+
+class PDFReportTests(TestCase):
+    """Reports render to PDF; submitted ones once per version, from the disk cache afterwards"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = generate_data(hods=1, users_per_hod=3)
+
+    def setUp(self):
+        for name in ('QPR_PDF_CACHE_DIR', 'QPR_JOB_FILES_DIR'):
+            directory = tempfile.TemporaryDirectory()
+            self.addCleanup(directory.cleanup)
+            self.enterContext(override_settings(**{name: directory.name}))
+        self.record = QPRRecord.objects.filter(user=self.data.user, is_submitted=True).first()
+
+    def get_pdf(self, user, record):
+        self.client.force_login(user)
+        return self.client.get(f'/reports/{record.pk}/pdf/')
+
+    def test_submitted_record_is_rendered_once_per_version(self):
+        response = self.get_pdf(self.data.user, self.record)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+        # Served from the cache file from now on
+        path = pdf_cache_path(self.record)
+        with open(path, 'wb') as handle:
+            handle.write(b'%PDF cached')
+        self.assertEqual(b''.join(self.get_pdf(self.data.user, self.record).streaming_content), b'%PDF cached')
+
+        # A new version is rendered again and replaces the old file
+        self.record.save()
+        self.assertNotEqual(b''.join(self.get_pdf(self.data.user, self.record).streaming_content), b'%PDF cached')
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(os.path.exists(pdf_cache_path(self.record)))
+
+    def test_drafts_are_not_cached_and_access_is_checked(self):
+        draft = QPRRecord.objects.filter(user=self.data.user, is_submitted=False).first()
+        self.assertEqual(self.get_pdf(self.data.user, draft).status_code, 200)
+        self.assertFalse(os.listdir(settings.QPR_PDF_CACHE_DIR))
+
+        other = UserProfile.objects.filter(role='user').exclude(user=self.data.user).first().user
+        self.assertEqual(self.get_pdf(other, self.record).status_code, 404)
+        self.assertEqual(self.get_pdf(self.data.admin, self.record).status_code, 200)
+
+    def test_quarter_archive_job(self):
+        self.client.force_login(self.data.admin)
+        self.assertEqual(self.client.post('/admin-export/', {'format': 'pdf'}).status_code, 400)
+        response = self.client.post('/admin-export/', {
+            'format': 'pdf', 'quarter': self.record.quarter, 'year': self.record.year,
+        })
+        self.assertEqual(response.status_code, 202)
+
+        # The job renders in its own worker process, even with cores to spare
+        with mock.patch('qpr_app.pdf_reports.os.cpu_count', return_value=4), \
+                mock.patch('qpr_app.pdf_reports.ProcessPoolExecutor', side_effect=AssertionError('nested pool')):
+            self.assertTrue(run_job(claim_job('test')))
+        job = self.client.get(response.json()['status_url']).json()
+        download = self.client.get(job['download_url'])
+        with zipfile.ZipFile(io.BytesIO(b''.join(download.streaming_content))) as archive:
+            names = archive.namelist()
+            self.assertTrue(all(archive.read(name).startswith(b'%PDF') for name in names))
+        submitted = QPRRecord.objects.filter(is_submitted=True, quarter=self.record.quarter, year=self.record.year)
+        self.assertEqual(len(names), submitted.count())
+        self.assertEqual(job['result'], {'pdfs': len(names)})
+
+
+# The JSON API served by its async views, as qpr_project/urls.py does under ASGI
+urlpatterns = [
+    path('api/records', async_api.api_records),
+    path('api/records/<int:record_id>/', async_api.api_record_detail),
+    path('api/request-edit/', async_api.request_edit_api),
+]
+
+
+@override_settings(CACHES=BENCHMARK_CACHES, ROOT_URLCONF=__name__)
+class AsyncAPITests(TestCase):
+    """The ASGI variants of the JSON API answer exactly like the sync views"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = generate_data(hods=1, users_per_hod=2)
+
+    async def aget(self, url, **headers):
+        await self.async_client.aforce_login(self.data.user)
+        return await self.async_client.get(url, headers=headers)
+
+    def test_responses_match_sync_views(self):
+        self.client.force_login(self.data.user)
+        for url in ['/api/records', '/api/records?limit=1', f'/api/records/{self.data.record_id}/']:
+            with self.subTest(url=url):
+                with override_settings(ROOT_URLCONF='qpr_project.urls'):
+                    expected = self.client.get(url)
+                response = async_to_sync(self.aget)(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), expected.json())
+                self.assertEqual(response['ETag'], expected['ETag'])
+
+    async def test_save_changes_validators(self):
+        url = f'/api/records/{self.data.record_id}/'
+        etag = (await self.aget(url))['ETag']
+        self.assertEqual((await self.aget(url, **{'If-None-Match': etag})).status_code, 304)
+
+        saved = await self.async_client.post('/api/records', _save_payload(self.data, 7), content_type='application/json')
+        self.assertEqual(saved.status_code, 200)
+        response = await self.aget(url, **{'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    async def test_queries_are_timed(self):
+        response = await self.aget('/api/records')
+        self.assertRegex(response['Server-Timing'], r'desc="[1-9]\d* queries"')
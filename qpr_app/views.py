@@ -1,42 +1,45 @@
-from django.http import JsonResponse
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect
+from django.urls import reverse
 from django.contrib import messages
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import Count, Exists, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, NullIf, Trim
+from django.utils.cache import get_conditional_response
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import quote_etag
 from .models import (
-    QPRRecord, Section1FilesData, Section2MeetingsData, 
-    Section3OfficialLanguagesData, Section4HindiLettersData,
-    Section5EnglishRepliedHindiData, Section6IssuedLettersData,
-    Section7NotingsData, Section8WorkshopsData, 
-    Section9ImplementationCommitteeData, Section10HindiAdvisoryData,
-    Section11SpecificAchievementsData, UserProfile, ManagerRequest
+    QPRRecord, UserProfile, ManagerRequest, ManagerRequestRecipient, Job, SECTION_RELATED_NAMES,
 )
+from .exports import export_queryset, iter_csv, write_xlsx
+from .fragment_cache import all_groups_fragment_version, group_fragment_version
+from .hod_directory import get_active_hods, uncovered_hod_names
+from .imports import ImportFileError, detect_format
+from .jobs import IMPORT_REPORT_DISPLAY_LIMIT, enqueue, job_file_path, job_status, save_upload
+from .pdf_reports import pdf_file_name, pdf_queryset, record_pdf
+from .record_cache import cached_serialized_records
+from .rollups import hod_rollup_for, hod_rollup_totals
+from .sections import changed_fields, section_values, serialize_sections
+from collections import defaultdict
+import hashlib
 import json
+import logging
+import os
 
-
-# Helper function to get active HODs for dropdown
-def get_active_hods():
-    """Get list of all active HODs for registration dropdown"""
-    # Get HODs with role='hod'
-    hod_names = list(UserProfile.objects.filter(role='hod').values_list('hod_name', flat=True).distinct())
-    
-    # Also add users with hod_name=None as their own HODs (using their first_name)
-    unassigned_hod_names = list(UserProfile.objects.filter(
-        role='user', 
-        hod_name__isnull=True
-    ).values_list('user__first_name', flat=True).distinct())
-    
-    # Combine and sort
-    all_hod_names = sorted(set(hod_names + unassigned_hod_names))
-    return all_hod_names
+logger = logging.getLogger(__name__)
 
 
 def serialize_qpr_record(record):
     """
     Serialize a QPRRecord with all related sections into a dictionary.
     This replaces the old JSON field approach with proper ORM data.
+    Load records with QPRRecord.objects.with_sections() so the section
+    lookups are served from the joined row instead of extra queries.
     """
     data = {
         'id': record.id,
@@ -48,120 +51,180 @@ def serialize_qpr_record(record):
         'status': record.status,
         'phone': record.phone or '',
         'email': record.email or '',
-        'details': {}
+        'details': serialize_sections(record),
     }
     
-    # Section 1 Data
-    if hasattr(record, 'section1'):
-        s1 = record.section1
-        data['details'].update({
-            's1_total': s1.total_files or '',
-            's1_hindi': s1.hindi_files or '',
-        })
-    
-    # Section 2 Data
-    if hasattr(record, 'section2'):
-        s2 = record.section2
-        data['details'].update({
-            's2_meetings': s2.meetings_count or '',
-            's2_minutes': s2.hindi_minutes or '',
-            's2_papers_total': s2.total_papers or '',
-            's2_papers_hindi': s2.hindi_papers or '',
-        })
-    
-    # Section 3 Data
-    if hasattr(record, 'section3'):
-        s3 = record.section3
-        data['details'].update({
-            's3_total': s3.total_documents or '',
-            's3_bilingual': s3.bilingual_documents or '',
-            's3_english': s3.english_only_documents or '',
-            's3_hindi_only': s3.hindi_only_documents or '',
-        })
-    
-    # Section 4 Data
-    if hasattr(record, 'section4'):
-        s4 = record.section4
-        data['details'].update({
-            's4_total': s4.total_letters or '',
-            's4_no_reply': s4.no_reply_letters or '',
-            's4_replied_hindi': s4.replied_hindi_letters or '',
-            's4_replied_eng': s4.replied_english_letters or '',
-        })
-    
-    # Section 5 Data
-    if hasattr(record, 'section5'):
-        s5 = record.section5
-        data['details'].update({
-            's5_total': s5.region_a_english_letters or '',
-            's5_hindi': s5.region_a_replied_hindi or '',
-            's5_english': s5.region_a_replied_english or '',
-            's5_noreply': s5.region_a_no_reply or '',
-        })
-    
-    # Section 6 Data
-    if hasattr(record, 'section6'):
-        s6 = record.section6
-        data['details'].update({
-            's6_a_hindi': s6.region_a_hindi_bilingual or '',
-            's6_a_eng': s6.region_a_english_only or '',
-            's6_a_total': s6.region_a_total or '',
-            's6_b_hindi': s6.region_b_hindi_bilingual or '',
-            's6_b_eng': s6.region_b_english_only or '',
-            's6_b_total': s6.region_b_total or '',
-            's6_c_hindi': s6.region_c_hindi_bilingual or '',
-            's6_c_eng': s6.region_c_english_only or '',
-            's6_c_total': s6.region_c_total or '',
-        })
-    
-    # Section 7 Data (Notings)
-    if hasattr(record, 'section7'):
-        s7 = record.section7
-        data['details'].update({
-            's7_hindi': s7.hindi_pages or '',
-            's7_eng': s7.english_pages or '',
-            's7_total': s7.total_pages or '',
-            's7_eoffice': s7.eoffice_notings or '',
-        })
-    
-    # Section 8 Data (Workshops)
-    if hasattr(record, 'section8'):
-        s8 = record.section8
-        data['details'].update({
-            's8_workshops': s8.full_day_workshops or '',
-            's8_officers': s8.officers_trained or '',
-            's8_employees': s8.employees_trained or '',
-        })
-    
-    # Section 9 Data (Implementation Committee)
-    if hasattr(record, 'section9'):
-        s9 = record.section9
-        data['details'].update({
-            's9_date': s9.meeting_date.isoformat() if s9.meeting_date else '',
-            's9_sub_committees': s9.sub_committees_count or '',
-            's9_meetings_count': s9.meetings_organized or '',
-            's9_agenda_hindi': s9.agenda_hindi or '',
-        })
-    
-    # Section 10 Data (Hindi Advisory)
-    if hasattr(record, 'section10'):
-        s10 = record.section10
-        data['details'].update({
-            's10_date': s10.meeting_date.isoformat() if s10.meeting_date else '',
-        })
-    
-    # Section 11 Data (Achievements)
-    if hasattr(record, 'section11'):
-        s11 = record.section11
-        data['details'].update({
-            's12_1': s11.innovative_work or '',
-            's12_2': s11.special_events or '',
-            's12_3': s11.hindi_medium_works or '',
-        })
-    
     return data
 
 
+# Page sizes for the /api/records list endpoint
+RECORDS_PAGE_SIZE = 20
+RECORDS_MAX_PAGE_SIZE = 100
+
+
+# Timestamps that change whenever a serialized record would change
+RECORD_VALIDATOR_FIELDS = ['updated_at', 'edit_requests__updated_at'] + [
+    f'{name}__updated_at' for name in SECTION_RELATED_NAMES
+]
+
+
+def _record_validator_aggregates():
+    """Aggregates over a record queryset that _validators_from_stats() needs"""
+    return dict(
+        record_count=Count('id', distinct=True),
+        request_count=Count('edit_requests', distinct=True),
+        **{f'max_{i}': Max(field) for i, field in enumerate(RECORD_VALIDATOR_FIELDS)}
+    )
+
+
+def _record_validators(records, user):
+    """
+    Compute (record count, strong ETag) for a record queryset with one
+    aggregate query, without loading or serializing the records.
+    """
+    return _validators_from_stats(records.order_by().aggregate(**_record_validator_aggregates()), user)
+
+
+def _validators_from_stats(stats, user):
+    """
+    (record count, strong ETag) from the _record_validator_aggregates() result.
+
+    There is no Last-Modified: at one-second resolution it misses a second
+    edit within the same second, and the newest timestamp goes back down
+    when the newest record or edit request is deleted. The ETag covers both
+    through the microsecond timestamp and the counts.
+    """
+    record_count = stats.pop('record_count')
+    request_count = stats.pop('request_count')
+    last_modified = max((value for value in stats.values() if value is not None), default=None)
+    stamp = '{}:{}:{}:{}'.format(
+        user.pk, record_count, request_count, last_modified.isoformat() if last_modified else ''
+    )
+    return record_count, quote_etag(hashlib.sha1(stamp.encode()).hexdigest())
+
+
+def _set_validators(response, etag):
+    """Attach the ETag so the browser revalidates instead of re-downloading"""
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _not_modified(request, etag):
+    """304 (or 412) response if the client's copy is current, else None"""
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        _set_validators(response, etag)
+    return response
+
+
+def _records_query(request, user):
+    """
+    (records, limit) for a GET /api/records request: the user's records with
+    the status/quarter/year filters and keyset cursor applied, and the page
+    size. Raises ValueError with a message for the 400 response.
+    """
+    # Page size and keyset cursor (records are returned newest first, by id)
+    try:
+        limit = int(request.GET.get('limit') or RECORDS_PAGE_SIZE)
+        cursor = request.GET.get('cursor')
+        cursor = int(cursor) if cursor else None
+    except ValueError:
+        raise ValueError('limit and cursor must be integers')
+    if limit < 1:
+        raise ValueError('limit must be a positive integer')
+    limit = min(limit, RECORDS_MAX_PAGE_SIZE)
+    
+    # Return only records for the logged-in user
+    records = QPRRecord.objects.with_edit_approval().filter(user=user)
+    for field in ('status', 'quarter', 'year'):
+        value = request.GET.get(field, '').strip()
+        if value:
+            records = records.filter(**{field: value})
+    if cursor is not None:
+        records = records.filter(id__lt=cursor)
+    return records, limit
+
+
+def _with_edit_flags(data, record):
+    """Add the edit permission info (approval is resolved per record in the query)"""
+    edit_approved = record.is_submitted and record.edit_approved
+    data['can_edit'] = not record.is_submitted or edit_approved
+    data['edit_approved'] = edit_approved
+    return data
+
+
+def _records_page_response(records, has_more, serialized, etag):
+    """The GET /api/records JSON response for one loaded page of records"""
+    records_data = [
+        _with_edit_flags(serialized[record.pk], record)
+        for record in records if record.pk in serialized
+    ]
+    return _set_validators(JsonResponse({
+        'results': records_data,
+        'next_cursor': records[-1].id if has_more else None,
+    }), etag)
+
+
+def _record_header(data):
+    """QPRRecord header field values from the POST /api/records payload"""
+    status = data.get('status', 'Draft')
+    return {
+        'officeName': data.get('officeName', ''),
+        'officeCode': data.get('officeCode', ''),
+        'region': data.get('region', ''),
+        'quarter': data.get('quarter', ''),
+        'status': status,
+        'phone': data.get('phone', ''),
+        'email': data.get('email', ''),
+        # Set is_submitted based on status
+        'is_submitted': status == 'Submitted',
+    }
+
+
+def _save_record(user, data):
+    """
+    Create or update (when data has an id) one of the user's records with all
+    its sections, from the POST /api/records payload. Raises
+    QPRRecord.DoesNotExist for an id the user does not own.
+    """
+    record_id = data.get('id')
+    details = data.get('details', {})
+    header = _record_header(data)
+    
+    # Header and all sections are written together or not at all
+    with transaction.atomic():
+        if record_id:
+            # UPDATE existing record - check if user owns it
+            record = QPRRecord.objects.with_sections().get(pk=record_id, user=user)
+            changed = [field for field, value in header.items() if getattr(record, field) != value]
+            sections_written = _save_section_data(record, details)
+            if changed:
+                for field in changed:
+                    setattr(record, field, header[field])
+                record.save(update_fields=changed + ['updated_at'])
+            elif sections_written:
+                # Only sections changed: one version bump for all of them
+                record.bump_version()
+        
+            # If user is saving edits to a submitted record, delete the approved edit request
+            # This forces them to request edit approval again
+            if record.is_submitted:
+                ManagerRequest.objects.filter(
+                    hod=user,
+                    qpr_record=record,
+                    request_type='qpr',
+                    status='approved'
+                ).delete()
+        else:
+            # CREATE new record
+            record = QPRRecord.objects.create(user=user, **header)
+        
+            # Create related section data
+            _save_section_data(record, details, created=True)
+    return record
+
+
 @csrf_exempt
 def api_records(request):
     # Check if user is authenticated
@@ -169,86 +232,40 @@ def api_records(request):
         return JsonResponse({'error': 'Unauthorized'}, status=401)
     
     if request.method == 'GET':
-        # Return only records for the logged-in user
-        records = QPRRecord.objects.filter(user=request.user).order_by('-id')
-        records_data = []
-        for record in records:
-            data = serialize_qpr_record(record)
-            
-            # Add edit permission info
-            edit_approved = False
-            if record.is_submitted:
-                edit_approved = ManagerRequest.objects.filter(
-                    hod=request.user,
-                    request_type='qpr',
-                    status='approved'
-                ).exists()
-            
-            data['can_edit'] = not record.is_submitted or edit_approved
-            data['edit_approved'] = edit_approved
-            records_data.append(data)
+        try:
+            records, limit = _records_query(request, request.user)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        
+        # Answer revalidations with 304 before touching the record data
+        _, etag = _record_validators(records, request.user)
+        not_modified = _not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
         
-        return JsonResponse(records_data, safe=False)
+        # Fetch one extra row to know whether another page follows
+        records = list(records.order_by('-id')[:limit + 1])
+        has_more = len(records) > limit
+        records = records[:limit]
+        
+        # Section data comes from the serialized-record cache
+        serialized = cached_serialized_records(records, serialize_qpr_record)
+        return _records_page_response(records, has_more, serialized, etag)
 
     elif request.method == 'POST':
         try:
             # 1. Parse the JSON data from the request body
             data = json.loads(request.body)
             
-            # 2. Extract ID to see if we are Updating or Creating
-            record_id = data.get('id')
-            details = data.get('details', {})
-            
-            if record_id:
-                # UPDATE existing record - check if user owns it
-                record = QPRRecord.objects.get(pk=record_id, user=request.user)
-                record.officeName = data.get('officeName', '')
-                record.officeCode = data.get('officeCode', '')
-                record.region = data.get('region', '')
-                record.quarter = data.get('quarter', '')
-                record.status = data.get('status', 'Draft')
-                record.phone = data.get('phone', '')
-                record.email = data.get('email', '')
-                # Set is_submitted based on status
-                record.is_submitted = (record.status == 'Submitted')
-                record.save()
-                
-                # If user is saving edits to a submitted record, delete the approved edit request
-                # This forces them to request edit approval again
-                if record.is_submitted:
-                    ManagerRequest.objects.filter(
-                        hod=request.user,
-                        request_type='qpr',
-                        status='approved'
-                    ).delete()
-                
-                # Update or create related section data
-                _save_section_data(record, details)
-            else:
-                # CREATE new record
-                is_submitted = (data.get('status', 'Draft') == 'Submitted')
-                record = QPRRecord.objects.create(
-                    user=request.user,
-                    officeName=data.get('officeName', ''),
-                    officeCode=data.get('officeCode', ''),
-                    region=data.get('region', ''),
-                    quarter=data.get('quarter', ''),
-                    status=data.get('status', 'Draft'),
-                    phone=data.get('phone', ''),
-                    email=data.get('email', ''),
-                    is_submitted=is_submitted
-                )
-                
-                # Create related section data
-                _save_section_data(record, details)
+            # 2. Create or update the record and its sections
+            record = _save_record(request.user, data)
 
             return JsonResponse({'id': record.id, 'message': 'Saved successfully!'})
 
         except QPRRecord.DoesNotExist:
             return JsonResponse({'error': 'Record not found or access denied'}, status=404)
         except Exception as e:
-            # This prints the actual error to your terminal so you can see it
-            print("SERVER ERROR:", e)
+            logger.exception('Saving QPR record failed')
             return JsonResponse({'error': str(e)}, status=500)
 
     elif request.method == 'DELETE':
@@ -260,6 +277,32 @@ def api_records(request):
     return JsonResponse({'error': 'Invalid method'}, status=400)
 
 
+def _create_edit_request(requester, request_type, reason, qpr_record=None):
+    """
+    Create one edit request addressed to every Admin.
+    QPR edit requests are tied to qpr_record so an approval unlocks only it.
+    The request row holds the shared approval state; each Admin only gets a
+    ManagerRequestRecipient row. Returns None when there are no Admin users.
+    """
+    admin_ids = list(User.objects.filter(profile__role='admin').values_list('id', flat=True))
+    if not admin_ids:
+        return None
+    
+    with transaction.atomic():
+        manager_request = ManagerRequest.objects.create(
+            hod=requester,   # The person making the request
+            user=requester,  # The employee whose QPR/profile is to be edited
+            qpr_record=qpr_record,
+            request_type=request_type,
+            reason=reason
+        )
+        ManagerRequestRecipient.objects.bulk_create([
+            ManagerRequestRecipient(request=manager_request, recipient_id=admin_id)
+            for admin_id in admin_ids
+        ])
+    return manager_request
+
+
 @csrf_exempt
 def request_edit_api(request):
     """Handle requests to edit submitted QPR/Profile records"""
@@ -273,70 +316,38 @@ def request_edit_api(request):
             record_id = data.get('record_id')  # For QPR records
             reason = data.get('reason', '')
             
+            record = None
             if request_type == 'qpr':
                 # Get the QPR record
                 record = QPRRecord.objects.get(pk=record_id, user=request.user)
-                
-                # Get admin user(s) - only Admin approves/rejects edit requests
-                admin_users = User.objects.filter(profile__role='admin')
-                
-                if not admin_users.exists():
-                    return JsonResponse({
-                        'success': False,
-                        'error': 'No Admin users found in the system'
-                    }, status=400)
-                
-                # Create a request for each admin recipient (only Admin approves)
-                for admin_user in admin_users:
-                    ManagerRequest.objects.create(
-                        hod=request.user,  # The person making the request
-                        user=admin_user,   # The Admin receiving it
-                        request_type='qpr',
-                        reason=f"Edit request for QPR ({record.officeName} - {record.quarter}): {reason}"
-                    )
-                
-                return JsonResponse({
-                    'success': True,
-                    'message': f'Request sent to Admin for approval'
-                })
-            
+                reason = f"Edit request for QPR ({record.officeName} - {record.quarter}): {reason}"
             elif request_type == 'profile':
-                # Get admin user(s) - only Admin approves/rejects edit requests
-                admin_users = User.objects.filter(profile__role='admin')
-                
-                if not admin_users.exists():
-                    return JsonResponse({
-                        'success': False,
-                        'error': 'No Admin users found in the system'
-                    }, status=400)
-                
-                # Create a request for each admin recipient
-                for admin_user in admin_users:
-                    ManagerRequest.objects.create(
-                        hod=request.user,  # The person making the request
-                        user=admin_user,   # The Admin receiving it
-                        request_type='profile',
-                        reason=f"Edit request for profile: {reason}"
-                    )
-                
-                return JsonResponse({
-                    'success': True,
-                    'message': f'Request sent to Admin for approval'
-                })
-            
+                reason = f"Edit request for profile: {reason}"
             else:
                 return JsonResponse({
                     'success': False,
                     'error': 'Invalid request type'
                 }, status=400)
             
+            # Only Admin approves/rejects edit requests
+            if not _create_edit_request(request.user, request_type, reason, qpr_record=record):
+                return JsonResponse({
+                    'success': False,
+                    'error': 'No Admin users found in the system'
+                }, status=400)
+            
+            return JsonResponse({
+                'success': True,
+                'message': 'Request sent to Admin for approval'
+            })
+            
         except QPRRecord.DoesNotExist:
             return JsonResponse({
                 'success': False,
                 'error': 'Record not found'
             }, status=404)
         except Exception as e:
-            print("SERVER ERROR:", e)
+            logger.exception('Creating edit request failed')
             return JsonResponse({
                 'success': False,
                 'error': str(e)
@@ -345,120 +356,41 @@ def request_edit_api(request):
     return JsonResponse({'error': 'Invalid method'}, status=400)
 
 
-def _save_section_data(record, details):
+def _save_section_data(record, details, created=False):
     """
     Helper function to save all section data from the details dictionary.
-    Uses get_or_create for each section to handle both new and existing records.
+    Missing sections are inserted; existing sections are diffed against the
+    loaded rows and only written when a value changed. For updates, load the
+    record with QPRRecord.objects.with_sections() so the existing rows come
+    from the same query. Call inside transaction.atomic(). The section writes
+    skip their own version bump: the caller moves the record to a new version
+    once, with its header save or record.bump_version(). Returns whether any
+    section row was written.
     """
-    # Section 1
-    section1, _ = Section1FilesData.objects.get_or_create(qpr_record=record)
-    section1.total_files = _convert_to_int(details.get('s1_total'))
-    section1.hindi_files = _convert_to_int(details.get('s1_hindi'))
-    section1.save()
-    
-    # Section 2
-    section2, _ = Section2MeetingsData.objects.get_or_create(qpr_record=record)
-    section2.meetings_count = _convert_to_int(details.get('s2_meetings'))
-    section2.hindi_minutes = _convert_to_int(details.get('s2_minutes'))
-    section2.total_papers = _convert_to_int(details.get('s2_papers_total'))
-    section2.hindi_papers = _convert_to_int(details.get('s2_papers_hindi'))
-    section2.save()
-    
-    # Section 3
-    section3, _ = Section3OfficialLanguagesData.objects.get_or_create(qpr_record=record)
-    section3.total_documents = _convert_to_int(details.get('s3_total'))
-    section3.bilingual_documents = _convert_to_int(details.get('s3_bilingual'))
-    section3.english_only_documents = _convert_to_int(details.get('s3_english'))
-    section3.hindi_only_documents = _convert_to_int(details.get('s3_hindi_only'))
-    section3.save()
-    
-    # Section 4
-    section4, _ = Section4HindiLettersData.objects.get_or_create(qpr_record=record)
-    section4.total_letters = _convert_to_int(details.get('s4_total'))
-    section4.no_reply_letters = _convert_to_int(details.get('s4_no_reply'))
-    section4.replied_hindi_letters = _convert_to_int(details.get('s4_replied_hindi'))
-    section4.replied_english_letters = _convert_to_int(details.get('s4_replied_eng'))
-    section4.save()
-    
-    # Section 5
-    section5, _ = Section5EnglishRepliedHindiData.objects.get_or_create(qpr_record=record)
-    section5.region_a_english_letters = _convert_to_int(details.get('s5_total'))
-    section5.region_a_replied_hindi = _convert_to_int(details.get('s5_hindi'))
-    section5.region_a_replied_english = _convert_to_int(details.get('s5_english'))
-    section5.region_a_no_reply = _convert_to_int(details.get('s5_noreply'))
-    section5.save()
-    
-    # Section 6
-    section6, _ = Section6IssuedLettersData.objects.get_or_create(qpr_record=record)
-    section6.region_a_hindi_bilingual = _convert_to_int(details.get('s6_a_hindi'))
-    section6.region_a_english_only = _convert_to_int(details.get('s6_a_eng'))
-    section6.region_a_total = _convert_to_int(details.get('s6_a_total'))
-    section6.region_b_hindi_bilingual = _convert_to_int(details.get('s6_b_hindi'))
-    section6.region_b_english_only = _convert_to_int(details.get('s6_b_eng'))
-    section6.region_b_total = _convert_to_int(details.get('s6_b_total'))
-    section6.region_c_hindi_bilingual = _convert_to_int(details.get('s6_c_hindi'))
-    section6.region_c_english_only = _convert_to_int(details.get('s6_c_eng'))
-    section6.region_c_total = _convert_to_int(details.get('s6_c_total'))
-    section6.save()
-    
-    # Section 7 (Notings)
-    section7, _ = Section7NotingsData.objects.get_or_create(qpr_record=record)
-    section7.hindi_pages = _convert_to_int(details.get('s7_hindi'))
-    section7.english_pages = _convert_to_int(details.get('s7_eng'))
-    section7.total_pages = _convert_to_int(details.get('s7_total'))
-    section7.eoffice_notings = _convert_to_int(details.get('s7_eoffice'))
-    section7.save()
-    
-    # Section 8 (Workshops)
-    section8, _ = Section8WorkshopsData.objects.get_or_create(qpr_record=record)
-    section8.full_day_workshops = _convert_to_int(details.get('s8_workshops'))
-    section8.officers_trained = _convert_to_int(details.get('s8_officers'))
-    section8.employees_trained = _convert_to_int(details.get('s8_employees'))
-    section8.save()
-    
-    # Section 9 (Implementation Committee)
-    section9, _ = Section9ImplementationCommitteeData.objects.get_or_create(qpr_record=record)
-    section9.meeting_date = _convert_to_date(details.get('s9_date'))
-    section9.sub_committees_count = _convert_to_int(details.get('s9_sub_committees'))
-    section9.meetings_organized = _convert_to_int(details.get('s9_meetings_count'))
-    section9.agenda_hindi = details.get('s9_agenda_hindi', '')
-    section9.save()
-    
-    # Section 10 (Hindi Advisory)
-    section10, _ = Section10HindiAdvisoryData.objects.get_or_create(qpr_record=record)
-    section10.meeting_date = _convert_to_date(details.get('s10_date'))
-    section10.save()
-    
-    # Section 11 (Achievements)
-    section11, _ = Section11SpecificAchievementsData.objects.get_or_create(qpr_record=record)
-    section11.innovative_work = details.get('s12_1', '')
-    section11.special_events = details.get('s12_2', '')
-    section11.hindi_medium_works = details.get('s12_3', '')
-    section11.save()
-
-
-def _convert_to_int(value):
-    """Convert value to integer, handling empty strings and None"""
-    if value == '' or value is None:
-        return None
-    try:
-        return int(value)
-    except (ValueError, TypeError):
-        return None
-
-
-def _convert_to_date(value):
-    """Convert value to date, handling empty strings and None"""
-    if value == '' or value is None:
-        return None
-    try:
-        from datetime import datetime
-        # Handle ISO format dates
-        if isinstance(value, str):
-            return datetime.fromisoformat(value).date()
-        return value
-    except (ValueError, TypeError, AttributeError):
-        return None
+    written = False
+    for related_name, model, values in section_values(details):
+        section = None
+        if not created:
+            try:
+                section = getattr(record, related_name)
+            except ObjectDoesNotExist:
+                pass
+        
+        if section is None:
+            section = model(qpr_record=record, **values)
+            section._skip_version_bump = True
+            section.save()
+            written = True
+            continue
+        
+        changed = changed_fields(section, values)
+        if changed:
+            for field in changed:
+                setattr(section, field, values[field])
+            section._skip_version_bump = True
+            section.save(update_fields=changed + ['updated_at'])
+            written = True
+    return written
 
 
 def api_record_detail(request, record_id):
@@ -470,28 +402,35 @@ def api_record_detail(request, record_id):
         if not request.user.is_authenticated:
             return JsonResponse({'error': 'Unauthorized'}, status=401)
         
-        record = QPRRecord.objects.get(pk=record_id, user=request.user)
-        data = serialize_qpr_record(record)
+        record_count, etag = _record_validators(
+            QPRRecord.objects.filter(pk=record_id, user=request.user), request.user
+        )
+        if not record_count:
+            raise QPRRecord.DoesNotExist
+        not_modified = _not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
         
-        # Check if user has an approved edit request for this record
-        edit_approved = False
-        if record.is_submitted:
-            # Look for an approved edit request FROM this user (sent TO admin)
-            edit_approved = ManagerRequest.objects.filter(
-                hod=request.user,
-                request_type='qpr',
-                status='approved'
-            ).exists()
+        record = QPRRecord.objects.with_edit_approval().get(pk=record_id, user=request.user)
+        data = cached_serialized_records([record], serialize_qpr_record).get(record.pk)
+        if data is None:
+            raise QPRRecord.DoesNotExist
         
         # Add edit permission info to response
-        data['can_edit'] = not record.is_submitted or edit_approved
-        data['edit_approved'] = edit_approved
-        
-        return JsonResponse(data, safe=False)
+        return _set_validators(JsonResponse(_with_edit_flags(data, record), safe=False), etag)
     except QPRRecord.DoesNotExist:
         return JsonResponse({'error': 'Record not found or access denied'}, status=404)
 
 
+def api_session(request):
+    """Cheap authentication probe for the frontend; no record data is loaded"""
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Unauthorized'}, status=401)
+    response = JsonResponse({'authenticated': True, 'employee_code': request.user.username})
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
+
 def login_view(request):
     """Handle user login with employee code and role"""
     if request.method == 'POST':
@@ -711,6 +650,19 @@ def user_dashboard(request):
 
 # ==================== HOD VIEWS ====================
 
+def _hod_stats(hod_name):
+    """Completion counts of the users under a HOD, from the rollup table"""
+    stats = hod_rollup_for(hod_name)
+    total_users = stats.total_users if stats else 0
+    qpr_submitted_count = stats.submitted if stats else 0
+    return {
+        'total_users': total_users,
+        'qpr_submitted': qpr_submitted_count,
+        'qpr_pending': total_users - qpr_submitted_count,
+        'profile_updated': stats.profiles_complete if stats else 0,
+    }
+
+
 @login_required(login_url='login_view')
 def hod_dashboard(request):
     """HOD dashboard showing people under them and QPR status"""
@@ -720,92 +672,79 @@ def hod_dashboard(request):
     
     hod_name = request.user.profile.hod_name
     
-    # Get all users under this HOD
-    users_under_hod = UserProfile.objects.filter(
-        role='user',
-        hod_name=hod_name
-    )
-    
-    total_users = users_under_hod.count()
-    
-    # Count QPR submitted
-    qpr_submitted_count = 0
-    profile_updated_count = 0
-    
-    for user_profile in users_under_hod:
-        if user_profile.user.qpr_records.filter(is_submitted=True).exists():
-            qpr_submitted_count += 1
-        if user_profile.profile_updated:
-            profile_updated_count += 1
-    
-    qpr_pending = total_users - qpr_submitted_count
-    
     context = {
-        'total_users': total_users,
-        'qpr_submitted': qpr_submitted_count,
-        'qpr_pending': qpr_pending,
-        'profile_updated': profile_updated_count,
-        'hod_name': hod_name
+        # Completion counts from the rollup table, read only when the cached fragment is stale
+        'stats': SimpleLazyObject(lambda: _hod_stats(hod_name)),
+        'hod_name': hod_name,
+        'fragment_version': group_fragment_version(hod_name),
     }
     return render(request, 'hod_dashboard.html', context)
 
 
-@login_required(login_url='login_view')
-def hod_detail_list(request):
-    """List all users under HOD with their completion status"""
-    if request.user.profile.role != 'hod':
-        messages.error(request, 'Access denied. HOD only.')
-        return redirect('/')
-    
-    hod_name = request.user.profile.hod_name
-    
-    # Get all users under this HOD
-    users_under_hod = UserProfile.objects.filter(
+def _hod_group_users(hod_name):
+    """
+    Users under a HOD, each annotated with the office of their latest QPR
+    record and whether they have submitted one, so the HOD pages need no
+    per-user queries. The group and the submissions are matched as the
+    rollup counts them (hod_name in any case, status='Submitted'), so the
+    dashboard totals always match these rows.
+    """
+    latest_record = QPRRecord.objects.filter(user=OuterRef('user')).order_by('-id')
+    return UserProfile.objects.filter(
         role='user',
-        hod_name=hod_name
-    ).select_related('user')
+        hod_name__iexact=hod_name
+    ).select_related('user').annotate(
+        latest_office_code=Subquery(latest_record.values('officeCode')[:1]),
+        latest_office_name=Subquery(latest_record.values('officeName')[:1]),
+        has_submitted_qpr=Exists(QPRRecord.objects.filter(user=OuterRef('user'), status='Submitted')),
+    )
+
+
+def _hod_detail_rows(hod_name):
+    """Rows of the HOD detail list: every user of the group with completion status"""
+    # Users under this HOD with office and status flags resolved in the same query
+    pending_edit_request = ManagerRequest.objects.filter(
+        hod=OuterRef('user'),
+        request_type='qpr',
+        status='pending'
+    )
+    users_under_hod = _hod_group_users(hod_name).annotate(
+        has_pending_edit_request=Exists(pending_edit_request)
+    )
     
     users_data = []
     for user_profile in users_under_hod:
         user = user_profile.user
-        qpr_records = user.qpr_records.all()
-        
-        # Get office code and name from first submitted QPR
-        office_code = ''
-        office_name = ''
-        
-        if qpr_records.exists():
-            first_qpr = qpr_records.first()
-            office_code = first_qpr.officeCode
-            office_name = first_qpr.officeName
-        
-        # Check completion status
-        profile_complete = user_profile.profile_updated
-        qpr_complete = qpr_records.filter(is_submitted=True).exists()
-        
-        # Check if this user has a pending edit request (sent to Admin)
-        has_pending_edit_request = ManagerRequest.objects.filter(
-            hod=user,
-            request_type='qpr',
-            status='pending'
-        ).exists()
         
         users_data.append({
             'profile': user_profile,
             'user': user,
             'employee_code': user_profile.employee_code,
             'name': user_profile.name or 'Not Set',
-            'office_code': office_code,
-            'office_name': office_name,
-            'profile_complete': profile_complete,
-            'qpr_complete': qpr_complete,
+            'office_code': user_profile.latest_office_code or '',
+            'office_name': user_profile.latest_office_name or '',
+            'profile_complete': user_profile.profile_updated,
+            'qpr_complete': user_profile.has_submitted_qpr,
             'email': user.email,
-            'has_pending_edit_request': has_pending_edit_request,
+            'has_pending_edit_request': user_profile.has_pending_edit_request,
         })
+    return users_data
+
+
+@login_required(login_url='login_view')
+def hod_detail_list(request):
+    """List all users under HOD with their completion status"""
+    if request.user.profile.role != 'hod':
+        messages.error(request, 'Access denied. HOD only.')
+        return redirect('/')
+    
+    hod_name = request.user.profile.hod_name
     
     context = {
-        'users_data': users_data,
-        'hod_name': hod_name
+        # Built only when the cached table fragment is stale
+        'users_data': SimpleLazyObject(lambda: _hod_detail_rows(hod_name)),
+        'hod_name': hod_name,
+        'fragment_version': group_fragment_version(hod_name),
     }
     return render(request, 'hod_detail_list.html', context)
 
@@ -841,37 +780,18 @@ def hod_manager_requests(request):
     
     hod_name = request.user.profile.hod_name
     
-    # Get all users under this HOD
-    users_under_hod = UserProfile.objects.filter(
-        role='user',
-        hod_name=hod_name
-    ).select_related('user')
-    
     users_data = []
-    for user_profile in users_under_hod:
+    for user_profile in _hod_group_users(hod_name):
         user = user_profile.user
-        qpr_records = user.qpr_records.all()
-        
-        # Get office code and name
-        office_code = ''
-        office_name = ''
-        if qpr_records.exists():
-            first_qpr = qpr_records.first()
-            office_code = first_qpr.officeCode
-            office_name = first_qpr.officeName
-        
-        # Check completion status
-        profile_complete = user_profile.profile_updated
-        qpr_complete = qpr_records.filter(is_submitted=True).exists()
         
         users_data.append({
             'user': user,
             'employee_code': user_profile.employee_code,
             'name': user_profile.name or 'Not Set',
-            'office_code': office_code,
-            'office_name': office_name,
-            'profile_complete': profile_complete,
-            'qpr_complete': qpr_complete,
+            'office_code': user_profile.latest_office_code or '',
+            'office_name': user_profile.latest_office_name or '',
+            'profile_complete': user_profile.profile_updated,
+            'qpr_complete': user_profile.has_submitted_qpr,
         })
     
     context = {
@@ -883,15 +803,29 @@ def hod_manager_requests(request):
 
 # ==================== ADMIN/MANAGER VIEWS ====================
 
-@login_required(login_url='login_view')
-def admin_dashboard(request):
-    if request.user.profile.role != 'admin':
-        return redirect('login_view')
+def _hod_stats_row(display_name, stats, employee_code):
+    """Build one admin dashboard table row from a HODSubmissionRollup row"""
+    total_users = stats.total_users if stats else 0
+    profile_complete = stats.profiles_complete if stats else 0
+    qpr_complete = stats.submitted if stats else 0
+    completion_pct = int((qpr_complete / total_users) * 100) if total_users > 0 else 0
+    return {
+        'hod_name': str(display_name).upper(),
+        'total_users': total_users,
+        'profile_complete': profile_complete,
+        'qpr_complete': qpr_complete,
+        'completion_pct': completion_pct,
+        'employee_code': employee_code,
+    }
 
+
+def _admin_hod_rows():
+    """Statistics rows of the admin dashboard: HOD groups, uncovered hod_names, own HODs"""
     hod_data = []
+    group_stats = hod_rollup_totals()
     
     # Get all HODs with role='hod' and display them with their stats
-    hods = UserProfile.objects.filter(role='hod').order_by('name')
+    hods = list(UserProfile.objects.filter(role='hod').order_by('name'))
     
     for hod_profile in hods:
         # Use hod_name as the key to match users
@@ -900,70 +834,19 @@ def admin_dashboard(request):
         # Display name for the table
         hod_display = hod_profile.name or hod_key or 'UNKNOWN'
         
-        # Find users assigned to this HOD (case-insensitive)
-        users_under_hod = UserProfile.objects.filter(
-            role='user',
-            hod_name__iexact=hod_key
-        )
-        
-        total_users = users_under_hod.count()
-        profile_complete = sum(1 for p in users_under_hod if p.profile_updated)
-        qpr_complete = sum(
-            1 for p in users_under_hod
-            if QPRRecord.objects.filter(user=p.user, status='Submitted').exists()
-        )
-        
-        completion_pct = int((qpr_complete / total_users) * 100) if total_users > 0 else 0
-        
-        hod_data.append({
-            'hod_name': str(hod_display).upper(),
-            'total_users': total_users,
-            'profile_complete': profile_complete,
-            'qpr_complete': qpr_complete,
-            'completion_pct': completion_pct,
-            'employee_code': hod_profile.employee_code,
-        })
+        # Users assigned to this HOD (case-insensitive)
+        stats = group_stats.get(hod_key.lower()) if hod_key is not None else None
+        hod_data.append(_hod_stats_row(hod_display, stats, hod_profile.employee_code))
     
-    # Also add HOD groups for all unique hod_name values in users (even if no actual HOD exists)
-    all_users = UserProfile.objects.filter(role='user')
-    
-    # Get unique hod_name values from users (excluding None)
-    unique_hod_names = set()
-    for user in all_users:
-        if user.hod_name:  # Non-null hod_name
-            unique_hod_names.add(user.hod_name)
-    
-    # Remove hod_name values that are already covered by actual HODs
-    actual_hod_names = set(UserProfile.objects.filter(role='hod').values_list('hod_name', flat=True))
-    uncovered_hod_names = unique_hod_names - actual_hod_names
-    
-    # Add stats for uncovered HOD names
-    for hod_name in sorted(uncovered_hod_names):
-        users_under_hod = UserProfile.objects.filter(
-            role='user',
-            hod_name__iexact=hod_name
-        )
-        
-        total_users = users_under_hod.count()
-        profile_complete = sum(1 for p in users_under_hod if p.profile_updated)
-        qpr_complete = sum(
-            1 for p in users_under_hod
-            if QPRRecord.objects.filter(user=p.user, status='Submitted').exists()
-        )
-        
-        completion_pct = int((qpr_complete / total_users) * 100) if total_users > 0 else 0
-        
-        hod_data.append({
-            'hod_name': str(hod_name).upper(),
-            'total_users': total_users,
-            'profile_complete': profile_complete,
-            'qpr_complete': qpr_complete,
-            'completion_pct': completion_pct,
-            'employee_code': '',  # No employee code for uncovered HOD names
-        })
+    # Also add HOD groups for hod_name values in users that no actual HOD covers
+    # Add stats for uncovered HOD names (no employee code for uncovered HOD names)
+    for hod_name in sorted(uncovered_hod_names()):
+        hod_data.append(_hod_stats_row(hod_name, group_stats.get(hod_name.lower()), ''))
     
     # Add each user who is their own HOD (hod_name=None)
-    own_hods = UserProfile.objects.filter(role='user', hod_name__isnull=True).order_by('user__first_name')
+    own_hods = UserProfile.objects.filter(
+        role='user', hod_name__isnull=True
+    ).select_related('user').order_by('user__first_name')
     
     for user in own_hods:
         # Each such user is treated as their own HOD with 0 employees
@@ -975,13 +858,21 @@ def admin_dashboard(request):
             'qpr_complete': 0,
             'completion_pct': 0,
         })
+    return hod_data
+
+
+@login_required(login_url='login_view')
+def admin_dashboard(request):
+    if request.user.profile.role != 'admin':
+        return redirect('login_view')
 
-    # Get only pending requests FROM USERS (not from HODs)
+    # Get only pending requests FROM USERS (not from HODs) addressed to this admin
     # Filter where the 'hod' field (requester) has role='user'
     pending_requests = ManagerRequest.objects.filter(
         status='pending',
-        hod__profile__role='user'  # Request is FROM a user
-    ).select_related('hod', 'user')
+        hod__profile__role='user',  # Request is FROM a user
+        recipients__recipient=request.user
+    ).select_related('hod__profile', 'user__profile')
 
     manager_requests = [
         {
@@ -996,9 +887,10 @@ def admin_dashboard(request):
     ]
 
     context = {
-        'hod_data': hod_data,
+        # Built only when the cached HOD statistics fragments are stale
+        'hod_data': SimpleLazyObject(_admin_hod_rows),
         'manager_requests': manager_requests,
-        'total_hods': len(hod_data),
+        'fragment_version': all_groups_fragment_version(),
     }
 
     return render(request, 'admin_dashboard.html', context)
@@ -1032,66 +924,67 @@ def admin_approve_request(request, request_id):
         messages.error(request, 'Request not found')
         return redirect('admin_dashboard')# New view functions to add to views.py
 
-@login_required(login_url='login_view')
-def admin_employee_list(request):
-    """Admin view to see all employees organized by HOD"""
-    if request.user.profile.role != 'admin':
-        messages.error(request, 'Access denied. Admin only.')
-        return redirect('/')
-    
-    # Get filter parameters
-    employee_code_filter = request.GET.get('employee_code', '').strip()
-    name_filter = request.GET.get('name', '').strip()
-    quarter_filter = request.GET.get('quarter', '').strip()
-    year_filter = request.GET.get('year', '').strip()
+def _employee_row(user_profile, latest_qpr):
+    """Build one employee row for the admin employee list"""
+    return {
+        'emp_code': user_profile.employee_code,
+        'name': user_profile.display_name,
+        'email': user_profile.user.email,
+        'office_name': user_profile.office_name or (latest_qpr.officeName if latest_qpr else 'Not Set'),
+        'office_code': user_profile.office_code or (latest_qpr.officeCode if latest_qpr else 'Not Set'),
+        'quarter': latest_qpr.quarter if latest_qpr else 'Not Set',
+        'year': latest_qpr.year if latest_qpr else 'Not Set',
+        'qpr_status': latest_qpr.status if latest_qpr else 'Not Submitted',
+    }
+
+
+def _employee_groups(employee_code_filter, name_filter, quarter_filter, year_filter):
+    """Employees of the admin employee list grouped by HOD, filters applied"""
+    # Fetch all users with their display name and latest QPR id, filters applied in SQL
+    latest_qpr = QPRRecord.objects.filter(user=OuterRef('user')).order_by('-id')
+    users = UserProfile.objects.filter(role='user').select_related('user').annotate(
+        display_name=Coalesce(
+            NullIf('name', Value('')),
+            NullIf(Trim(Concat('user__first_name', Value(' '), 'user__last_name')), Value('')),
+            'user__username',
+        ),
+        latest_qpr_id=Subquery(latest_qpr.values('id')[:1]),
+    ).order_by('name', 'id')
+    
+    if employee_code_filter:
+        users = users.filter(employee_code__icontains=employee_code_filter)
+    if name_filter:
+        users = users.filter(display_name__icontains=name_filter)
+    if quarter_filter:
+        users = users.annotate(
+            latest_quarter=Subquery(latest_qpr.values('quarter')[:1])
+        ).filter(latest_quarter__icontains=quarter_filter)
+    if year_filter:
+        users = users.annotate(
+            latest_year=Subquery(latest_qpr.values('year')[:1])
+        ).filter(latest_year=year_filter)
+    
+    users = list(users)
+    latest_qprs = QPRRecord.objects.only(
+        'officeName', 'officeCode', 'quarter', 'year', 'status'
+    ).in_bulk([p.latest_qpr_id for p in users if p.latest_qpr_id])
+    
+    # Group the filtered users in one pass: by exact hod_name for HOD groups,
+    # and by lower-cased hod_name for the case-insensitive uncovered groups
+    users_by_hod_name = defaultdict(list)
+    users_by_hod_key = defaultdict(list)
+    for user_profile in users:
+        row = _employee_row(user_profile, latest_qprs.get(user_profile.latest_qpr_id))
+        users_by_hod_name[user_profile.hod_name].append(row)
+        if user_profile.hod_name:
+            users_by_hod_key[user_profile.hod_name.lower()].append(row)
     
     # Get all HODs with role='hod' and their users
-    hods = UserProfile.objects.filter(role='hod').order_by('name')
+    hods = UserProfile.objects.filter(role='hod').select_related('user').order_by('name')
     
     hod_groups = []
     for hod_profile in hods:
-        users_under_hod = UserProfile.objects.filter(
-            role='user',
-            hod_name=hod_profile.hod_name
-        ).order_by('name')
-        
-        # Build user data with QPR status
-        user_details = []
-        for user_profile in users_under_hod:
-            # Apply employee code filter
-            if employee_code_filter and employee_code_filter.lower() not in user_profile.employee_code.lower():
-                continue
-            
-            # Apply name filter
-            if name_filter:
-                user_name = user_profile.name or user_profile.user.get_full_name() or user_profile.user.username
-                if name_filter.lower() not in user_name.lower():
-                    continue
-            
-            qpr_records = QPRRecord.objects.filter(user=user_profile.user).order_by('-id')
-            latest_qpr = qpr_records.first() if qpr_records else None
-            
-            # Apply quarter filter
-            if quarter_filter:
-                if not latest_qpr or quarter_filter.lower() not in (latest_qpr.quarter or '').lower():
-                    continue
-            
-            # Apply year filter
-            if year_filter:
-                if not latest_qpr or year_filter != (latest_qpr.year or ''):
-                    continue
-            
-            user_details.append({
-                'emp_code': user_profile.employee_code,
-                'name': user_profile.name or user_profile.user.get_full_name() or user_profile.user.username,
-                'email': user_profile.user.email,
-                'office_name': user_profile.office_name or (latest_qpr.officeName if latest_qpr else 'Not Set'),
-                'office_code': user_profile.office_code or (latest_qpr.officeCode if latest_qpr else 'Not Set'),
-                'quarter': latest_qpr.quarter if latest_qpr else 'Not Set',
-                'year': latest_qpr.year if latest_qpr else 'Not Set',
-                'qpr_status': latest_qpr.status if latest_qpr else 'Not Submitted',
-            })
-        
+        user_details = users_by_hod_name.get(hod_profile.hod_name)
         if user_details:  # Only show HOD group if has users after filtering
             hod_groups.append({
                 'hod_name': hod_profile.hod_name,
@@ -1101,63 +994,10 @@ def admin_employee_list(request):
                 'users': user_details
             })
     
-    # Also add HOD groups for all unique hod_name values in users (even if no actual HOD exists)
-    all_users = UserProfile.objects.filter(role='user')
-    
-    # Get unique hod_name values from users (excluding None)
-    unique_hod_names = set()
-    for user in all_users:
-        if user.hod_name:  # Non-null hod_name
-            unique_hod_names.add(user.hod_name)
-    
-    # Remove hod_name values that are already covered by actual HODs
-    actual_hod_names = set(UserProfile.objects.filter(role='hod').values_list('hod_name', flat=True))
-    uncovered_hod_names = unique_hod_names - actual_hod_names
-    
+    # Also add HOD groups for hod_name values in users that no actual HOD covers
     # Add groups for uncovered HOD names
-    for hod_name in sorted(uncovered_hod_names):
-        users_under_hod = UserProfile.objects.filter(
-            role='user',
-            hod_name__iexact=hod_name
-        ).order_by('name')
-        
-        # Build user data with QPR status
-        user_details = []
-        for user_profile in users_under_hod:
-            # Apply employee code filter
-            if employee_code_filter and employee_code_filter.lower() not in user_profile.employee_code.lower():
-                continue
-            
-            # Apply name filter
-            if name_filter:
-                user_name = user_profile.name or user_profile.user.get_full_name() or user_profile.user.username
-                if name_filter.lower() not in user_name.lower():
-                    continue
-            
-            qpr_records = QPRRecord.objects.filter(user=user_profile.user).order_by('-id')
-            latest_qpr = qpr_records.first() if qpr_records else None
-            
-            # Apply quarter filter
-            if quarter_filter:
-                if not latest_qpr or quarter_filter.lower() not in (latest_qpr.quarter or '').lower():
-                    continue
-            
-            # Apply year filter
-            if year_filter:
-                if not latest_qpr or year_filter != (latest_qpr.year or ''):
-                    continue
-            
-            user_details.append({
-                'emp_code': user_profile.employee_code,
-                'name': user_profile.name or user_profile.user.get_full_name() or user_profile.user.username,
-                'email': user_profile.user.email,
-                'office_name': user_profile.office_name or (latest_qpr.officeName if latest_qpr else 'Not Set'),
-                'office_code': user_profile.office_code or (latest_qpr.officeCode if latest_qpr else 'Not Set'),
-                'quarter': latest_qpr.quarter if latest_qpr else 'Not Set',
-                'year': latest_qpr.year if latest_qpr else 'Not Set',
-                'qpr_status': latest_qpr.status if latest_qpr else 'Not Submitted',
-            })
-        
+    for hod_name in sorted(uncovered_hod_names()):
+        user_details = users_by_hod_key.get(hod_name.lower())
         if user_details:
             hod_groups.append({
                 'hod_name': hod_name,
@@ -1168,56 +1008,214 @@ def admin_employee_list(request):
             })
     
     # Also add users who are their own HOD (hod_name=None)
-    own_hods = UserProfile.objects.filter(role='user', hod_name__isnull=True).order_by('user__first_name')
-    for user_profile in own_hods:
-        # Apply employee code filter
-        if employee_code_filter and employee_code_filter.lower() not in user_profile.employee_code.lower():
-            continue
+    # Quarter filter doesn't apply to own HODs (they have no users)
+    if not quarter_filter:
+        own_hods = UserProfile.objects.filter(
+            role='user', hod_name__isnull=True
+        ).select_related('user').annotate(
+            own_name=Coalesce(NullIf('user__first_name', Value('')), NullIf('name', Value('')), 'employee_code'),
+        ).order_by('user__first_name')
         
-        # Apply name filter
+        if employee_code_filter:
+            own_hods = own_hods.filter(employee_code__icontains=employee_code_filter)
         if name_filter:
-            user_name = user_profile.user.first_name or user_profile.name or user_profile.employee_code
-            if name_filter.lower() not in user_name.lower():
-                continue
-        
-        # Quarter filter doesn't apply to own HODs (they have no users)
-        if quarter_filter:
-            continue
+            own_hods = own_hods.filter(own_name__icontains=name_filter)
         
-        hod_groups.append({
-            'hod_name': user_profile.user.first_name or user_profile.name or user_profile.employee_code,
-            'hod_email': user_profile.user.email,
-            'hod_emp_code': user_profile.employee_code,
-            'user_count': 0,
-            'users': []
-        })
-    
-    # Get all unique quarters for the dropdown
-    all_quarters = set()
-    for qpr in QPRRecord.objects.values_list('quarter', flat=True).distinct():
-        if qpr:
-            all_quarters.add(qpr)
-    all_quarters = sorted(list(all_quarters))
+        for user_profile in own_hods:
+            hod_groups.append({
+                'hod_name': user_profile.own_name,
+                'hod_email': user_profile.user.email,
+                'hod_emp_code': user_profile.employee_code,
+                'user_count': 0,
+                'users': []
+            })
+    return hod_groups
+
+
+def _record_values(field):
+    """Sorted distinct non-empty values of a QPRRecord field, for the filter dropdowns"""
+    return sorted(
+        value for value in QPRRecord.objects.order_by().values_list(field, flat=True).distinct() if value
+    )
+
+
+@login_required(login_url='login_view')
+def admin_employee_list(request):
+    """Admin view to see all employees organized by HOD"""
+    if request.user.profile.role != 'admin':
+        messages.error(request, 'Access denied. Admin only.')
+        return redirect('/')
     
-    # Get all unique years for the dropdown
-    all_years = set()
-    for qpr in QPRRecord.objects.values_list('year', flat=True).distinct():
-        if qpr:
-            all_years.add(qpr)
-    all_years = sorted(list(all_years))
+    # Get filter parameters
+    employee_code_filter = request.GET.get('employee_code', '').strip()
+    name_filter = request.GET.get('name', '').strip()
+    quarter_filter = request.GET.get('quarter', '').strip()
+    year_filter = request.GET.get('year', '').strip()
     
     context = {
-        'hod_groups': hod_groups,
+        # Built only when the cached fragments that display them are stale
+        'hod_groups': SimpleLazyObject(lambda: _employee_groups(
+            employee_code_filter, name_filter, quarter_filter, year_filter
+        )),
         'employee_code_filter': employee_code_filter,
         'name_filter': name_filter,
         'quarter_filter': quarter_filter,
         'year_filter': year_filter,
-        'all_quarters': all_quarters,
-        'all_years': all_years
+        'all_quarters': SimpleLazyObject(lambda: _record_values('quarter')),
+        'all_years': SimpleLazyObject(lambda: _record_values('year')),
+        'fragment_version': all_groups_fragment_version(),
     }
     return render(request, 'admin_employee_list.html', context)
 
 
+@login_required(login_url='login_view')
+def admin_export_records(request):
+    """
+    Admin download of all QPR records with every section flattened into columns.
+    GET streams the file; POST (the export buttons) queues it as a background
+    job and returns the job's status URL, to download from once it is done.
+    POST format=pdf queues a ZIP of the PDF reports of the submitted records
+    of one quarter instead.
+    """
+    if request.user.profile.role != 'admin':
+        messages.error(request, 'Access denied. Admin only.')
+        return redirect('/')
+    
+    params = request.POST if request.method == 'POST' else request.GET
+    export_format = params.get('format', 'csv').strip().lower()
+    filters = {
+        'quarter': params.get('quarter', '').strip(),
+        'year': params.get('year', '').strip(),
+        'hod_name': params.get('hod', '').strip(),
+    }
+    if request.method == 'POST' and export_format == 'pdf':
+        if not filters['quarter']:
+            return JsonResponse({'error': 'Choose a quarter to export as PDF'}, status=400)
+        job = enqueue('quarter_pdfs', {'quarter': filters['quarter'], 'year': filters['year']}, request.user)
+    elif export_format not in ('csv', 'xlsx'):
+        return JsonResponse({'error': 'format must be csv or xlsx'}, status=400)
+    elif request.method == 'POST':
+        job = enqueue('export_records', dict(filters, export_format=export_format), request.user)
+    
+    if request.method == 'POST':
+        return JsonResponse({
+            'job_id': job.pk,
+            'status_url': reverse('api_job_status', args=[job.pk]),
+        }, status=202)
+    
+    records = export_queryset(**filters)
+    if export_format == 'xlsx':
+        return FileResponse(
+            write_xlsx(records),
+            as_attachment=True,
+            filename='qpr_records.xlsx',
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+    response = StreamingHttpResponse(iter_csv(records), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = 'attachment; filename="qpr_records.csv"'
+    return response
+
+
+@login_required(login_url='login_view')
+def report_pdf(request, record_id):
+    """
+    The PDF of a QPR record, for its owner or an Admin. Submitted records are
+    rendered once and then served from the PDF cache.
+    """
+    records = pdf_queryset().filter(pk=record_id)
+    if not UserProfile.objects.filter(user=request.user, role='admin').exists():
+        records = records.filter(user=request.user)
+    record = records.first()
+    if record is None:
+        return JsonResponse({'error': 'Record not found or access denied'}, status=404)
+    return FileResponse(
+        record_pdf(record),
+        as_attachment=request.GET.get('download') == '1',
+        filename=pdf_file_name(record),
+        content_type='application/pdf',
+    )
+
+
+@login_required(login_url='login_view')
+def admin_import_records(request):
+    """
+    Admin upload of QPR records from a CSV/XLSX/JSONL file, with a per-row error report.
+    The import runs as a background job; the page shows its progress and then its result.
+    """
+    if request.user.profile.role != 'admin':
+        messages.error(request, 'Access denied. Admin only.')
+        return redirect('/')
+    
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        if upload is None:
+            messages.error(request, 'Choose a file to import')
+            return render(request, 'admin_import_records.html', {})
+        try:
+            file_format = detect_format(upload.name)
+        except ImportFileError as e:
+            messages.error(request, str(e))
+            return render(request, 'admin_import_records.html', {})
+        job = enqueue('import_qpr_records', {
+            'upload': save_upload(upload),
+            'file_format': file_format,
+            'dry_run': bool(request.POST.get('dry_run')),
+            'file_name': upload.name,
+        }, request.user)
+        return redirect(f"{reverse('admin_import_records')}?job={job.pk}")
+    
+    context = {}
+    job_id = request.GET.get('job', '')
+    if job_id.isdigit():
+        job = Job.objects.filter(pk=job_id, kind='import_qpr_records').first()
+        if job is not None:
+            context['job'] = job_status(job)
+            if job.status == 'succeeded':
+                stats = job.result
+                context.update({
+                    'stats': stats,
+                    'dry_run': stats['dry_run'],
+                    'file_name': stats['file_name'],
+                    'skipped_rows': stats['skipped_rows'],
+                    'errors': stats['errors'],
+                    'hidden_errors': max(stats['error_count'] - IMPORT_REPORT_DISPLAY_LIMIT, 0),
+                })
+    return render(request, 'admin_import_records.html', context)
+
+
+@login_required(login_url='login_view')
+def api_job_status(request, job_id):
+    """Status and progress of a background job, polled by the admin pages"""
+    if request.user.profile.role != 'admin':
+        return JsonResponse({'error': 'Access denied. Admin only.'}, status=403)
+    try:
+        job = Job.objects.get(pk=job_id)
+    except Job.DoesNotExist:
+        return JsonResponse({'error': 'Job not found'}, status=404)
+    response = JsonResponse(job_status(job))
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@login_required(login_url='login_view')
+def admin_job_download(request, job_id):
+    """Download the file a finished background job produced (an export or an import error report)"""
+    if request.user.profile.role != 'admin':
+        messages.error(request, 'Access denied. Admin only.')
+        return redirect('/')
+    job = Job.objects.filter(pk=job_id, status='succeeded').exclude(result_file='').first()
+    if job is None:
+        return JsonResponse({'error': 'No file for this job'}, status=404)
+    path = job_file_path(job.result_file)
+    if not os.path.exists(path):
+        return JsonResponse({'error': 'The file of this job has been removed'}, status=410)
+    return FileResponse(
+        open(path, 'rb'),
+        as_attachment=True,
+        filename=job.result_file.removeprefix(f'job-{job.pk}-'),
+    )
+
+
 @login_required(login_url='login_view')
 def user_office_form(request):
     """User can update their office name and code"""
@@ -1358,10 +1356,8 @@ def api_update_hod(request):
                     'error': 'All fields required: old_hod_name, new_hod_name, old_employee_code, new_employee_code'
                 }, status=400)
             
-            # Find the HOD user profile
-            try:
-                hod_profile = UserProfile.objects.get(employee_code=old_employee_code, role='hod')
-            except UserProfile.DoesNotExist:
+            # Check the HOD exists now, so a mistyped code is reported at once
+            if not UserProfile.objects.filter(employee_code=old_employee_code, role='hod').exists():
                 return JsonResponse({
                     'success': False,
                     'error': f'HOD with employee code {old_employee_code} not found'
@@ -1375,29 +1371,22 @@ def api_update_hod(request):
                         'error': f'Employee code {new_employee_code} is already in use'
                     }, status=400)
             
-            # Update HOD profile
-            hod_profile.name = new_hod_name
-            hod_profile.hod_name = new_hod_name
-            hod_profile.employee_code = new_employee_code
-            hod_profile.user.username = new_employee_code  # Update Django User username
-            hod_profile.user.save()
-            hod_profile.save()
-            
-            # Update all users under this HOD (update their hod_name reference)
-            # Users under old HOD name should now reference new HOD name
-            UserProfile.objects.filter(
-                role='user',
-                hod_name__iexact=old_hod_name
-            ).update(hod_name=new_hod_name)
-            
+            # Renaming moves the whole group; it runs as a background job
+            job = enqueue('rename_hod', {
+                'old_hod_name': old_hod_name,
+                'new_hod_name': new_hod_name,
+                'old_employee_code': old_employee_code,
+                'new_employee_code': new_employee_code,
+            }, request.user)
             return JsonResponse({
                 'success': True,
-                'message': f'HOD updated successfully! {old_hod_name} → {new_hod_name}, {old_employee_code} → {new_employee_code}',
-                'new_hod_name': new_hod_name
-            })
+                'message': f'HOD update queued: {old_hod_name} → {new_hod_name}, {old_employee_code} → {new_employee_code}',
+                'job_id': job.pk,
+                'status_url': reverse('api_job_status', args=[job.pk]),
+            }, status=202)
         
         except Exception as e:
-            print(f"ERROR updating HOD: {e}")
+            logger.exception('Updating HOD failed')
             return JsonResponse({
                 'success': False,
                 'error': f'Server error: {str(e)}'
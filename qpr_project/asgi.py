@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'qpr_project.settings')
+# Serve the JSON API with the async views of qpr_app/async_api.py
+os.environ.setdefault('QPR_ASYNC_API', '1')
 
 application = get_asgi_application()
@@ -10,11 +10,19 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+from dotenv import load_dotenv
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Deployment specific values come from the environment or a .env file next
+# to manage.py (see .env.example); variables already set take precedence
+load_dotenv(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/6.0/howto/deployment/checklist/
@@ -23,9 +31,13 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-g!6hrpf$a)_s-4+@hhbwf%9@5ffjs%-sr35l!ztybad=di59gr'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('QPR_DEBUG', '1') == '1'
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [host for host in os.environ.get('QPR_ALLOWED_HOSTS', '').split(',') if host]
+
+# Route the JSON API to the async views in qpr_app/async_api.py. Set by
+# qpr_project/asgi.py, so it is on under uvicorn/daphne and off under WSGI
+QPR_ASYNC_API = os.environ.get('QPR_ASYNC_API') == '1'
 
 
 # Application definition
@@ -38,13 +50,16 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'whitenoise.runserver_nostatic',  # runserver serves static files like production
     'django.contrib.staticfiles',
     'rest_framework',
 ]
 
 MIDDLEWARE = [
+    'qpr_app.middleware.PerformanceMiddleware',  # First, so it times the whole stack
     'corsheaders.middleware.CorsMiddleware', 
     'django.middleware.security.SecurityMiddleware',
+    'qpr_app.middleware.AsyncWhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -69,6 +84,15 @@ TEMPLATES = [
         },
     },
 ]
+if not DEBUG:
+    # Compile each template once per process; development keeps reloading edited templates
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
 
 WSGI_APPLICATION = 'qpr_project.wsgi.application'
 
@@ -76,12 +100,95 @@ WSGI_APPLICATION = 'qpr_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Database: SQLite by default, PostgreSQL with QPR_DB_ENGINE=postgresql
+QPR_DB_ENGINE = os.environ.get('QPR_DB_ENGINE', 'sqlite')
+
+if QPR_DB_ENGINE == 'postgresql':
+    # Either Django's native psycopg pool (QPR_DB_POOL=1; the pool owns the
+    # connections, so CONN_MAX_AGE must be 0) or persistent connections kept
+    # open per worker for QPR_DB_CONN_MAX_AGE seconds. Under ASGI every
+    # request runs its queries in a thread of its own, so persistent
+    # connections would pile up: use the pool there
+    QPR_DB_POOL = os.environ.get('QPR_DB_POOL') == '1'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('QPR_DB_NAME', 'qpr'),
+            'USER': os.environ.get('QPR_DB_USER', 'qpr'),
+            'PASSWORD': os.environ.get('QPR_DB_PASSWORD', ''),
+            'HOST': os.environ.get('QPR_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('QPR_DB_PORT', '5432'),
+            'CONN_MAX_AGE': 0 if QPR_DB_POOL or QPR_ASYNC_API else int(os.environ.get('QPR_DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('QPR_DB_POOL_MIN_SIZE', 2)),
+                    'max_size': int(os.environ.get('QPR_DB_POOL_MAX_SIZE', 10)),
+                    'timeout': int(os.environ.get('QPR_DB_POOL_TIMEOUT', 10)),
+                },
+            } if QPR_DB_POOL else {},
+        }
+    }
+elif QPR_DB_ENGINE == 'sqlite':
+    # Concurrent saves from several gunicorn workers: WAL lets readers run
+    # alongside the single writer, writers wait up to busy_timeout for the
+    # lock instead of failing with "database is locked", and IMMEDIATE
+    # transactions take the write lock at BEGIN, so a transaction never has
+    # to upgrade a read lock half way (which fails without waiting).
+    # synchronous=NORMAL is durable in WAL mode except on power loss.
+    QPR_SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('QPR_SQLITE_BUSY_TIMEOUT_MS', 20000))
+    QPR_SQLITE_MMAP_SIZE = int(os.environ.get('QPR_SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('QPR_DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    f'PRAGMA busy_timeout={QPR_SQLITE_BUSY_TIMEOUT_MS};'
+                    'PRAGMA synchronous=NORMAL;'
+                    f'PRAGMA mmap_size={QPR_SQLITE_MMAP_SIZE};'
+                ),
+            },
+        }
     }
+else:
+    raise ImproperlyConfigured(f'QPR_DB_ENGINE must be sqlite or postgresql, not {QPR_DB_ENGINE!r}')
+
+
+# Caches
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# 'records' holds serialized QPR records keyed by (id, version). Local memory
+# is per process and evicts least recently used entries past MAX_ENTRIES; set
+# QPR_RECORD_CACHE_DIR to share one file-based cache between gunicorn workers.
+
+QPR_RECORD_CACHE_DIR = os.environ.get('QPR_RECORD_CACHE_DIR')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'records': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'qpr-records',
+        'TIMEOUT': None,  # Entries never go stale: a new version is a new key
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    # {% cache %} fragments of the HOD and admin pages (qpr_app/fragment_cache.py);
+    # keys carry the group version, so old fragments are only ever evicted
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'qpr-template-fragments',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
 }
+if QPR_RECORD_CACHE_DIR:
+    CACHES['records'].update({
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': QPR_RECORD_CACHE_DIR,
+    })
 
 
 # Password validation
@@ -123,6 +230,23 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'  # For production
 
+# Static files are served by WhiteNoise from the gunicorn workers. In
+# production `collectstatic` writes them with content hashes in their names
+# plus gzip and brotli variants, and WhiteNoise sends hashed files with
+# `Cache-Control: max-age=315360000, public, immutable`. Development serves
+# the files from static/ as they are, without a collectstatic step.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+
 # CORS SETTINGS - SECURITY: For production, specify allowed origins
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:8000',
@@ -137,9 +261,63 @@ CSRF_TRUSTED_ORIGINS = ['http://localhost:8000', 'http://127.0.0.1:8000']
 LOGIN_URL = 'login_view'
 LOGIN_REDIRECT_URL = '/'
 
+# Background jobs (qpr_app/jobs.py, run by `manage.py run_worker`): uploads
+# waiting to be imported and finished exports live here; the directory must
+# be shared by the web and worker processes
+QPR_JOB_FILES_DIR = os.environ.get('QPR_JOB_FILES_DIR', str(BASE_DIR / 'job_files'))
+
+# PDF reports (qpr_app/pdf_reports.py): rendered PDFs of submitted records are
+# kept here, one file per record version. The Hindi labels need a Devanagari
+# TrueType font (Debian/Ubuntu: fonts-noto-core); without it the PDFs are
+# English only
+QPR_PDF_CACHE_DIR = os.environ.get('QPR_PDF_CACHE_DIR', str(BASE_DIR / 'pdf_cache'))
+QPR_PDF_FONT = os.environ.get('QPR_PDF_FONT', '/usr/share/fonts/truetype/noto/NotoSansDevanagari-Regular.ttf')
+QPR_PDF_FONT_BOLD = os.environ.get('QPR_PDF_FONT_BOLD', '/usr/share/fonts/truetype/noto/NotoSansDevanagari-Bold.ttf')
+
+# Performance instrumentation (qpr_app.middleware.PerformanceMiddleware)
+# Requests at least this slow are logged as JSON lines; 0 logs every request
+QPR_SLOW_REQUEST_MS = int(os.environ.get('QPR_SLOW_REQUEST_MS', 500))
+QPR_SERVER_TIMING = True
+# In the git-ignored logs/ directory by default; the FileHandler needs the directory to exist
+QPR_PERFORMANCE_LOG = os.environ.get('QPR_PERFORMANCE_LOG', str(BASE_DIR / 'logs' / 'performance.log'))
+os.makedirs(os.path.dirname(os.path.abspath(QPR_PERFORMANCE_LOG)), exist_ok=True)
+
+# N+1 query detection (qpr_app.middleware.NPlusOneMiddleware), off unless
+# QPR_NPLUSONE_DETECTION=1. Query shapes repeated QPR_NPLUSONE_THRESHOLD times
+# in one request are logged with their call site; QPR_NPLUSONE_RAISE=1 turns
+# the log line into an error.
+QPR_NPLUSONE_DETECTION = os.environ.get('QPR_NPLUSONE_DETECTION') == '1'
+QPR_NPLUSONE_THRESHOLD = int(os.environ.get('QPR_NPLUSONE_THRESHOLD', 3))
+QPR_NPLUSONE_RAISE = os.environ.get('QPR_NPLUSONE_RAISE') == '1'
+if QPR_NPLUSONE_DETECTION:
+    MIDDLEWARE.insert(1, 'qpr_app.middleware.NPlusOneMiddleware')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+        'verbose': {'format': '%(asctime)s %(levelname)s %(name)s: %(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'verbose'},
+        'performance_file': {
+            'class': 'logging.FileHandler',
+            'filename': QPR_PERFORMANCE_LOG,
+            'formatter': 'message',
+            'delay': True,  # Only create the file once something is logged
+        },
+    },
+    'loggers': {
+        'qpr.performance': {'handlers': ['performance_file'], 'level': 'INFO', 'propagate': False},
+        'qpr.nplusone': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+        'qpr_app': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
 # Production Security Settings
-# Update ALLOWED_HOSTS based on your deployment domain
-if not DEBUG:
+# Set QPR_ALLOWED_HOSTS to your deployment domain; these are the fallbacks
+if not ALLOWED_HOSTS and not DEBUG:
     ALLOWED_HOSTS = ['example.com', 'www.example.com']  # Update with your domain
-else:
+elif not ALLOWED_HOSTS:
     ALLOWED_HOSTS = ['localhost', '127.0.0.1', '*.local']
\ No newline at end of file
@@ -1,14 +1,20 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
 from django.views.generic import TemplateView
 from django.contrib.auth.decorators import login_required
 from qpr_app.views import (
-    api_records, api_record_detail, request_edit_api, login_view, register_view, logout_view,
+    api_records, api_record_detail, api_session, request_edit_api, login_view, register_view, logout_view,
     user_profile, user_dashboard, user_office_form, change_password,
     hod_dashboard, hod_detail_list, hod_manager_requests,
-    admin_dashboard, admin_approve_request, admin_employee_list, admin_create_hod, api_update_hod
+    admin_dashboard, admin_approve_request, admin_employee_list, admin_create_hod, api_update_hod,
+    admin_export_records, admin_import_records, admin_job_download, api_job_status, report_pdf
 )
 
+if settings.QPR_ASYNC_API:
+    # Under ASGI the JSON API is served by its async variants (same URLs and responses)
+    from qpr_app.async_api import api_records, api_record_detail, api_session, request_edit_api
+
 urlpatterns = [
     path('', login_required(TemplateView.as_view(template_name='index.html'), login_url='login_view'), name='home'),
     path('login/', login_view, name='login_view'),
@@ -31,6 +37,9 @@ urlpatterns = [
     path('admin-approve-request/<int:request_id>/', admin_approve_request, name='admin_approve_request'),
     path('admin-employee-list/', admin_employee_list, name='admin_employee_list'),
     path('admin-create-hod/', admin_create_hod, name='admin_create_hod'),
+    path('admin-export/', admin_export_records, name='admin_export_records'),
+    path('admin-import/', admin_import_records, name='admin_import_records'),
+    path('admin-jobs/<int:job_id>/download/', admin_job_download, name='admin_job_download'),
     
     # Django admin - keep at the end to avoid conflicts
     path('admin/', admin.site.urls),
@@ -38,10 +47,13 @@ urlpatterns = [
     # API routes
     path('api/records', api_records),
     path('api/records/<int:record_id>/', api_record_detail),
+    path('api/session/', api_session, name='api_session'),
     path('api/request-edit/', request_edit_api, name='request_edit_api'),
     path('api/update-hod/', api_update_hod, name='api_update_hod'),
+    path('api/jobs/<int:job_id>/', api_job_status, name='api_job_status'),
 
     # Report list and detail pages
     path('reports/', login_required(TemplateView.as_view(template_name='report_list.html'), login_url='login_view'), name='reports'),
     path('reports/<int:record_id>/', login_required(TemplateView.as_view(template_name='report_detail.html'), login_url='login_view'), name='report_detail'),
+    path('reports/<int:record_id>/pdf/', report_pdf, name='report_pdf'),
 ]
\ No newline at end of file
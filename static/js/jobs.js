@@ -0,0 +1,73 @@
+// Background jobs (qpr_app/jobs.py): poll a job's status URL until it has finished
+const JOB_POLL_MS = 1000;
+
+function describeJob(job) {
+    if (job.status === 'queued') {
+        return 'Waiting for a worker…';
+    }
+    if (job.status === 'failed') {
+        return 'Failed: ' + (job.error || 'unknown error');
+    }
+    if (job.status === 'succeeded') {
+        return 'Done';
+    }
+    const count = job.total ? `${job.done} of ${job.total}` : `${job.done}`;
+    return (job.message || 'Working') + (job.percent !== null ? ` (${job.percent}%, ${count})` : '');
+}
+
+// Resolves with the final job status; onUpdate(job) is called after every poll
+async function pollJob(statusUrl, onUpdate) {
+    for (;;) {
+        const response = await fetch(statusUrl, {headers: {'Accept': 'application/json'}});
+        const job = await response.json();
+        if (!response.ok) {
+            throw new Error(job.error || `HTTP ${response.status}`);
+        }
+        if (onUpdate) {
+            onUpdate(job);
+        }
+        if (job.status === 'succeeded' || job.status === 'failed') {
+            return job;
+        }
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_MS));
+    }
+}
+
+// Forms marked data-job-form are sent in the background; the response names
+// the queued job, whose progress is shown in the element data-job-status
+// points to, and whose file is downloaded when it is done
+document.querySelectorAll('form[data-job-form]').forEach(form => {
+    form.addEventListener('submit', async (event) => {
+        event.preventDefault();
+        const status = document.querySelector(form.dataset.jobStatus);
+        const body = new FormData(form);
+        if (event.submitter && event.submitter.name) {
+            body.append(event.submitter.name, event.submitter.value);
+        }
+        const buttons = document.querySelectorAll(`button[form="${form.id}"], #${form.id} button`);
+        buttons.forEach(b => b.disabled = true);
+        status.textContent = 'Starting…';
+        try {
+            const response = await fetch(form.action, {method: 'POST', body: body});
+            const queued = await response.json();
+            if (!response.ok) {
+                throw new Error(queued.error || `HTTP ${response.status}`);
+            }
+            const job = await pollJob(queued.status_url, job => status.textContent = describeJob(job));
+            if (job.download_url) {
+                window.location = job.download_url;
+            }
+        } catch (error) {
+            status.textContent = 'Error: ' + error.message;
+        } finally {
+            buttons.forEach(b => b.disabled = false);
+        }
+    });
+});
+
+// A page showing a running job (data-job-status-url) reloads once it has finished
+document.querySelectorAll('[data-job-status-url]').forEach(element => {
+    pollJob(element.dataset.jobStatusUrl, job => element.textContent = describeJob(job))
+        .then(() => location.reload())
+        .catch(error => element.textContent = 'Error: ' + error.message);
+});
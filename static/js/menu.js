@@ -0,0 +1,14 @@
+// Floating page menu shared by the dashboards: toggle on click, close on outside click
+const menuToggle = document.getElementById('menuToggle');
+const menuItems = document.getElementById('menuItems');
+
+menuToggle.addEventListener('click', () => {
+    menuItems.classList.toggle('active');
+});
+
+// Close menu when clicking outside
+document.addEventListener('click', (e) => {
+    if (!e.target.closest('.menu-toggle') && !e.target.closest('.menu-items')) {
+        menuItems.classList.remove('active');
+    }
+});
@@ -0,0 +1,62 @@
+// Admin Dashboard (templates/admin_dashboard.html)
+// Open Edit HOD Modal
+function openEditHODModal(hodName, employeeCode) {
+    document.getElementById('oldHODName').value = hodName;
+    document.getElementById('oldHODNameHidden').value = hodName;
+    document.getElementById('oldEmployeeCode').value = employeeCode;
+    document.getElementById('oldEmployeeCodeHidden').value = employeeCode;
+    document.getElementById('newHODName').value = hodName;
+    document.getElementById('newEmployeeCode').value = employeeCode;
+
+    const modal = new bootstrap.Modal(document.getElementById('editHODModal'));
+    modal.show();
+}
+
+// Save HOD Changes
+async function saveHODChanges() {
+    const oldHODName = document.getElementById('oldHODNameHidden').value;
+    const oldEmployeeCode = document.getElementById('oldEmployeeCodeHidden').value;
+    const newHODName = document.getElementById('newHODName').value.trim();
+    const newEmployeeCode = document.getElementById('newEmployeeCode').value.trim();
+
+    if (!newHODName || !newEmployeeCode) {
+        alert('Please fill in all fields');
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/update-hod/', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]')?.value || ''
+            },
+            body: JSON.stringify({
+                old_hod_name: oldHODName,
+                new_hod_name: newHODName,
+                old_employee_code: oldEmployeeCode,
+                new_employee_code: newEmployeeCode
+            })
+        });
+
+        const data = await response.json();
+
+        if (data.success) {
+            // The rename runs as a background job (jobs.js); wait for it
+            const job = await pollJob(data.status_url);
+            if (job.status === 'failed') {
+                alert('✗ Error: ' + job.error);
+                return;
+            }
+            alert('✓ ' + job.result.message);
+            // Close modal and reload page
+            bootstrap.Modal.getInstance(document.getElementById('editHODModal')).hide();
+            setTimeout(() => location.reload(), 500);
+        } else {
+            alert('✗ Error: ' + (data.error || 'Failed to update HOD'));
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        alert('Error updating HOD: ' + error.message);
+    }
+}
@@ -0,0 +1,36 @@
+// Quarterly Progress Report (QPR) (templates/index.html)
+// Immediately populate year dropdown on page load
+function initYearDropdown() {
+    const yearSelect = document.getElementById('year');
+    if (!yearSelect) {
+        setTimeout(initYearDropdown, 100);
+        return;
+    }
+
+    const currentDate = new Date();
+    const currentMonth = currentDate.getMonth();
+    const currentYear = currentDate.getFullYear();
+
+    let fiscalYearStart = currentMonth < 3 ? currentYear - 1 : currentYear;
+    let fiscalYearEnd = fiscalYearStart + 1;
+
+    yearSelect.innerHTML = '';
+
+    const startYear = 2000;
+    const endYear = new Date().getFullYear() + 50; // Current year + 50 years ahead
+
+    for (let year = startYear; year <= endYear; year++) {
+        const option = document.createElement('option');
+        option.value = `${year}-${year + 1}`;
+        option.textContent = `${year}-${year + 1}`;
+        yearSelect.appendChild(option);
+    }
+
+    yearSelect.value = `${fiscalYearStart}-${fiscalYearEnd}`;
+}
+
+if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', initYearDropdown);
+} else {
+    initYearDropdown();
+}
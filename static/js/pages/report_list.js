@@ -0,0 +1,141 @@
+// Report List (templates/report_list.html)
+const REPORT_LIST_API_URL = "/api/records";
+
+// Function to mask sensitive fields
+function maskSensitiveData(value) {
+    if (!value || value === '-') return '-';
+    const valueStr = String(value);
+    if (valueStr.length <= 2) return valueStr;
+    return valueStr.charAt(0) + '*'.repeat(valueStr.length - 2) + valueStr.charAt(valueStr.length - 1);
+}
+
+// Paging state of this page; named apart from script.js's PAGE_SIZE / nextCursor
+const REPORT_LIST_PAGE_SIZE = 20;
+let reportListCursor = null; // Cursor for the next page, null when all records are loaded
+
+async function loadList(append = false) {
+    try {
+        const params = new URLSearchParams({ limit: REPORT_LIST_PAGE_SIZE });
+        if (append && reportListCursor) params.set('cursor', reportListCursor);
+        const res = await fetch(`${REPORT_LIST_API_URL}?${params}`);
+        const page = await res.json();
+        const data = page.results || [];
+        reportListCursor = page.next_cursor;
+
+        const tbody = document.getElementById('tableBody');
+        const loadMoreRow = document.getElementById('loadMoreRow');
+        if (loadMoreRow) loadMoreRow.remove();
+        if (!append) tbody.innerHTML = '';
+        if (!append && data.length === 0) {
+            tbody.innerHTML = '<tr><td colspan="6" class="text-center text-muted">No records found</td></tr>';
+            return;
+        }
+        data.forEach(r => {
+            const tr = document.createElement('tr');
+            const status = r.status === 'Draft' ? '<span class="badge bg-primary">Draft</span>' : '<span class="badge bg-success">Submitted</span>';
+            let actionButtons = '';
+            if (r.status === 'Draft') {
+                actionButtons = `<button class="btn btn-sm btn-outline-warning" onclick="event.stopPropagation(); edit(${r.id})">Edit</button>`;
+            } else if (r.edit_approved) {
+                // If submitted but has approved edit request, show Edit button
+                actionButtons = `<button class="btn btn-sm btn-outline-warning" onclick="event.stopPropagation(); edit(${r.id})">Edit</button>`;
+            } else {
+                actionButtons = `<button class="btn btn-sm btn-outline-info" onclick="event.stopPropagation(); requestEdit(${r.id})">Request to Edit</button>`;
+            }
+            // Mask the office code in the list view
+            const maskedCode = maskSensitiveData(r.officeCode);
+            tr.innerHTML = `
+                <td>${r.officeName || '-'}</td>
+                <td>${maskedCode}</td>
+                <td>${r.region || '-'}</td>
+                <td>${r.quarter || '-'}</td>
+                <td>${status}</td>
+                <td>
+                    ${actionButtons}
+                    <button class="btn btn-sm btn-outline-primary ms-1" onclick="view(${r.id})">View</button>
+                </td>
+            `;
+            tr.addEventListener('click', () => { if (r.status === 'Submitted') view(r.id); });
+            tbody.appendChild(tr);
+        });
+
+        // Offer the next page while more records are available
+        if (reportListCursor) {
+            const tr = document.createElement('tr');
+            tr.id = 'loadMoreRow';
+            tr.innerHTML = `
+                <td colspan="6" class="text-center">
+                    <button class="btn btn-sm btn-outline-secondary" onclick="loadList(true)">Load more</button>
+                </td>
+            `;
+            tbody.appendChild(tr);
+        }
+    } catch (err) {
+        console.error(err);
+    }
+}
+
+function view(id) {
+    // First check if the record can be edited (approved or not submitted)
+    fetch(`/api/records/${id}/`)
+        .then(res => res.json())
+        .then(record => {
+            if (record.can_edit) {
+                // If editable, load it in the main form
+                localStorage.setItem('editRecordId', String(id));
+                window.location.href = '/';
+            } else {
+                // If not editable, show the read-only view
+                window.location.href = `/reports/${id}/`;
+            }
+        })
+        .catch(err => {
+            console.error(err);
+            // Fallback to read-only view
+            window.location.href = `/reports/${id}/`;
+        });
+}
+
+function edit(id) {
+    // Store the id so index page can pick it up and populate form
+    localStorage.setItem('editRecordId', String(id));
+    window.location.href = '/';
+}
+
+function requestEdit(id) {
+    const reason = prompt("Please enter the reason for requesting to edit this report:");
+    if (reason === null) return; // User cancelled
+
+    if (!reason.trim()) {
+        alert("Please provide a reason for your request");
+        return;
+    }
+
+    fetch(`/api/request-edit/`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]')?.value || ''
+        },
+        body: JSON.stringify({
+            request_type: 'qpr',
+            record_id: id,
+            reason: reason
+        })
+    })
+    .then(res => res.json())
+    .then(data => {
+        if (data.success) {
+            alert("Request sent to HOD and Admin successfully!");
+            loadList();
+        } else {
+            alert("Error: " + (data.error || "Failed to send request"));
+        }
+    })
+    .catch(err => {
+        console.error(err);
+        alert("Failed to send request");
+    });
+}
+
+window.addEventListener('DOMContentLoaded', () => loadList());
@@ -0,0 +1,40 @@
+// User Profile (templates/user_profile.html)
+function requestProfileEdit() {
+    const reason = document.getElementById('editReason').value.trim();
+
+    if (!reason) {
+        alert('Please provide a reason for your edit request');
+        return;
+    }
+
+    const requestData = {
+        request_type: 'profile',
+        reason: reason
+    };
+
+    fetch('/api/request-edit/', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]')?.value || ''
+        },
+        body: JSON.stringify(requestData)
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert(data.message);
+            // Close the modal
+            const modal = bootstrap.Modal.getInstance(document.getElementById('requestEditModal'));
+            modal.hide();
+            // Reload the page
+            location.reload();
+        } else {
+            alert('Error: ' + (data.error || 'Unknown error occurred'));
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('An error occurred while processing your request');
+    });
+}
@@ -27,7 +27,7 @@ function checkAuthentication() {
     const userDisplay = document.getElementById('userDisplay');
     if (!userDisplay) return;
     
-    fetch('/api/records')
+    fetch('/api/session/')
         .then(res => {
             if (res.status === 401) {
                 // Not authenticated, redirect to login
@@ -148,67 +148,107 @@ function populateYearDropdown() {
 }
 
 // --- 2. Load Data (GET) ---
-async function loadData() {
-    try {
-        const response = await fetch(API_URL);
-        const data = await response.json();
+const PAGE_SIZE = 20;
+let nextCursor = null; // Cursor for the next page of records, null when all are loaded
+
+// Fetch one page of records; the API returns { results, next_cursor }
+async function fetchRecordsPage(cursor) {
+    const params = new URLSearchParams({ limit: PAGE_SIZE });
+    if (cursor) params.set('cursor', cursor);
+    const response = await fetch(`${API_URL}?${params}`);
+    return response.json();
+}
 
-        // *** FIX 1: Update the global variable so editRecord finds the data ***
-        records = data;
-        
-        // If tableBody exists on this page, populate the table (report list or main view)
+// Render records as table rows, appending to what is already shown
+function renderRecordRows(tableBody, pageRecords) {
+    pageRecords.forEach(record => {
+        let actionButtons = '';
+        let statusBadge = '';
+
+        if (record.status === 'Draft') {
+            statusBadge = '<span class="badge bg-primary">Draft</span>';
+            actionButtons = `
+                <button class="btn btn-sm btn-outline-warning fw-bold" onclick="event.stopPropagation(); editRecord(${record.id})">
+                    ✏️ Edit
+                </button>
+            `;
+        } else {
+            statusBadge = '<span class="badge bg-success">Submitted</span>';
+            actionButtons = `
+                <button class="btn btn-sm btn-outline-danger fw-bold" onclick="event.stopPropagation(); deleteRecord(${record.id})">
+                    ✘ Delete
+                </button>
+            `;
+        }
+
+        const row = document.createElement('tr');
+        row.innerHTML = `
+            <td>${record.officeName || '-'}</td>
+            <td>${record.officeCode || '-'}</td>
+            <td>${record.region || '-'}</td>
+            <td>${record.quarter || '-'}</td>
+            <td>${statusBadge}</td>
+            <td>${actionButtons}</td>
+        `;
+        tableBody.appendChild(row);
+
+        if (record.status === 'Submitted') {
+            row.style.cursor = 'pointer';
+            row.addEventListener('click', () => toggleDetailsRow(row, record));
+        }
+    });
+}
+
+// Show a "Load more" row while further pages are available
+function renderLoadMoreRow(tableBody) {
+    const existing = document.getElementById('loadMoreRow');
+    if (existing) existing.remove();
+    if (!nextCursor) return;
+
+    const row = document.createElement('tr');
+    row.id = 'loadMoreRow';
+    row.innerHTML = `
+        <td colspan="6" class="text-center">
+            <button class="btn btn-sm btn-outline-secondary" onclick="loadData(true)">Load more</button>
+        </td>
+    `;
+    tableBody.appendChild(row);
+}
+
+async function loadData(append = false) {
+    try {
         const tableBody = document.getElementById('tableBody');
-        if (tableBody && tableBody !== null) {
+        const editId = localStorage.getItem('editRecordId');
+
+        if (!append) {
+            records = [];
+            nextCursor = null;
+        }
+
+        // The record list is only needed where a table shows it
+        if (tableBody) {
+            const page = await fetchRecordsPage(append ? nextCursor : null);
+            const pageRecords = page.results || [];
+
+            // *** FIX 1: Update the global variable so editRecord finds the data ***
+            records = records.concat(pageRecords);
+            nextCursor = page.next_cursor;
+
             try {
-                tableBody.innerHTML = ''; // Clear existing rows
+                if (!append) tableBody.innerHTML = ''; // Clear existing rows
 
                 if (records.length === 0) {
                     tableBody.innerHTML = '<tr><td colspan="6" class="text-center text-muted">No records found</td></tr>';
                 } else {
-                    records.forEach(record => {
-                    let actionButtons = '';
-                    let statusBadge = '';
-
-                    if (record.status === 'Draft') {
-                        statusBadge = '<span class="badge bg-primary">Draft</span>';
-                        actionButtons = `
-                            <button class="btn btn-sm btn-outline-warning fw-bold" onclick="event.stopPropagation(); editRecord(${record.id})">
-                                ✏️ Edit
-                            </button>
-                        `;
-                    } else {
-                        statusBadge = '<span class="badge bg-success">Submitted</span>';
-                        actionButtons = `
-                            <button class="btn btn-sm btn-outline-danger fw-bold" onclick="event.stopPropagation(); deleteRecord(${record.id})">
-                                ✘ Delete
-                            </button>
-                        `;
-                    }
-
-                    const row = document.createElement('tr');
-                    row.innerHTML = `
-                        <td>${record.officeName || '-'}</td>
-                        <td>${record.officeCode || '-'}</td>
-                        <td>${record.region || '-'}</td>
-                        <td>${record.quarter || '-'}</td>
-                        <td>${statusBadge}</td>
-                        <td>${actionButtons}</td>
-                    `;
-                    tableBody.appendChild(row);
-
-                    if (record.status === 'Submitted') {
-                        row.style.cursor = 'pointer';
-                        row.addEventListener('click', () => toggleDetailsRow(row, record));
-                    }
-                });
-            }
+                    renderRecordRows(tableBody, pageRecords);
+                    renderLoadMoreRow(tableBody);
+                }
             } catch(err) {
                 console.error('Error populating tableBody:', err);
             }
         }
 
         // Check if we're coming from edit action in report list
-        const editId = localStorage.getItem('editRecordId');
         console.log("After loadData - editId from localStorage:", editId);
         console.log("Total records loaded:", records.length);
         
@@ -217,15 +257,23 @@ async function loadData() {
             const rid = parseInt(editId, 10);
             console.log("Attempting to edit record ID:", rid);
             if (!isNaN(rid)) {
-                const rec = records.find(r => r.id === rid);
-                console.log("Found record in array:", rec);
+                let rec = records.find(r => r.id === rid);
+                if (!rec) {
+                    // Not among the loaded pages - fetch just this record
+                    const res = await fetch(`${API_URL}/${rid}/`);
+                    if (res.ok) {
+                        rec = await res.json();
+                        records.push(rec);
+                    }
+                }
+                console.log("Found record:", rec);
                 if (rec) {
                     editRecord(rid);
                 }
             }
-        } else {
+        } else if (!append) {
             // Only show Tab 1 if not editing
-            if (!document.getElementById('tableBody')) {
+            if (!tableBody) {
                 showTab(1);
             }
         }